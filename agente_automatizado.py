@@ -8,36 +8,31 @@ import pandas as pd
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any
-import google.generativeai as genai
-from config import GEMINI_API_KEY, GEMINI_MODEL, SCHEDULE_HOURS
+from config import SCHEDULE_HOURS, config
 from utils import executar_com_seguranca, salvar_resultado, formatar_timestamp
-
-# Configurar API
-genai.configure(api_key=GEMINI_API_KEY)
+from cliente_gemini import cliente_gemini
+from registro_agentes import registro_agentes
 
 class AgenteAutomatizado:
     """Agente com capacidades de automação e agendamento"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel(GEMINI_MODEL)
+        self.cliente = cliente_gemini
         self.logger = logging.getLogger('agente.automatizado')
         self.log_atividades = []
-        self.importar_agentes()
     
-    def importar_agentes(self):
-        """Importa outros agentes para uso integrado"""
-        try:
-            from agente_vendas import AgenteAnaliseVendas
-            from agente_suporte import AgenteSuporte
-            from agente_conteudo import AgenteConteudo
-            
-            self.agente_vendas = AgenteAnaliseVendas()
-            self.agente_suporte = AgenteSuporte()
-            self.agente_conteudo = AgenteConteudo()
-            
-            self.logger.info("Agentes importados com sucesso")
-        except ImportError as e:
-            self.logger.error(f"Erro ao importar agentes: {str(e)}")
+    # Agentes integrados: obtidos do registro compartilhado apenas quando usados
+    @property
+    def agente_vendas(self):
+        return registro_agentes.obter('vendas')
+    
+    @property
+    def agente_suporte(self):
+        return registro_agentes.obter('suporte')
+    
+    @property
+    def agente_conteudo(self):
+        return registro_agentes.obter('conteudo')
     
     def monitorar_pasta_relatorios(self, caminho_pasta: str = "data") -> List[Path]:
         """Monitora pasta para novos relatórios"""
@@ -95,7 +90,7 @@ class AgenteAutomatizado:
             3. Recomendações de processamento
             """
             
-            response = self.model.generate_content(prompt)
+            response = self.cliente.gerar(prompt, agente='automatizado')
             
             resultado = {
                 "arquivo": arquivo.name,
@@ -144,6 +139,14 @@ class AgenteAutomatizado:
         except Exception as e:
             self.logger.error(f"❌ Erro na rotina automática: {str(e)}")
     
+    def retreinar_classificador_urgencia(self):
+        """Retreina o classificador local de urgência com o histórico de suporte"""
+        resultado = self.agente_suporte.treinar_classificador_urgencia()
+        if resultado.get("sucesso"):
+            self.logger.info(f"🧠 Classificador de urgência retreinado - acurácia {resultado['dados']['acuracia']:.1%}")
+        else:
+            self.logger.info(f"🧠 Classificador de urgência não retreinado: {resultado.get('erro')}")
+    
     def programar_execucoes(self):
         """Programa execuções automáticas"""
         try:
@@ -157,6 +160,10 @@ class AgenteAutomatizado:
             # Execução de teste a cada hora
             schedule.every().hour.do(self.executar_rotina_automatica)
             
+            # Retreino periódico do classificador local de urgência
+            horas_retreino = config.AGENTE_CONFIG['automatizado'].get('retreino_urgencia_horas', 6)
+            schedule.every(horas_retreino).hours.do(self.retreinar_classificador_urgencia)
+            
             self.logger.info(f"⏰ Agente programado para executar às {SCHEDULE_HOURS}")
             self.logger.info("Pressione Ctrl+C para parar o agente")
             
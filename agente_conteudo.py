@@ -2,26 +2,80 @@
 Agente de Criação de Conteúdo
 """
 import json
+import time
 import logging
+import threading
 import pandas as pd
-from typing import Dict, Any, List
-import google.generativeai as genai
-from config import GEMINI_API_KEY, GEMINI_MODEL
-from utils import executar_com_seguranca, salvar_resultado
-
-# Configurar API
-genai.configure(api_key=GEMINI_API_KEY)
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Dict, Any, List, Tuple, Callable, Optional
+from config import config
+from utils import executar_com_seguranca, salvar_resultado, normalizar_texto
+from cliente_gemini import cliente_gemini
+from cache_respostas import CacheRespostas
+from database import db_manager
+from prazo import obter_prazo, submeter_com_prazo
 
 class AgenteConteudo:
     """Agente especializado em criação de conteúdo para marketing"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel(GEMINI_MODEL)
+        self.cliente = cliente_gemini
         self.logger = logging.getLogger('agente.conteudo')
+        self.timeout = config.PERFORMANCE_CONFIG['timeout_requests']
+        self.config_conteudo = config.AGENTE_CONFIG['conteudo']
+        self.estatisticas_cache = {'hits': 0, 'misses': 0, 'forcados': 0}
+        self.lock_cache = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.PERFORMANCE_CONFIG['max_workers'],
+            thread_name_prefix='conteudo'
+        )
+        # Pool próprio para as seções da newsletter: ela mesma pode estar rodando no pool da campanha
+        self.executor_secoes = ThreadPoolExecutor(
+            max_workers=self.config_conteudo.get('newsletter_paralelismo', 6),
+            thread_name_prefix='conteudo-secoes'
+        )
+    
+    @staticmethod
+    def chave_conteudo(tipo: str, *entradas: Any) -> str:
+        """Chave do cache de conteúdo: tipo + entradas normalizadas"""
+        partes = [[normalizar_texto(item) for item in entrada] if isinstance(entrada, (list, tuple))
+                  else normalizar_texto(entrada) for entrada in entradas]
+        return CacheRespostas.gerar_chave(tipo, *partes)
+    
+    def obter_conteudo_cache(self, chave: str, forcar_novo: bool = False) -> Optional[str]:
+        """Texto já gerado para as mesmas entradas dentro do TTL (compartilhado entre workers pelo banco)"""
+        if not self.config_conteudo.get('cache_conteudo', True):
+            return None
+        if forcar_novo:
+            with self.lock_cache:
+                self.estatisticas_cache['forcados'] += 1
+            return None
+        registro = db_manager.obter_conteudo_por_chave(chave, self.config_conteudo.get('cache_conteudo_ttl', 86400))
+        with self.lock_cache:
+            self.estatisticas_cache['hits' if registro else 'misses'] += 1
+        return registro['conteudo'] if registro else None
+    
+    def obter_estatisticas_cache(self) -> Dict[str, Any]:
+        """Contadores de hit/miss do cache de conteúdo"""
+        with self.lock_cache:
+            stats = dict(self.estatisticas_cache)
+        consultas = stats['hits'] + stats['misses']
+        stats['taxa_acerto'] = stats['hits'] / consultas * 100 if consultas else 0
+        return stats
     
-    def gerar_post_social(self, tema: str, plataforma: str, tom: str, publico_alvo: str = "geral") -> str:
-        """Gera posts adaptados para cada rede social"""
+    def gerar_post_social(self, tema: str, plataforma: str, tom: str, publico_alvo: str = "geral",
+                          forcar_novo: bool = False, propagar_erros: bool = False) -> str:
+        """Gera posts adaptados para cada rede social (forcar_novo ignora o conteúdo já gerado)
+
+        propagar_erros: relança a exceção em vez de retornar o texto "Erro na criação..." (campanha).
+        """
         try:
+            chave = self.chave_conteudo('post', tema, plataforma, tom, publico_alvo)
+            conteudo_cache = self.obter_conteudo_cache(chave, forcar_novo)
+            if conteudo_cache is not None:
+                self.logger.info(f"Post obtido do cache para {plataforma} sobre {tema}")
+                return conteudo_cache
+            
             diretrizes_plataforma = {
                 "Instagram": "- Use hashtags relevantes (3-5)\n- Inclua emojis moderadamente\n- Foque em visual e storytelling\n- Máximo 2.200 caracteres",
                 "LinkedIn": "- Tom profissional e informativo\n- Evite emojis excessivos\n- Inclua dados e insights\n- Máximo 1.300 caracteres",
@@ -47,47 +101,212 @@ class AgenteConteudo:
             Seja criativo, engajador e alinhado com a marca.
             """
             
-            response = self.model.generate_content(prompt)
+            response = self.cliente.gerar(prompt, agente='conteudo')
+            db_manager.inserir_conteudo('post', tema, plataforma, response.text, publico_alvo, None, None,
+                                        tom=tom, chave=chave)
             self.logger.info(f"Post gerado para {plataforma} sobre {tema}")
             return response.text
             
         except Exception as e:
             self.logger.error(f"Erro ao gerar post: {str(e)}")
+            if propagar_erros:
+                raise
             return f"Erro na criação do conteúdo: {str(e)}"
     
-    def criar_newsletter(self, topicos: List[str], publico_alvo: str, empresa: str = "Nossa empresa") -> str:
-        """Gera newsletter personalizada"""
+    def criar_newsletter(self, topicos: List[str], publico_alvo: str, empresa: str = "Nossa empresa",
+                         forcar_novo: bool = False, modo: str = None, propagar_erros: bool = False) -> str:
+        """Gera newsletter personalizada (forcar_novo ignora o conteúdo já gerado)
+
+        modo: 'unica' (uma chamada para o texto inteiro) ou 'secoes' (abertura, cada tópico
+        e fechamento gerados em paralelo e montados localmente); padrão em AGENTE_CONFIG.
+        propagar_erros: relança a exceção em vez de retornar o texto "Erro na criação..." (campanha).
+        """
         try:
-            prompt = f"""
-            Crie uma newsletter profissional para: {publico_alvo}
-            
-            Empresa: {empresa}
-            Tópicos a abordar:
-            {chr(10).join([f"- {topico}" for topico in topicos])}
-            
-            ESTRUTURA DA NEWSLETTER:
-            1. Assunto chamativo (máximo 50 caracteres)
-            2. Introdução personalizada e envolvente
-            3. Desenvolvimento dos tópicos com subtítulos
-            4. Call-to-action claro e direcionado
-            5. Despedida profissional
-            
-            DIRETRIZES:
-            - Tom: profissional mas acessível
-            - Linguagem: clara e objetiva
-            - Formatação: use quebras de linha e subtítulos
-            - Comprimento: 300-500 palavras
-            - Inclua valor real para o leitor
-            """
+            chave = self.chave_conteudo('newsletter', list(topicos), publico_alvo, empresa)
+            conteudo_cache = self.obter_conteudo_cache(chave, forcar_novo)
+            if conteudo_cache is not None:
+                self.logger.info(f"Newsletter obtida do cache para {publico_alvo}")
+                return conteudo_cache
             
-            response = self.model.generate_content(prompt)
-            self.logger.info(f"Newsletter criada para {publico_alvo}")
-            return response.text
+            modo = modo or self.config_conteudo.get('newsletter_modo', 'unica')
+            inicio = time.perf_counter()
+            if modo == 'secoes':
+                texto, ausentes = self.gerar_newsletter_secoes(topicos, publico_alvo, empresa)
+            else:
+                texto, ausentes = self.gerar_newsletter_unica(topicos, publico_alvo, empresa), []
+            
+            # Newsletter montada sem alguma parte fica no histórico, mas não é servida pelo cache
+            db_manager.inserir_conteudo('newsletter', '; '.join(topicos), empresa, texto, publico_alvo, None, None,
+                                        chave=None if ausentes else chave)
+            self.logger.info(f"Newsletter criada para {publico_alvo} (modo {modo}, "
+                             f"{(time.perf_counter() - inicio) * 1000:.0f} ms)")
+            return texto
             
         except Exception as e:
             self.logger.error(f"Erro ao criar newsletter: {str(e)}")
+            if propagar_erros:
+                raise
             return f"Erro na criação da newsletter: {str(e)}"
     
+    def gerar_newsletter_unica(self, topicos: List[str], publico_alvo: str, empresa: str) -> str:
+        """Newsletter inteira numa única geração (latência cresce com o número de tópicos)"""
+        prompt = f"""
+        Crie uma newsletter profissional para: {publico_alvo}
+        
+        Empresa: {empresa}
+        Tópicos a abordar:
+        {chr(10).join([f"- {topico}" for topico in topicos])}
+        
+        ESTRUTURA DA NEWSLETTER:
+        1. Assunto chamativo (máximo 50 caracteres)
+        2. Introdução personalizada e envolvente
+        3. Desenvolvimento dos tópicos com subtítulos
+        4. Call-to-action claro e direcionado
+        5. Despedida profissional
+        
+        DIRETRIZES:
+        - Tom: profissional mas acessível
+        - Linguagem: clara e objetiva
+        - Formatação: use quebras de linha e subtítulos
+        - Comprimento: 300-500 palavras
+        - Inclua valor real para o leitor
+        """
+        
+        return self.cliente.gerar(prompt, agente='conteudo').text
+    
+    def gerar_newsletter_secoes(self, topicos: List[str], publico_alvo: str, empresa: str) -> Tuple[str, List[str]]:
+        """Abertura, uma seção por tópico e fechamento em chamadas paralelas, montados na estrutura da newsletter
+
+        Retorna (texto, partes que falharam e ficaram de fora).
+        """
+        contexto = (f"Newsletter da empresa {empresa} para: {publico_alvo}. "
+                    f"Tom profissional mas acessível, linguagem clara e objetiva.")
+        palavras_secao = max(60, 320 // max(len(topicos), 1))
+        
+        prompt_abertura = f"""
+        {contexto}
+        Tópicos desta edição: {", ".join(topicos)}
+        
+        Escreva somente:
+        1. Na primeira linha, "Assunto: " seguido de um assunto chamativo (máximo 50 caracteres)
+        2. Uma introdução personalizada e envolvente (40-60 palavras) que antecipe os tópicos
+        """
+        
+        prompt_fechamento = f"""
+        {contexto}
+        Tópicos desta edição: {", ".join(topicos)}
+        
+        Escreva somente o encerramento (30-50 palavras):
+        1. Call-to-action claro e direcionado
+        2. Despedida profissional assinada por {empresa}
+        """
+        
+        tarefas = {"abertura": (self.gerar_trecho, (prompt_abertura,))}
+        for posicao, topico in enumerate(topicos):
+            prompt_secao = f"""
+            {contexto}
+            Escreva somente a seção sobre o tópico: {topico}
+            
+            - Comece com um subtítulo curto
+            - {palavras_secao - 20}-{palavras_secao + 20} palavras com valor real para o leitor
+            - Sem saudação, introdução geral ou despedida
+            """
+            tarefas[f"secao_{posicao}"] = (self.gerar_trecho, (prompt_secao,))
+        tarefas["fechamento"] = (self.gerar_trecho, (prompt_fechamento,))
+        
+        resultados = self.executar_em_paralelo(tarefas, executor=self.executor_secoes)
+        erros = resultados["erros"]
+        secoes = [resultados["conteudos"][f"secao_{posicao}"] for posicao in range(len(topicos))
+                  if f"secao_{posicao}" not in erros]
+        if "abertura" in erros or not secoes:
+            raise RuntimeError(erros.get("abertura") or next(iter(erros.values())))
+        if erros:
+            self.logger.warning(f"Newsletter montada sem as partes: {', '.join(erros)}")
+        
+        partes = [resultados["conteudos"]["abertura"].strip()] + [secao.strip() for secao in secoes]
+        if "fechamento" not in erros:
+            partes.append(resultados["conteudos"]["fechamento"].strip())
+        self.logger.info(f"Newsletter em seções: {len(tarefas)} chamadas em {resultados['tempo_total_ms']:.0f} ms")
+        return "\n\n".join(partes), list(erros)
+    
+    def gerar_trecho(self, prompt: str) -> str:
+        """Uma parte da newsletter em modo seções"""
+        return self.cliente.gerar(prompt, agente='conteudo').text
+    
+    def executar_em_paralelo(self, tarefas: Dict[str, Tuple[Callable, tuple]],
+                             executor: ThreadPoolExecutor = None) -> Dict[str, Any]:
+        """Executa chamadas independentes no executor limitado (padrão: self.executor), com timeout por tarefa
+
+        O timeout conta a partir do início de cada tarefa, não do envio: com o pool ocupado por
+        outras requisições, tarefas na fila só esperam (limitadas pelo prazo da requisição).
+        Uma chamada que passa do timeout não é interrompida (o SDK não permite): ela é
+        registrada em erros e o resultado é descartado; as que nem começaram são canceladas.
+        """
+        executor = executor or self.executor
+        inicio = time.perf_counter()
+        prazo = obter_prazo()
+        inicios = {}
+        futuros = {}
+        for nome, (funcao, argumentos) in tarefas.items():
+            futuros[nome] = submeter_com_prazo(executor, self.executar_tarefa, inicios, nome, funcao, *argumentos)
+        
+        conteudos, latencias, erros = {}, {}, {}
+        try:
+            for nome, futuro in futuros.items():
+                try:
+                    conteudos[nome], latencias[nome] = self.aguardar_tarefa(futuro, inicios, nome, prazo)
+                except FuturesTimeoutError:
+                    if prazo is None or prazo.restante() > 0:
+                        erros[nome] = f"Tempo limite de {self.timeout:.0f}s excedido"
+                    elif nome in inicios:
+                        erros[nome] = "Prazo da requisição esgotado"
+                    else:
+                        erros[nome] = "Prazo da requisição esgotado antes de a tarefa começar"
+                except Exception as e:
+                    erros[nome] = str(e)
+                
+                if nome in erros:
+                    self.logger.error(f"Erro na geração de {nome}: {erros[nome]}")
+                    conteudos[nome] = f"Erro na criação do conteúdo: {erros[nome]}"
+                    latencias[nome] = round((time.perf_counter() - inicio) * 1000, 1)
+        finally:
+            # Tarefas ainda na fila não chegam a gastar chamadas (e cota) do Gemini
+            for futuro in futuros.values():
+                futuro.cancel()
+        
+        return {
+            "conteudos": conteudos,
+            "latencias_ms": latencias,
+            "erros": erros,
+            "tempo_total_ms": round((time.perf_counter() - inicio) * 1000, 1)
+        }
+    
+    def executar_tarefa(self, inicios: Dict[str, float], nome: str, funcao: Callable, *argumentos) -> Tuple[Any, float]:
+        """Marca o início da tarefa (para o timeout) e a executa medindo o tempo"""
+        inicios[nome] = time.perf_counter()
+        return self.medir_tempo(funcao, *argumentos)
+    
+    def aguardar_tarefa(self, futuro, inicios: Dict[str, float], nome: str, prazo) -> Tuple[Any, float]:
+        """Resultado da tarefa; FuturesTimeoutError após self.timeout do início dela ou no fim do prazo"""
+        while True:
+            iniciada = inicios.get(nome)
+            # Na fila: verifica de tempos em tempos se a tarefa começou
+            espera = 0.05 if iniciada is None else max(iniciada + self.timeout - time.perf_counter(), 0)
+            if prazo is not None:
+                espera = min(espera, prazo.restante())
+            try:
+                return futuro.result(timeout=espera)
+            except FuturesTimeoutError:
+                if iniciada is not None or (prazo is not None and prazo.restante() <= 0):
+                    raise
+    
+    @staticmethod
+    def medir_tempo(funcao: Callable, *argumentos) -> Tuple[Any, float]:
+        """Executa a função e retorna (resultado, latência em ms)"""
+        inicio = time.perf_counter()
+        resultado = funcao(*argumentos)
+        return resultado, round((time.perf_counter() - inicio) * 1000, 1)
+    
     def gerar_campanha_completa(self, tema: str, plataformas: List[str], publico_alvo: str) -> Dict[str, Any]:
         """Gera campanha completa para múltiplas plataformas"""
         try:
@@ -99,15 +318,24 @@ class AgenteConteudo:
                 "timestamp": pd.Timestamp.now().isoformat()
             }
             
-            # Gerar posts para cada plataforma
-            for plataforma in plataformas:
-                post = self.gerar_post_social(tema, plataforma, "profissional", publico_alvo)
-                campanha["plataformas"][plataforma] = post
-            
-            # Gerar newsletter
+            # Gerar posts e newsletter em paralelo (cada chamada com timeout e erro isolados)
             topicos = [f"Tema principal: {tema}", "Dicas práticas", "Cases de sucesso", "Próximos passos"]
-            newsletter = self.criar_newsletter(topicos, publico_alvo)
-            campanha["newsletter"] = newsletter
+            tarefas = {
+                plataforma: (self.gerar_post_social, (tema, plataforma, "profissional", publico_alvo, False, True))
+                for plataforma in plataformas
+            }
+            tarefas["newsletter"] = (self.criar_newsletter, (topicos, publico_alvo, "Nossa empresa", False, None, True))
+            
+            resultados = self.executar_em_paralelo(tarefas)
+            
+            for nome, resultado in resultados["conteudos"].items():
+                if nome == "newsletter":
+                    campanha["newsletter"] = resultado
+                else:
+                    campanha["plataformas"][nome] = resultado
+            campanha["latencias_ms"] = resultados["latencias_ms"]
+            campanha["erros"] = resultados["erros"]
+            campanha["tempo_total_ms"] = resultados["tempo_total_ms"]
             
             # Salvar campanha
             arquivo_campanha = f"reports/campanha_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -2,23 +2,43 @@
 Agente de Suporte ao Cliente
 """
 import json
+import time
 import logging
+import threading
 import pandas as pd
-from typing import Dict, Any, List
-import google.generativeai as genai
-from config import GEMINI_API_KEY, GEMINI_MODEL
-from utils import executar_com_seguranca, salvar_resultado
-
-# Configurar API
-genai.configure(api_key=GEMINI_API_KEY)
+from typing import Dict, Any, List, Iterator, Tuple
+from config import config
+from utils import executar_com_seguranca, salvar_resultado, normalizar_texto, estimar_tokens
+from cliente_gemini import cliente_gemini
+from cache_respostas import CacheRespostas
+from indice_semantico import IndiceSemantico
+from base_conhecimento import BaseConhecimento
+from agente_suporte_offline import AgenteSuporteOffline
+from classificador_palavras import classificador_palavras
+from classificador_urgencia import ClassificadorUrgencia
+from database import db_manager
+from prazo import obter_prazo, medir_etapa
 
 class AgenteSuporte:
     """Agente especializado em atendimento ao cliente"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel(GEMINI_MODEL)
+        self.cliente = cliente_gemini
         self.logger = logging.getLogger('agente.suporte')
         self.base_conhecimento = self.carregar_base_conhecimento()
+        self.versao_base = CacheRespostas.gerar_chave(self.base_conhecimento)[:12]
+        self.cache = CacheRespostas('suporte')
+        self.config_suporte = config.AGENTE_CONFIG['suporte']
+        self.espera_limite = self.config_suporte.get('espera_limite_taxa', 0)
+        self.indice = IndiceSemantico()
+        self.base = BaseConhecimento(self.base_conhecimento)
+        self.agente_offline = AgenteSuporteOffline()
+        self.classificador_urgencia = ClassificadorUrgencia(min_amostras=self.config_suporte.get('urgencia_min_amostras', 50))
+        if self.config_suporte.get('urgencia_local', True) and self.classificador_urgencia.log_prior is None:
+            # Sem modelo salvo: primeiro treino em segundo plano (depois o agendador retreina)
+            threading.Thread(target=self.treinar_classificador_urgencia, name='treino-urgencia', daemon=True).start()
+        self.lock_prompt = threading.Lock()
+        self.estatisticas_prompt = {'prompts': 0, 'tokens_total': 0, 'entradas_total': 0}
     
     def carregar_base_conhecimento(self) -> Dict[str, List[str]]:
         """Carrega FAQ e documentos de produto"""
@@ -42,45 +62,120 @@ class AgenteSuporte:
             }
         }
     
-    def responder_pergunta(self, pergunta_usuario: str) -> str:
-        """Gera resposta inteligente usando Gemini + base de conhecimento"""
+    def obter_espera(self, espera_maxima: float = None) -> float:
+        """Espera aceita pelo limitador de taxa: a do chamador ou a padrão do agente"""
+        return self.espera_limite if espera_maxima is None else espera_maxima
+    
+    def chave_cache(self, operacao: str, pergunta: str) -> str:
+        """Chave do cache: operação + pergunta normalizada + versão da base"""
+        return CacheRespostas.gerar_chave(operacao, normalizar_texto(pergunta), self.versao_base)
+    
+    def obter_estatisticas_cache(self) -> Dict[str, Any]:
+        """Retorna contadores de hit/miss dos caches exato e semântico"""
+        return {
+            "exato": self.cache.obter_estatisticas(),
+            "semantico": self.indice.obter_estatisticas()
+        }
+    
+    def resposta_eh_offline(self, pergunta: str, resposta: str) -> bool:
+        """Indica se a resposta veio dos modelos do fallback offline (não deve ser reaproveitada)"""
+        return resposta in (
+            self.responder_pergunta_offline(pergunta, usar_recuperador=False),
+            self.agente_offline.gerar_resposta_offline(pergunta, usar_recuperador=False)
+        )
+    
+    def buscar_similar(self, pergunta: str) -> Dict[str, Any]:
+        """Busca pergunta já respondida semanticamente próxima (None se não houver)"""
+        if not self.config_suporte.get('cache_semantico', True):
+            return None
+        self.indice.sincronizar(db_manager, filtro=lambda p, r: not self.resposta_eh_offline(p, r))
+        return self.indice.buscar(
+            pergunta,
+            self.config_suporte.get('similaridade_minima', 0.85),
+            versao_base=self.versao_base,
+            ttl_segundos=self.config_suporte.get('cache_semantico_ttl', 7 * 86400)
+        )
+    
+    def montar_contexto(self, pergunta_usuario: str) -> str:
+        """Monta o prompt de resposta apenas com as entradas relevantes da base"""
+        entradas = self.base.selecionar(
+            pergunta_usuario,
+            self.config_suporte.get('kb_top_k', 3),
+            self.config_suporte.get('kb_orcamento_tokens', 400)
+        )
+        trechos = (chr(10) + ' ' * 8).join(f"- {e['texto']}" for e in entradas)
+        
+        contexto = f"""
+        PERGUNTA DO USUÁRIO: {pergunta_usuario}
+        
+        BASE DE CONHECIMENTO (trechos relevantes):
+        {trechos or "- Nenhum trecho específico encontrado"}
+        
+        Contatos de suporte: {self.base.formatar_contatos()}
+        
+        INSTRUÇÕES:
+        - Seja prestativo, profissional e empático
+        - Use informações da base de conhecimento quando relevante
+        - Se não souber algo específico, oriente a procurar suporte humano
+        - Seja conciso mas completo na resposta
+        - Use emojis moderadamente para tornar a resposta mais amigável
+        - Sempre ofereça canais de contato adicionais
+        """
+        self.registrar_prompt(contexto, len(entradas))
+        return contexto
+    
+    def registrar_prompt(self, contexto: str, entradas: int):
+        """Acumula o tamanho dos prompts para acompanhar a economia de tokens"""
+        with self.lock_prompt:
+            self.estatisticas_prompt['prompts'] += 1
+            self.estatisticas_prompt['tokens_total'] += estimar_tokens(contexto)
+            self.estatisticas_prompt['entradas_total'] += entradas
+    
+    def obter_estatisticas_prompt(self) -> Dict[str, Any]:
+        """Retorna tamanho médio dos prompts e o tamanho da base completa"""
+        with self.lock_prompt:
+            stats = dict(self.estatisticas_prompt)
+        prompts = stats['prompts']
+        stats['tokens_medio'] = stats['tokens_total'] / prompts if prompts else 0
+        stats['entradas_medio'] = stats['entradas_total'] / prompts if prompts else 0
+        stats['tokens_base_completa'] = self.base.tokens_total
+        stats['entradas_base_completa'] = len(self.base.entradas)
+        return stats
+    
+    def responder_pergunta(self, pergunta_usuario: str, espera_maxima: float = None) -> Dict[str, Any]:
+        """Gera resposta inteligente usando Gemini + base de conhecimento
+        
+        Retorna {"resposta", "offline"}; offline indica que a resposta veio do fallback local.
+        espera_maxima: segundos aguardando o limitador de taxa (padrão: espera_limite_taxa).
+        """
+        chave = self.chave_cache('resposta', pergunta_usuario)
+        resposta_cache = self.cache.obter(chave)
+        if resposta_cache is not None:
+            self.logger.info(f"Resposta obtida do cache: {pergunta_usuario[:50]}...")
+            return {"resposta": resposta_cache, "offline": False}
+        
         try:
-            contexto = f"""
-            PERGUNTA DO USUÁRIO: {pergunta_usuario}
+            contexto = self.montar_contexto(pergunta_usuario)
             
-            BASE DE CONHECIMENTO:
-            Produtos disponíveis: {', '.join(self.base_conhecimento['produtos'])}
-            
-            FAQ principais:
-            {chr(10).join(self.base_conhecimento['faq'])}
-            
-            Contatos de suporte:
-            {json.dumps(self.base_conhecimento['contatos'], indent=2)}
-            
-            INSTRUÇÕES:
-            - Seja prestativo, profissional e empático
-            - Use informações da base de conhecimento quando relevante
-            - Se não souber algo específico, oriente a procurar suporte humano
-            - Seja conciso mas completo na resposta
-            - Use emojis moderadamente para tornar a resposta mais amigável
-            - Sempre ofereça canais de contato adicionais
-            """
-            
-            response = self.model.generate_content(contexto)
+            response = self.cliente.gerar(contexto, agente='suporte', espera_maxima=self.obter_espera(espera_maxima))
             self.logger.info(f"Resposta gerada para pergunta: {pergunta_usuario[:50]}...")
-            return response.text
+            self.cache.armazenar(chave, response.text)
+            return {"resposta": response.text, "offline": False}
             
         except Exception as e:
             self.logger.error(f"Erro ao gerar resposta: {str(e)}")
             # Usar modo offline como fallback
-            return self.responder_pergunta_offline(pergunta_usuario)
+            return {"resposta": self.responder_pergunta_offline(pergunta_usuario), "offline": True}
     
-    def responder_pergunta_offline(self, pergunta_usuario: str) -> str:
+    def responder_pergunta_offline(self, pergunta_usuario: str, usar_recuperador: bool = True) -> str:
         """Resposta offline quando a API não está disponível"""
-        pergunta_lower = pergunta_usuario.lower()
+        tipo = classificador_palavras.classificar(pergunta_usuario)['intencao']
+        resposta_conhecida = None
+        if tipo not in ('pedido', 'entrega', 'devolução') and usar_recuperador:
+            resposta_conhecida = self.agente_offline.buscar_resposta_conhecida(pergunta_usuario)
         
         # Respostas pré-definidas baseadas em palavras-chave
-        if any(palavra in pergunta_lower for palavra in ['pedido', 'comprar', 'adquirir']):
+        if tipo == 'pedido':
             return """Olá! 👋 Ficaremos felizes em te ajudar a fazer seu pedido!
 
 Você pode realizar sua compra de duas maneiras:
@@ -93,7 +188,7 @@ Nossa equipe de vendas está pronta para te atender e esclarecer todas as dúvid
 Atenciosamente,
 Equipe de Vendas 💼"""
         
-        elif any(palavra in pergunta_lower for palavra in ['entrega', 'prazo', 'quando chega']):
+        elif tipo == 'entrega':
             return """Olá! 📦 
 
 Sobre o prazo de entrega:
@@ -106,7 +201,7 @@ Você receberá um código de rastreamento por email assim que o pedido for envi
 
 Alguma dúvida específica sobre entrega? Estamos aqui para ajudar! 🚚"""
         
-        elif any(palavra in pergunta_lower for palavra in ['devolução', 'devolver', 'trocar']):
+        elif tipo == 'devolução':
             return """Olá! 🔄
 
 Nossa política de devolução:
@@ -122,6 +217,9 @@ Para iniciar uma devolução, entre em contato conosco:
 
 Estamos prontos para te ajudar! 😊"""
         
+        elif resposta_conhecida:
+            return resposta_conhecida
+        
         else:
             return f"""Olá! 👋 
 
@@ -139,8 +237,25 @@ Nossa equipe de suporte está analisando sua solicitação e retornará em breve
 Atenciosamente,
 Equipe de Suporte 🎧"""
     
-    def classificar_urgencia(self, pergunta: str) -> str:
-        """Classifica urgência da solicitação"""
+    def classificar_urgencia(self, pergunta: str, espera_maxima: float = None) -> Tuple[str, str]:
+        """Classifica urgência da solicitação
+        
+        Retorna (urgência, origem): 'gemini', 'local' (classificador treinado), 'palavras' (fallback
+        offline) ou 'cache'. Só a origem 'gemini' é usada como rótulo no treino do classificador.
+        """
+        chave = self.chave_cache('urgencia', pergunta)
+        urgencia_cache = self.cache.obter(chave)
+        if urgencia_cache is not None:
+            return urgencia_cache, "cache"
+        
+        # Classificador local: só escala para o Gemini quando não está confiante
+        previsao = self.classificador_urgencia.classificar(pergunta) if self.config_suporte.get('urgencia_local', True) else None
+        if previsao is not None and previsao[1] >= self.config_suporte.get('urgencia_confianca_minima', 0.8):
+            self.classificador_urgencia.registrar_decisao(local=True)
+            self.logger.info(f"Urgência classificada localmente como: {previsao[0]} (confiança {previsao[1]:.2f})")
+            self.cache.armazenar(chave, previsao[0])
+            return previsao[0], "local"
+        
         try:
             prompt = f"""
             Classifique a urgência desta solicitação de suporte:
@@ -154,7 +269,7 @@ Equipe de Suporte 🎧"""
             Retorne apenas: BAIXA, MÉDIA ou ALTA
             """
             
-            response = self.model.generate_content(prompt)
+            response = self.cliente.gerar(prompt, agente='suporte', espera_maxima=self.obter_espera(espera_maxima))
             urgencia = response.text.strip().upper()
             
             # Validar resposta
@@ -162,48 +277,262 @@ Equipe de Suporte 🎧"""
                 urgencia = 'MÉDIA'  # Default seguro
             
             self.logger.info(f"Urgência classificada como: {urgencia}")
-            return urgencia
+            if previsao is not None:
+                self.classificador_urgencia.registrar_decisao(local=False, previsto=previsao[0], gemini=urgencia)
+            self.cache.armazenar(chave, urgencia)
+            return urgencia, "gemini"
             
         except Exception as e:
             self.logger.error(f"Erro ao classificar urgência: {str(e)}")
-            return self.classificar_urgencia_offline(pergunta)
+            return self.classificar_urgencia_offline(pergunta), "palavras"
+    
+    def treinar_classificador_urgencia(self) -> Dict[str, Any]:
+        """(Re)treina o classificador local com as urgências que vieram do Gemini (origem_urgencia)"""
+        return self.classificador_urgencia.treinar(
+            db_manager,
+            confianca_minima=self.config_suporte.get('urgencia_confianca_minima', 0.8)
+        )
+    
+    def obter_estatisticas_urgencia(self) -> Dict[str, Any]:
+        """Decisões locais x Gemini, acurácia do modelo e economia estimada"""
+        stats_gemini = self.cliente.obter_estatisticas()['agentes'].get('suporte', {})
+        return self.classificador_urgencia.obter_estatisticas(stats_gemini.get('latencia_media_ms', 0))
     
     def classificar_urgencia_offline(self, pergunta: str) -> str:
         """Classifica urgência offline baseada em palavras-chave"""
-        pergunta_lower = pergunta.lower()
+        return classificador_palavras.classificar(pergunta)['urgencia']
+    
+    def interpretar_resposta_combinada(self, texto: str) -> Dict[str, str]:
+        """Valida o JSON {"resposta", "urgencia"} retornado pelo Gemini"""
+        texto = texto.strip()
+        inicio, fim = texto.find('{'), texto.rfind('}')
+        if inicio < 0 or fim < inicio:
+            raise ValueError("Resposta combinada sem objeto JSON")
         
-        # Palavras de alta urgência
-        alta_urgencia = ['urgente', 'emergência', 'problema crítico', 'não funciona', 'erro', 'falha', 'quebrado']
-        if any(palavra in pergunta_lower for palavra in alta_urgencia):
-            return 'ALTA'
+        dados = json.loads(texto[inicio:fim + 1])
+        resposta = dados.get('resposta')
+        if not isinstance(resposta, str) or not resposta.strip():
+            raise ValueError("Resposta combinada sem campo 'resposta'")
         
-        # Palavras de baixa urgência
-        baixa_urgencia = ['informação', 'dúvida', 'curiosidade', 'preço', 'catálogo', 'horário']
-        if any(palavra in pergunta_lower for palavra in baixa_urgencia):
-            return 'BAIXA'
+        urgencia = str(dados.get('urgencia', '')).strip().upper()
+        if urgencia == 'MEDIA':
+            urgencia = 'MÉDIA'
+        if urgencia not in ['BAIXA', 'MÉDIA', 'ALTA']:
+            urgencia = 'MÉDIA'  # Default seguro
         
-        # Padrão é média urgência
-        return 'MÉDIA'
+        return {"resposta": resposta.strip(), "urgencia": urgencia}
     
-    def processar_solicitacao(self, pergunta: str) -> Dict[str, Any]:
-        """Processa solicitação completa de suporte"""
-        resultado = executar_com_seguranca(self.responder_pergunta, pergunta)
-        if not resultado["sucesso"]:
-            return resultado
+    def responder_com_urgencia(self, pergunta: str, espera_maxima: float = None) -> Dict[str, Any]:
+        """Gera resposta e urgência em uma única chamada ao Gemini (JSON estruturado)
+        
+        Retorna {"resposta", "urgencia", "origem_urgencia", "offline"}; offline indica que ambas
+        vieram do fallback local. O classificador local não decide aqui (a urgência sai na mesma
+        chamada): ele só é comparado com o Gemini, e essas urgências alimentam o treino dele.
+        """
+        chave_resposta = self.chave_cache('resposta', pergunta)
+        chave_urgencia = self.chave_cache('urgencia', pergunta)
+        resposta_cache = self.cache.obter(chave_resposta)
+        urgencia_cache = self.cache.obter(chave_urgencia)
+        if resposta_cache is not None and urgencia_cache is not None:
+            self.logger.info(f"Resposta obtida do cache: {pergunta[:50]}...")
+            return {"resposta": resposta_cache, "urgencia": urgencia_cache, "origem_urgencia": "cache", "offline": False}
         
-        resposta = resultado["dados"]
-        urgencia = self.classificar_urgencia(pergunta)
+        try:
+            prompt = self.montar_contexto(pergunta) + f"""
+        CLASSIFICAÇÃO DE URGÊNCIA:
+        - BAIXA: Dúvidas gerais, informações sobre produtos
+        - MÉDIA: Problemas não críticos, solicitações de suporte
+        - ALTA: Problemas críticos, urgências, reclamações
+        
+        FORMATO DE SAÍDA:
+        Retorne apenas um objeto JSON válido, sem texto adicional:
+        {{"resposta": "<resposta ao usuário>", "urgencia": "BAIXA" | "MÉDIA" | "ALTA"}}
+        """
+            
+            response = self.cliente.gerar(prompt, agente='suporte', espera_maxima=self.obter_espera(espera_maxima))
+            dados = self.interpretar_resposta_combinada(response.text)
+            
+            self.logger.info(f"Resposta combinada gerada (urgência {dados['urgencia']}): {pergunta[:50]}...")
+            self.cache.armazenar(chave_resposta, dados['resposta'])
+            self.cache.armazenar(chave_urgencia, dados['urgencia'])
+            if self.config_suporte.get('urgencia_local', True):
+                previsao = self.classificador_urgencia.classificar(pergunta)
+                self.classificador_urgencia.registrar_comparacao(previsao[0] if previsao else None, dados['urgencia'])
+            return dict(dados, origem_urgencia="gemini", offline=False)
+            
+        except Exception as e:
+            self.logger.error(f"Erro ao gerar resposta combinada: {str(e)}")
+            return {
+                "resposta": self.responder_pergunta_offline(pergunta),
+                "urgencia": self.classificar_urgencia_offline(pergunta),
+                "origem_urgencia": "palavras",
+                "offline": True
+            }
+    
+    def processar_solicitacao(self, pergunta: str, modo_chamada: str = None, salvar_relatorio: bool = True,
+                              espera_maxima: float = None) -> Dict[str, Any]:
+        """Processa solicitação completa de suporte
+        
+        modo_chamada: 'combinado' (uma chamada ao Gemini) ou 'separado' (resposta e urgência em duas chamadas)
+        salvar_relatorio: grava reports/suporte_*.json (desligado no processamento em lote)
+        espera_maxima: segundos aguardando o limitador de taxa (o lote aceita esperar mais que a interface)
+        """
+        modo_chamada = modo_chamada or self.config_suporte.get('modo_chamada', 'combinado')
+        inicio = time.perf_counter()
+        
+        with medir_etapa('cache_semantico'):
+            similar = self.buscar_similar(pergunta)
+        if similar:
+            self.logger.info(f"Pergunta similar encontrada ({similar['similaridade']:.2f}): {similar['pergunta'][:50]}...")
+            resposta = similar["resposta"]
+            urgencia = similar["urgencia"] or self.config_suporte['urgencia_padrao']
+            origem_urgencia = "cache_semantico"
+            modo = "cache_semantico"
+        elif self.cliente.disjuntor.esta_aberto():
+            # API indisponível: responde direto pelo agente offline, sem esperar nova falha
+            resposta = self.agente_offline.gerar_resposta_offline(pergunta)
+            urgencia = self.classificar_urgencia_offline(pergunta)
+            origem_urgencia = "palavras"
+            modo = "offline"
+        elif modo_chamada == 'combinado':
+            resultado = executar_com_seguranca(self.responder_com_urgencia, pergunta, espera_maxima)
+            if not resultado["sucesso"]:
+                return resultado
+            
+            resposta = resultado["dados"]["resposta"]
+            urgencia = resultado["dados"]["urgencia"]
+            origem_urgencia = resultado["dados"]["origem_urgencia"]
+            modo = "offline" if resultado["dados"]["offline"] else "online"
+        else:
+            resultado = executar_com_seguranca(self.responder_pergunta, pergunta, espera_maxima)
+            if not resultado["sucesso"]:
+                return resultado
+            
+            resposta = resultado["dados"]["resposta"]
+            urgencia, origem_urgencia = self.classificar_urgencia(pergunta, espera_maxima)
+            modo = "offline" if resultado["dados"]["offline"] else "online"
+        
+        # Fallback offline (falha da API ou prazo da requisição esgotado durante a chamada)
+        prazo = obter_prazo()
+        degradado = modo == "offline" or (prazo is not None and prazo.esgotado)
+        if degradado:
+            modo = "offline"
         
         resultado_final = {
             "pergunta": pergunta,
             "resposta": resposta,
             "urgencia": urgencia,
+            "origem_urgencia": origem_urgencia,
             "timestamp": pd.Timestamp.now().isoformat(),
-            "status": "processado"
+            "status": "processado",
+            "modo": modo,
+            "modo_chamada": modo_chamada,
+            "degradado": degradado,
+            "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1)
         }
+        if modo == "cache_semantico":
+            resultado_final["similaridade"] = similar["similaridade"]
         
-        # Salvar histórico
-        arquivo_historico = f"reports/suporte_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json"
-        salvar_resultado(resultado_final, arquivo_historico)
+        self.salvar_historico(resultado_final, salvar_relatorio)
         
         return {"sucesso": True, "dados": resultado_final}
+    
+    def salvar_historico(self, resultado_final: Dict[str, Any], salvar_relatorio: bool = True):
+        """Persiste o atendimento no banco e em reports/ (o relatório é pulado se o prazo acabou)"""
+        with medir_etapa('banco'):
+            db_manager.inserir_suporte(resultado_final["pergunta"], resultado_final["resposta"], resultado_final["urgencia"], None, None,
+                                       modo=resultado_final.get("modo"), versao_base=self.versao_base,
+                                       origem_urgencia=resultado_final.get("origem_urgencia"))
+        if not salvar_relatorio:
+            return
+        prazo = obter_prazo()
+        if prazo is not None and prazo.restante() <= 0:
+            self.logger.warning("Prazo esgotado: relatório do atendimento não foi gravado")
+            return
+        with medir_etapa('relatorio'):
+            arquivo_historico = f"reports/suporte_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json"
+            salvar_resultado(resultado_final, arquivo_historico)
+    
+    def gerar_resposta_stream(self, pergunta: str, estado: Dict[str, Any] = None) -> Iterator[str]:
+        """Gera a resposta em trechos usando a geração em streaming do Gemini
+        
+        estado (opcional) recebe "offline": True quando a resposta veio do fallback local
+        e "interrompido": True quando o streaming falhou depois de já ter enviado trechos.
+        """
+        estado = estado if estado is not None else {}
+        chave = self.chave_cache('resposta', pergunta)
+        resposta_cache = self.cache.obter(chave)
+        if resposta_cache is not None:
+            self.logger.info(f"Resposta obtida do cache: {pergunta[:50]}...")
+            yield resposta_cache
+            return
+        
+        partes = []
+        try:
+            for trecho in self.cliente.gerar_stream(self.montar_contexto(pergunta), agente='suporte', espera_maxima=self.espera_limite):
+                partes.append(trecho)
+                yield trecho
+            
+            self.cache.armazenar(chave, ''.join(partes))
+            
+        except Exception as e:
+            self.logger.error(f"Erro no streaming da resposta: {str(e)}")
+            if partes:
+                estado["interrompido"] = True
+            else:
+                estado["offline"] = True
+                yield self.responder_pergunta_offline(pergunta)
+    
+    def processar_solicitacao_stream(self, pergunta: str) -> Iterator[Dict[str, Any]]:
+        """Processa solicitação emitindo eventos 'trecho' e, ao final, 'fim' com o resultado completo"""
+        inicio = time.perf_counter()
+        ttfb_ms = None
+        partes = []
+        estado = {}
+        
+        with medir_etapa('cache_semantico'):
+            similar = self.buscar_similar(pergunta)
+        trechos = [similar["resposta"]] if similar else self.gerar_resposta_stream(pergunta, estado)
+        
+        for trecho in trechos:
+            if ttfb_ms is None:
+                ttfb_ms = round((time.perf_counter() - inicio) * 1000, 1)
+                self.logger.info(f"Primeiro trecho em {ttfb_ms} ms: {pergunta[:50]}...")
+            partes.append(trecho)
+            yield {"tipo": "trecho", "texto": trecho}
+        
+        resposta = ''.join(partes)
+        if similar:
+            urgencia = similar["urgencia"] or self.config_suporte['urgencia_padrao']
+            origem_urgencia = "cache_semantico"
+        else:
+            urgencia, origem_urgencia = self.classificar_urgencia(pergunta)
+        
+        prazo = obter_prazo()
+        offline = estado.get("offline", False)
+        degradado = offline or estado.get("interrompido", False) or (prazo is not None and prazo.esgotado)
+        if similar:
+            modo = "cache_semantico"
+        elif offline:
+            modo = "offline"
+        else:
+            # Streaming cortado (falha ou prazo): resposta possivelmente truncada, não é reaproveitada
+            modo = "interrompido" if degradado else "streaming"
+        latencia_ms = round((time.perf_counter() - inicio) * 1000, 1)
+        self.logger.info(f"Resposta em streaming concluída: TTFB {ttfb_ms} ms, total {latencia_ms} ms")
+        
+        resultado_final = {
+            "pergunta": pergunta,
+            "resposta": resposta,
+            "urgencia": urgencia,
+            "origem_urgencia": origem_urgencia,
+            "timestamp": pd.Timestamp.now().isoformat(),
+            "status": "processado",
+            "modo": modo,
+            "degradado": degradado,
+            "ttfb_ms": ttfb_ms,
+            "latencia_ms": latencia_ms
+        }
+        self.salvar_historico(resultado_final)
+        
+        yield dict(resultado_final, tipo="fim")
@@ -5,7 +5,10 @@ import json
 import logging
 import pandas as pd
 from typing import Dict, Any, List
+from config import config
 from utils import executar_com_seguranca, salvar_resultado
+from classificador_palavras import classificador_palavras
+from recuperador_faq import RecuperadorFAQ
 
 class AgenteSuporteOffline:
     """Agente de suporte que funciona offline"""
@@ -14,6 +17,12 @@ class AgenteSuporteOffline:
         self.logger = logging.getLogger('agente.suporte.offline')
         self.base_conhecimento = self.carregar_base_conhecimento()
         self.respostas_predefinidas = self.carregar_respostas_predefinidas()
+        config_suporte = config.AGENTE_CONFIG['suporte']
+        self.recuperador = RecuperadorFAQ(
+            self.base_conhecimento,
+            config_suporte.get('offline_confianca_minima', 0.5),
+            config_suporte.get('offline_intervalo_sincronizacao', 300)
+        )
     
     def carregar_base_conhecimento(self) -> Dict[str, List[str]]:
         """Carrega FAQ e documentos de produto"""
@@ -55,29 +64,36 @@ class AgenteSuporteOffline:
     
     def identificar_tipo_pergunta(self, pergunta: str) -> str:
         """Identifica o tipo de pergunta baseado em palavras-chave"""
-        pergunta_lower = pergunta.lower()
+        return classificador_palavras.classificar(pergunta)['intencao']
+    
+    def buscar_resposta_conhecida(self, pergunta: str) -> str:
+        """Resposta da FAQ, dos produtos ou de um atendimento anterior (None se não houver)"""
+        from database import db_manager
+        self.recuperador.sincronizar_em_segundo_plano(db_manager)
+        encontrado = self.recuperador.buscar(pergunta)
+        if encontrado is None:
+            return None
         
-        if any(palavra in pergunta_lower for palavra in ['pedido', 'comprar', 'adquirir', 'encomendar']):
-            return 'pedido'
-        elif any(palavra in pergunta_lower for palavra in ['entrega', 'prazo', 'quando chega', 'demora']):
-            return 'entrega'
-        elif any(palavra in pergunta_lower for palavra in ['devolução', 'devolver', 'trocar', 'reembolso']):
-            return 'devolução'
-        elif any(palavra in pergunta_lower for palavra in ['pagamento', 'pagar', 'cartão', 'pix', 'boleto']):
-            return 'pagamento'
-        elif any(palavra in pergunta_lower for palavra in ['suporte', 'ajuda', 'problema', 'dúvida']):
-            return 'suporte'
-        elif any(palavra in pergunta_lower for palavra in ['produto', 'serviço', 'o que vocês vendem']):
-            return 'produto'
-        else:
-            return 'geral'
+        self.logger.info(f"Resposta offline recuperada ({encontrado['origem']}, confiança {encontrado['confianca']:.2f})")
+        if encontrado['origem'] == 'historico':
+            return encontrado['resposta']
+        return f"""Olá! 👋
+
+{encontrado['resposta']}
+
+Precisa de mais alguma coisa? Fale conosco pelo telefone (11) 99999-9999 ou pelo email suporte@empresa.com 😊"""
     
-    def gerar_resposta_offline(self, pergunta: str) -> str:
-        """Gera resposta offline baseada em templates"""
+    def gerar_resposta_offline(self, pergunta: str, usar_recuperador: bool = True) -> str:
+        """Gera resposta offline baseada em templates e, fora deles, na busca BM25"""
         tipo = self.identificar_tipo_pergunta(pergunta)
+        resposta_conhecida = None
+        if tipo not in self.respostas_predefinidas and usar_recuperador:
+            resposta_conhecida = self.buscar_resposta_conhecida(pergunta)
         
         if tipo in self.respostas_predefinidas:
             resposta = self.respostas_predefinidas[tipo]
+        elif resposta_conhecida:
+            resposta = resposta_conhecida
         else:
             resposta = f"""Olá! 👋 
 
@@ -99,20 +115,7 @@ Equipe de Suporte 🎧"""
     
     def classificar_urgencia_offline(self, pergunta: str) -> str:
         """Classifica urgência baseada em palavras-chave"""
-        pergunta_lower = pergunta.lower()
-        
-        # Palavras de alta urgência
-        alta_urgencia = ['urgente', 'emergência', 'problema crítico', 'não funciona', 'erro', 'falha']
-        if any(palavra in pergunta_lower for palavra in alta_urgencia):
-            return 'ALTA'
-        
-        # Palavras de baixa urgência
-        baixa_urgencia = ['informação', 'dúvida', 'curiosidade', 'preço', 'catálogo']
-        if any(palavra in pergunta_lower for palavra in baixa_urgencia):
-            return 'BAIXA'
-        
-        # Padrão é média urgência
-        return 'MÉDIA'
+        return classificador_palavras.classificar(pergunta)['urgencia']
     
     def processar_solicitacao(self, pergunta: str) -> Dict[str, Any]:
         """Processa solicitação completa de suporte"""
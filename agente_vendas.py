@@ -2,55 +2,144 @@
 Agente de Análise de Vendas
 """
 import pandas as pd
+import numpy as np
 import json
 import logging
+import itertools
 from typing import Dict, Any, Tuple
-import google.generativeai as genai
-from config import GEMINI_API_KEY, GEMINI_MODEL
+from config import config
 from utils import executar_com_seguranca, salvar_resultado
-
-# Configurar API
-genai.configure(api_key=GEMINI_API_KEY)
+from cliente_gemini import cliente_gemini
+from agregados_vendas import AgregadorVendas, calcular_agregados, formatar_agregados
+from mapeamento_colunas import mapeador_colunas, converter_datas
+from leitura_planilha import iterar_blocos
+from cache_planilhas import cache_planilhas
+from prazo import medir_etapa
 
 class AgenteAnaliseVendas:
     """Agente especializado em análise de dados de vendas"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel(GEMINI_MODEL)
+        self.cliente = cliente_gemini
         self.logger = logging.getLogger('agente.vendas')
+        self.config_vendas = config.AGENTE_CONFIG['vendas']
     
     def processar_planilha(self, arquivo_excel: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
-        """Lê e processa planilha de vendas"""
+        """Lê e processa planilha de vendas
+
+        Com leitura_em_blocos, a planilha é lida em blocos de tamanho fixo que alimentam os
+        agregados incrementais; o DataFrame retornado é só a amostra do primeiro bloco.
+        Arquivos já vistos (mesmo SHA-256) são lidos do cache Arrow em vez do xlsx.
+        A leitura não é interrompida pelo prazo da requisição: cortá-la descartaria o cache
+        e toda nova tentativa falharia do mesmo jeito; o prazo só limita a chamada ao Gemini.
+        """
         try:
-            df = pd.read_excel(arquivo_excel)
+            inicio = pd.Timestamp.now()
+            tamanho_bloco = self.config_vendas.get('tamanho_bloco_leitura', 50000)
+            chave = cache_planilhas.chave_arquivo(arquivo_excel) if cache_planilhas.habilitado else None
+            blocos = cache_planilhas.iterar_blocos(chave) if chave else None
+            origem = "cache" if blocos is not None else "arquivo"
+            if blocos is None:
+                if self.config_vendas.get('leitura_em_blocos', True):
+                    blocos = iterar_blocos(arquivo_excel, tamanho_bloco)
+                else:
+                    blocos = iter([pd.read_excel(arquivo_excel)])
+                if chave:
+                    blocos = cache_planilhas.gravando(chave, blocos)
+            primeiro = next(blocos)
+            
+            # Papel de cada coluna (data, valor, cliente...) inferido uma vez por layout de cabeçalho
+            mapeamento = mapeador_colunas.mapear(primeiro)
+            
+            # Agregados sobre todas as linhas: só eles vão para o prompt
+            agregador = AgregadorVendas(mapeamento, top_n=self.config_vendas.get('top_n_agregados', 5))
+            memoria = {"antes": 0, "depois": 0}
+            df = None
+            blocos = itertools.chain([primeiro], blocos)
+            del primeiro
+            with medir_etapa('leitura_planilha'):
+                for bloco in blocos:
+                    bloco = self.compactar_tipos(bloco, mapeamento, memoria)
+                    agregador.adicionar(bloco)
+                    if df is None:
+                        # Planilhas maiores que um bloco: só uma amostra do primeiro fica na memória
+                        df = bloco if len(bloco) < tamanho_bloco else bloco.head(1000)
+            agregados = agregador.resultado()
+            self.logger.info(f"Planilha lida ({origem}) e agregada em "
+                             f"{(pd.Timestamp.now() - inicio).total_seconds() * 1000:.0f} ms")
             
             # Preparar dados para análise
+            periodo = agregados.get("periodo")
             resumo_dados = {
-                "total_linhas": len(df),
+                "total_linhas": agregados["linhas"],
                 "colunas": df.columns.tolist(),
-                "vendas_totais": df['valor_venda'].sum() if 'valor_venda' in df.columns else 0,
-                "periodo": f"{df['data'].min()} a {df['data'].max()}" if 'data' in df.columns else "Período não especificado",
-                "timestamp_processamento": pd.Timestamp.now().isoformat()
+                "mapeamento_colunas": agregados["mapeamento"],
+                "origem_leitura": origem,
+                "memoria": {
+                    "antes_mb": round(memoria["antes"] / 1024 / 1024, 2),
+                    "depois_mb": round(memoria["depois"] / 1024 / 1024, 2),
+                    "reducao_pct": round((1 - memoria["depois"] / memoria["antes"]) * 100, 1) if memoria["antes"] else 0,
+                    "tipos": {str(coluna): str(tipo) for coluna, tipo in df.dtypes.items()}
+                },
+                "vendas_totais": agregados.get("totais", {}).get("receita", 0),
+                "periodo": f"{periodo['inicio']} a {periodo['fim']}" if periodo else "Período não especificado",
+                "timestamp_processamento": pd.Timestamp.now().isoformat(),
+                "agregados": agregados
             }
             
-            self.logger.info(f"Planilha processada: {len(df)} registros")
+            self.logger.info(f"Planilha processada: {agregados['linhas']} registros")
             return df, resumo_dados
             
         except Exception as e:
             self.logger.error(f"Erro ao processar planilha: {str(e)}")
             raise
     
+    def compactar_tipos(self, bloco: pd.DataFrame, mapeamento: Dict[str, Any],
+                        memoria: Dict[str, int] = None) -> pd.DataFrame:
+        """Textos repetitivos viram category, números usam o menor tipo sem perda e a data vira datetime64
+
+        memoria acumula o tamanho do bloco (memory_usage deep) antes e depois da conversão.
+        """
+        if memoria is not None:
+            memoria["antes"] += int(bloco.memory_usage(deep=True).sum())
+        if self.config_vendas.get('tipos_compactos', True):
+            limite_categoria = self.config_vendas.get('limite_categoria', 0.5)
+            coluna_data = mapeamento.get('data')
+            bloco = bloco.copy(deep=False)
+            for coluna in bloco.columns:
+                serie = bloco[coluna]
+                if coluna == coluna_data:
+                    bloco[coluna] = converter_datas(serie)
+                elif pd.api.types.is_integer_dtype(serie):
+                    bloco[coluna] = pd.to_numeric(serie, downcast='integer')
+                elif pd.api.types.is_float_dtype(serie):
+                    # float32 só quando não muda nenhum valor (ex.: códigos inteiros com NaN)
+                    reduzida = serie.astype(np.float32)
+                    if np.array_equal(reduzida.to_numpy(dtype=np.float64), serie.to_numpy(), equal_nan=True):
+                        bloco[coluna] = reduzida
+                elif (serie.dtype == object or pd.api.types.is_string_dtype(serie)) and len(serie) \
+                        and serie.nunique() <= limite_categoria * len(serie):
+                    bloco[coluna] = serie.astype('category')
+        if memoria is not None:
+            memoria["depois"] += int(bloco.memory_usage(deep=True).sum())
+        return bloco
+    
     def gerar_insights(self, dados_resumo: Dict[str, Any], amostra_dados: pd.DataFrame) -> str:
-        """Usa Gemini para gerar insights inteligentes"""
+        """Usa Gemini para gerar insights a partir dos agregados (tamanho do prompt independe das linhas)"""
         try:
+            agregados = dados_resumo.get("agregados") or calcular_agregados(amostra_dados)
+            resumo = {chave: valor for chave, valor in dados_resumo.items() if chave != "agregados"}
+            
             prompt = f"""
             Analise estes dados de vendas e gere insights profissionais:
             
             RESUMO DOS DADOS:
-            {json.dumps(dados_resumo, indent=2, default=str)}
+            {json.dumps(resumo, indent=2, default=str)}
+            
+            AGREGADOS (calculados sobre todas as {agregados['linhas']} linhas):
+            {formatar_agregados(agregados)}
             
-            AMOSTRA DOS DADOS:
-            {amostra_dados.head(10).to_string()}
+            Baseie tendências e comparações apenas nesses números.
             
             Forneça uma análise estruturada com:
             1. 📈 PRINCIPAIS TENDÊNCIAS identificadas
@@ -62,7 +151,7 @@ class AgenteAnaliseVendas:
             Seja objetivo, profissional e acionável.
             """
             
-            response = self.model.generate_content(prompt)
+            response = self.cliente.gerar(prompt, agente='vendas')
             self.logger.info("Insights gerados com sucesso")
             return response.text
             
@@ -0,0 +1,234 @@
+"""
+Agregados de Vendas - estatísticas compactas calculadas localmente (pandas/NumPy) antes do prompt
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional
+from mapeamento_colunas import mapeador_colunas, converter_datas
+
+# Dimensões com ranking top-N no prompt
+DIMENSOES = ['produto', 'cliente', 'pais', 'vendedor']
+
+DIAS_SEMANA = ['seg', 'ter', 'qua', 'qui', 'sex', 'sáb', 'dom']
+MESES = ['jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez']
+PERCENTIS = [10, 25, 50, 75, 90, 99]
+
+def numero(valor: Any, casas: int = 2) -> Optional[float]:
+    """float nativo arredondado (None para NaN) para que o resultado seja serializável em JSON"""
+    valor = float(valor)
+    return None if np.isnan(valor) else round(valor, casas)
+
+def crescimento(atual: float, anterior: float) -> Optional[float]:
+    return numero((atual - anterior) / abs(anterior) * 100, 1) if anterior else None
+
+def rotulo(nome: Any) -> str:
+    """Nome do item no ranking (códigos lidos como float, p. ex. 12431.0, voltam a inteiro)"""
+    if isinstance(nome, float) and nome.is_integer():
+        nome = int(nome)
+    return str(nome)[:40]
+
+def percentual(valor: Optional[float]) -> str:
+    return "n/d" if valor is None else f"{valor}%"
+
+class AgregadorVendas:
+    """Agregados incrementais: recebe a planilha em blocos e guarda só somas, contagens e uma amostra
+
+    A memória cresce com o número de itens distintos (pedidos, produtos, clientes), não com o
+    número de linhas. Os percentis por linha vêm de uma amostra uniforme (reservoir) de
+    tamanho_amostra valores; são exatos enquanto a planilha não passar desse tamanho.
+    """
+
+    def __init__(self, mapeamento: Dict[str, Any], top_n: int = 5, max_meses: int = 12,
+                 tamanho_amostra: int = 100000):
+        self.mapeamento = mapeamento
+        self.top_n = top_n
+        self.max_meses = max_meses
+        self.linhas = 0
+        self.linhas_validas = 0
+        self.receita = 0.0
+        self.devolucoes = 0
+        self.valor_devolucoes = 0.0
+        self.quantidade = 0.0
+        self.amostra = np.empty(tamanho_amostra, dtype=np.float64)
+        self.positivos_vistos = 0
+        self.aleatorio = np.random.default_rng(0)
+        self.por_pedido = pd.Series(dtype=np.float64)
+        self.por_dimensao = {papel: pd.Series(dtype=np.float64) for papel in DIMENSOES if papel in mapeamento}
+        self.mensal = pd.Series(dtype=np.float64)
+        self.dia_semana = np.zeros(7)
+        self.mes_ano = np.zeros(12)
+        self.data_inicio = None
+        self.data_fim = None
+
+    def valores(self, bloco: pd.DataFrame) -> Optional[np.ndarray]:
+        """Valor por linha: coluna de valor ou quantidade x preço unitário (None se não houver)"""
+        if 'valor' in self.mapeamento:
+            return pd.to_numeric(bloco[self.mapeamento['valor']], errors='coerce').to_numpy(dtype=np.float64)
+        if 'quantidade' in self.mapeamento and 'preco' in self.mapeamento:
+            return (pd.to_numeric(bloco[self.mapeamento['quantidade']], errors='coerce').to_numpy(dtype=np.float64) *
+                    pd.to_numeric(bloco[self.mapeamento['preco']], errors='coerce').to_numpy(dtype=np.float64))
+        return None
+
+    def amostrar(self, positivos: np.ndarray):
+        """Reservoir sampling vetorizado (algoritmo R) sobre os valores positivos do bloco"""
+        capacidade = len(self.amostra)
+        livres = min(max(capacidade - self.positivos_vistos, 0), positivos.size)
+        self.amostra[self.positivos_vistos:self.positivos_vistos + livres] = positivos[:livres]
+        restantes = positivos[livres:]
+        if restantes.size:
+            posicoes = np.arange(self.positivos_vistos + livres, self.positivos_vistos + positivos.size)
+            sorteios = self.aleatorio.integers(0, posicoes + 1)
+            aceitos = sorteios < capacidade
+            self.amostra[sorteios[aceitos]] = restantes[aceitos]
+        self.positivos_vistos += positivos.size
+
+    def adicionar(self, bloco: pd.DataFrame):
+        """Incorpora um bloco de linhas aos agregados"""
+        self.linhas += len(bloco)
+        valor = self.valores(bloco)
+        if valor is None or not len(bloco):
+            return
+        valido = ~np.isnan(valor)
+
+        self.receita += valor[valido].sum()
+        self.linhas_validas += int(valido.sum())
+        self.devolucoes += int((valor < 0).sum())
+        self.valor_devolucoes += valor[valor < 0].sum()
+        if 'quantidade' in self.mapeamento:
+            self.quantidade += pd.to_numeric(bloco[self.mapeamento['quantidade']], errors='coerce').sum()
+        self.amostrar(valor[valido & (valor > 0)])
+
+        serie = pd.Series(valor, index=bloco.index)
+        if 'pedido' in self.mapeamento:
+            soma = serie.groupby(bloco[self.mapeamento['pedido']], sort=False, observed=True).sum()
+            self.por_pedido = self.por_pedido.add(soma, fill_value=0)
+        for papel in self.por_dimensao:
+            soma = serie.groupby(bloco[self.mapeamento[papel]], sort=False, observed=True).sum()
+            self.por_dimensao[papel] = self.por_dimensao[papel].add(soma, fill_value=0)
+
+        if 'data' in self.mapeamento:
+            datas = converter_datas(bloco[self.mapeamento['data']])
+            com_data = valido & datas.notna().to_numpy()
+            if com_data.any():
+                indice = pd.DatetimeIndex(datas[com_data])
+                valores_data = valor[com_data]
+                inicio, fim = indice.min(), indice.max()
+                self.data_inicio = inicio if self.data_inicio is None else min(self.data_inicio, inicio)
+                self.data_fim = fim if self.data_fim is None else max(self.data_fim, fim)
+                mensal = pd.Series(valores_data).groupby(indice.to_period('M')).sum()
+                self.mensal = self.mensal.add(mensal, fill_value=0)
+                self.dia_semana += np.bincount(indice.dayofweek, weights=valores_data, minlength=7)
+                self.mes_ano += np.bincount(indice.month - 1, weights=valores_data, minlength=12)
+
+    def resultado(self) -> Dict[str, Any]:
+        """Totais, crescimento entre períodos, top-N, percentis e sazonalidade
+
+        O tamanho do resultado depende só de top_n e max_meses, não do número de linhas.
+        """
+        agregados: Dict[str, Any] = {'linhas': self.linhas,
+                                     'mapeamento': {papel: str(coluna) for papel, coluna in self.mapeamento.items()}}
+        if 'valor' not in self.mapeamento and not ('quantidade' in self.mapeamento and 'preco' in self.mapeamento):
+            return agregados
+
+        totais = {
+            'receita': numero(self.receita),
+            'linhas_validas': self.linhas_validas,
+            'devolucoes': self.devolucoes,
+            'valor_devolucoes': numero(self.valor_devolucoes)
+        }
+        if 'quantidade' in self.mapeamento:
+            totais['quantidade'] = numero(self.quantidade)
+        distintos = {'pedido': self.por_pedido, **self.por_dimensao}
+        for papel in ['pedido', 'cliente', 'produto']:
+            if papel in self.mapeamento:
+                totais[f'{papel}s_distintos'] = len(distintos[papel])
+        if totais.get('pedidos_distintos'):
+            totais['ticket_medio'] = numero(totais['receita'] / totais['pedidos_distintos'])
+        agregados['totais'] = totais
+
+        # Distribuição por linha (amostra) e, se houver número do pedido, por pedido
+        amostra = self.amostra[:min(self.positivos_vistos, len(self.amostra))]
+        if amostra.size:
+            agregados['percentis_linha'] = dict(zip([f'p{p}' for p in PERCENTIS],
+                                                    map(numero, np.percentile(amostra, PERCENTIS))))
+            if self.positivos_vistos > len(self.amostra):
+                agregados['percentis_linha_amostra'] = len(self.amostra)
+        por_pedido = self.por_pedido[self.por_pedido > 0].to_numpy()
+        if por_pedido.size:
+            agregados['percentis_pedido'] = dict(zip([f'p{p}' for p in PERCENTIS],
+                                                     map(numero, np.percentile(por_pedido, PERCENTIS))))
+
+        # Top-N por dimensão, com participação na receita
+        receita_total = totais['receita'] or 0
+        for papel, soma in self.por_dimensao.items():
+            agregados[f'top_{papel}'] = [
+                {'nome': rotulo(nome), 'receita': numero(receita),
+                 'participacao': numero(receita / receita_total * 100) if receita_total else None}
+                for nome, receita in soma.nlargest(self.top_n).items()
+            ]
+
+        # Série mensal, crescimento entre períodos e sazonalidade
+        if self.data_inicio is not None:
+            agregados['periodo'] = {'inicio': str(self.data_inicio.date()), 'fim': str(self.data_fim.date())}
+
+            mensal = self.mensal.sort_index()
+            ultimos = mensal.iloc[-self.max_meses:]
+            anteriores = mensal.shift(1).iloc[-self.max_meses:]
+            agregados['mensal'] = [
+                {'mes': str(mes), 'receita': numero(receita), 'crescimento_pct': crescimento(receita, anterior)}
+                for mes, receita, anterior in zip(ultimos.index, ultimos.to_numpy(), anteriores.fillna(0).to_numpy())
+            ]
+            # Último mês completo contra o anterior e contra o mesmo mês do ano anterior
+            completos = mensal if self.data_fim.is_month_end else mensal.iloc[:-1]
+            if len(completos) < len(mensal):
+                agregados['mensal'][-1]['parcial'] = True
+            if len(completos) >= 2:
+                agregados['crescimento'] = {
+                    'mes': str(completos.index[-1]),
+                    'vs_mes_anterior_pct': crescimento(completos.iloc[-1], completos.iloc[-2]),
+                    'vs_ano_anterior_pct': crescimento(completos.iloc[-1], mensal.get(completos.index[-1] - 12, 0))
+                }
+
+            agregados['sazonalidade_dia_semana'] = dict(zip(DIAS_SEMANA, map(numero, self.dia_semana)))
+            agregados['sazonalidade_mes'] = {mes: numero(total) for mes, total in zip(MESES, self.mes_ano) if total}
+
+        return agregados
+
+def calcular_agregados(df: pd.DataFrame, mapeamento: Dict[str, Any] = None, top_n: int = 5,
+                       max_meses: int = 12) -> Dict[str, Any]:
+    """Agregados de um DataFrame já carregado (percentis exatos)"""
+    mapeamento = mapeamento if mapeamento is not None else mapeador_colunas.mapear(df)
+    agregador = AgregadorVendas(mapeamento, top_n, max_meses, tamanho_amostra=max(len(df), 1))
+    agregador.adicionar(df)
+    return agregador.resultado()
+
+def formatar_agregados(agregados: Dict[str, Any]) -> str:
+    """Tabela compacta em texto para o prompt"""
+    linhas = [f"Linhas analisadas: {agregados['linhas']}"]
+    if 'totais' not in agregados:
+        linhas.append("Não foi encontrada coluna de valor (nem quantidade x preço)")
+        return "\n".join(linhas)
+
+    linhas.append("TOTAIS: " + ", ".join(f"{chave}={valor}" for chave, valor in agregados['totais'].items()))
+    if 'periodo' in agregados:
+        linhas.append(f"PERÍODO: {agregados['periodo']['inicio']} a {agregados['periodo']['fim']}")
+    if 'crescimento' in agregados:
+        crescimento_mes = agregados['crescimento']
+        linhas.append(f"CRESCIMENTO ({crescimento_mes['mes']}): "
+                      f"vs mês anterior {percentual(crescimento_mes['vs_mes_anterior_pct'])}, "
+                      f"vs ano anterior {percentual(crescimento_mes['vs_ano_anterior_pct'])}")
+    if 'mensal' in agregados:
+        linhas.append("RECEITA MENSAL (vs mês anterior): " + "; ".join(
+            f"{mes['mes']}{' parcial' if mes.get('parcial') else ''} {mes['receita']} ({percentual(mes['crescimento_pct'])})"
+            for mes in agregados['mensal']))
+    for chave, titulo in [('percentis_linha', 'PERCENTIS POR LINHA'), ('percentis_pedido', 'PERCENTIS POR PEDIDO')]:
+        if chave in agregados:
+            linhas.append(f"{titulo}: " + ", ".join(f"{p}={v}" for p, v in agregados[chave].items()))
+    for papel in DIMENSOES:
+        if f'top_{papel}' in agregados:
+            linhas.append(f"TOP {papel.upper()}: " + "; ".join(
+                f"{item['nome']} {item['receita']} ({percentual(item['participacao'])})" for item in agregados[f'top_{papel}']))
+    for chave, titulo in [('sazonalidade_dia_semana', 'POR DIA DA SEMANA'), ('sazonalidade_mes', 'POR MÊS DO ANO')]:
+        if chave in agregados:
+            linhas.append(f"{titulo}: " + ", ".join(f"{nome}={valor}" for nome, valor in agregados[chave].items()))
+    return "\n".join(linhas)
@@ -1,34 +1,31 @@
 """
 Interface Web para o Sistema de Agentes de IA
 """
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, Response, stream_with_context
 import json
 import sys
 import os
 from datetime import datetime
-import pandas as pd
 from pathlib import Path
 
 # Adicionar o diretório atual ao path
 sys.path.append('.')
 
 # Importar os agentes
-from agente_suporte import AgenteSuporte
-from agente_conteudo import AgenteConteudo
-from agente_vendas import AgenteAnaliseVendas
-from agente_automatizado import AgenteAutomatizado
+from registro_agentes import registro_agentes
 from database import db_manager
 from integracoes import gerenciador_integracoes
 from config import config
+from prazo import Prazo
 
 app = Flask(__name__)
 app.secret_key = 'agente_ia_secret_key_2024'
 
-# Inicializar agentes
-agente_suporte = AgenteSuporte()
-agente_conteudo = AgenteConteudo()
-agente_vendas = AgenteAnaliseVendas()
-agente_automatizado = AgenteAutomatizado()
+# Agentes são construídos sob demanda pelo registro_agentes (ver registro_agentes.py)
+
+def prazo_requisicao(nome: str) -> Prazo:
+    """Orçamento de tempo da requisição, propagado até as chamadas ao Gemini"""
+    return Prazo(config.PERFORMANCE_CONFIG.get('prazo_requisicao', 25), nome)
 
 @app.route('/')
 def index():
@@ -75,14 +72,18 @@ def api_suporte():
         if not pergunta:
             return jsonify({'erro': 'Pergunta é obrigatória'}), 400
         
-        resultado = agente_suporte.processar_solicitacao(pergunta)
+        with prazo_requisicao('api/suporte'):
+            resultado = registro_agentes.obter('suporte').processar_solicitacao(pergunta, data.get('modo_chamada'))
         
         if resultado.get('sucesso'):
             return jsonify({
                 'sucesso': True,
                 'resposta': resultado['dados']['resposta'],
                 'urgencia': resultado['dados']['urgencia'],
-                'timestamp': resultado['dados']['timestamp']
+                'timestamp': resultado['dados']['timestamp'],
+                'modo_chamada': resultado['dados']['modo_chamada'],
+                'degradado': resultado['dados']['degradado'],
+                'latencia_ms': resultado['dados']['latencia_ms']
             })
         else:
             return jsonify({'erro': resultado.get('erro', 'Erro desconhecido')}), 500
@@ -90,6 +91,92 @@ def api_suporte():
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
+@app.route('/api/suporte/stream', methods=['POST'])
+def api_suporte_stream():
+    """API de suporte com resposta em streaming (Server-Sent Events)"""
+    data = request.get_json() or {}
+    pergunta = data.get('pergunta', '')
+    
+    if not pergunta:
+        return jsonify({'erro': 'Pergunta é obrigatória'}), 400
+    
+    def gerar_eventos():
+        try:
+            with prazo_requisicao('api/suporte/stream'):
+                for evento in registro_agentes.obter('suporte').processar_solicitacao_stream(pergunta):
+                    yield f"data: {json.dumps(evento, ensure_ascii=False, default=str)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'tipo': 'erro', 'erro': str(e)}, ensure_ascii=False)}\n\n"
+    
+    return Response(
+        stream_with_context(gerar_eventos()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/suporte/lote', methods=['POST'])
+def api_suporte_lote():
+    """API para responder um arquivo CSV/JSONL de perguntas em segundo plano"""
+    try:
+        from suporte_lote import ProcessadorLote
+        
+        if 'arquivo' not in request.files:
+            return jsonify({'erro': 'Nenhum arquivo enviado'}), 400
+        
+        arquivo = request.files['arquivo']
+        if Path(arquivo.filename).suffix.lower() not in ('.csv', '.jsonl'):
+            return jsonify({'erro': 'Envie um arquivo .csv ou .jsonl'}), 400
+        
+        upload_dir = Path('uploads')
+        upload_dir.mkdir(exist_ok=True)
+        arquivo_path = upload_dir / arquivo.filename
+        arquivo.save(arquivo_path)
+        
+        # Nome pelo conteúdo: reenviar o mesmo arquivo retoma o lote (e não sobrescreve um em andamento)
+        lote_path = upload_dir / f"suporte_lote_{ProcessadorLote.identificar(arquivo_path)}{arquivo_path.suffix.lower()}"
+        os.replace(arquivo_path, lote_path)
+        
+        lote_id = ProcessadorLote.iniciar_em_segundo_plano(str(lote_path))
+        return jsonify({'sucesso': True, 'lote_id': lote_id}), 202
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@app.route('/api/suporte/lote/<lote_id>')
+def api_suporte_lote_status(lote_id):
+    """API para acompanhar o progresso (e a vazão) de um lote"""
+    from suporte_lote import ProcessadorLote
+    
+    progresso = ProcessadorLote.obter_progresso(lote_id)
+    if progresso is None:
+        return jsonify({'erro': 'Lote não encontrado'}), 404
+    return jsonify({'sucesso': True, 'dados': progresso})
+
+@app.route('/api/suporte/cache', methods=['GET', 'DELETE'])
+def api_suporte_cache():
+    """API para consultar (ou limpar) o cache de respostas do suporte"""
+    try:
+        if request.method == 'DELETE':
+            registro_agentes.obter('suporte').cache.limpar()
+        return jsonify({'sucesso': True, 'dados': registro_agentes.obter('suporte').obter_estatisticas_cache()})
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@app.route('/api/suporte/estatisticas')
+def api_suporte_estatisticas():
+    """API com estatísticas de cache e tamanho de prompt do suporte"""
+    try:
+        agente = registro_agentes.obter('suporte')
+        return jsonify({
+            'sucesso': True,
+            'dados': {
+                'cache': agente.obter_estatisticas_cache(),
+                'prompt': agente.obter_estatisticas_prompt(),
+                'urgencia': agente.obter_estatisticas_urgencia()
+            }
+        })
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
 @app.route('/api/conteudo', methods=['POST'])
 def api_conteudo():
     """API para gerar conteúdo"""
@@ -102,11 +189,15 @@ def api_conteudo():
             plataforma = data.get('plataforma', 'Instagram')
             tom = data.get('tom', 'profissional')
             publico_alvo = data.get('publico_alvo', 'geral')
+            forcar_novo = bool(data.get('forcar_novo', False))
             
             if not tema:
                 return jsonify({'erro': 'Tema é obrigatório'}), 400
             
-            conteudo = agente_conteudo.gerar_post_social(tema, plataforma, tom, publico_alvo)
+            with prazo_requisicao('api/conteudo'):
+                conteudo = registro_agentes.obter('conteudo').gerar_post_social(
+                    tema, plataforma, tom, publico_alvo, forcar_novo=forcar_novo
+                )
             
             return jsonify({
                 'sucesso': True,
@@ -120,11 +211,15 @@ def api_conteudo():
             topicos = data.get('topicos', [])
             publico_alvo = data.get('publico_alvo', '')
             empresa = data.get('empresa', 'Nossa empresa')
+            forcar_novo = bool(data.get('forcar_novo', False))
             
             if not topicos or not publico_alvo:
                 return jsonify({'erro': 'Tópicos e público-alvo são obrigatórios'}), 400
             
-            conteudo = agente_conteudo.criar_newsletter(topicos, publico_alvo, empresa)
+            with prazo_requisicao('api/conteudo'):
+                conteudo = registro_agentes.obter('conteudo').criar_newsletter(
+                    topicos, publico_alvo, empresa, forcar_novo=forcar_novo, modo=data.get('modo')
+                )
             
             return jsonify({
                 'sucesso': True,
@@ -139,6 +234,23 @@ def api_conteudo():
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
+@app.route('/api/conteudo/cache')
+def api_conteudo_cache():
+    """API com os contadores do cache de conteúdo (posts e newsletters já gerados)"""
+    try:
+        return jsonify({'sucesso': True, 'dados': registro_agentes.obter('conteudo').obter_estatisticas_cache()})
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@app.route('/api/vendas/cache')
+def api_vendas_cache():
+    """API com o estado do cache de planilhas já lidas (cache/planilhas)"""
+    try:
+        from cache_planilhas import cache_planilhas
+        return jsonify({'sucesso': True, 'dados': cache_planilhas.obter_estatisticas()})
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
 @app.route('/api/vendas', methods=['POST'])
 def api_vendas():
     """API para análise de vendas"""
@@ -159,7 +271,8 @@ def api_vendas():
         arquivo.save(arquivo_path)
         
         # Processar com agente de vendas
-        resultado = agente_vendas.executar_analise(str(arquivo_path))
+        with prazo_requisicao('api/vendas'):
+            resultado = registro_agentes.obter('vendas').executar_analise(str(arquivo_path))
         
         # Remover arquivo temporário
         arquivo_path.unlink()
@@ -186,6 +299,45 @@ def api_estatisticas():
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
+@app.route('/api/gemini/estatisticas')
+def api_gemini_estatisticas():
+    """API com contadores de chamadas, erros e latência do cliente Gemini"""
+    try:
+        from cliente_gemini import cliente_gemini
+        return jsonify({'sucesso': True, 'dados': cliente_gemini.obter_estatisticas()})
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@app.route('/api/gemini/uso')
+def api_gemini_uso():
+    """API com uso do Gemini por agente e por rota: latência p50/p95, tokens/hora e custo"""
+    try:
+        from metricas_llm import escritor_metricas, agregar_chamadas
+        
+        horas = float(request.args.get('horas', 24))
+        escritor_metricas.descarregar()
+        linhas = db_manager.obter_metricas('llm_chamada', horas)
+        return jsonify({'sucesso': True, 'dados': agregar_chamadas(linhas, horas)})
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@app.route('/api/gemini/limites')
+def api_gemini_limites():
+    """API com o estado atual do limitador de taxa (baldes e backoff)"""
+    try:
+        from cliente_gemini import cliente_gemini
+        return jsonify({'sucesso': True, 'dados': cliente_gemini.limitador.estado()})
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@app.route('/api/agentes/estatisticas')
+def api_agentes_estatisticas():
+    """API com agentes carregados no worker, tempo de construção e memória"""
+    try:
+        return jsonify({'sucesso': True, 'dados': registro_agentes.obter_estatisticas()})
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
 @app.route('/api/integracoes/teste', methods=['POST'])
 def api_testar_integracoes():
     """API para testar integrações"""
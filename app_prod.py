@@ -6,7 +6,6 @@ import json
 import sys
 import os
 from datetime import datetime
-import pandas as pd
 from pathlib import Path
 
 # Adicionar o diretório atual ao path
@@ -22,10 +21,7 @@ except ImportError:
     config_class = None
 
 # Importar os agentes
-from agente_suporte import AgenteSuporte
-from agente_conteudo import AgenteConteudo
-from agente_vendas import AgenteAnaliseVendas
-from agente_automatizado import AgenteAutomatizado
+from registro_agentes import registro_agentes
 from database import db_manager
 from integracoes import gerenciador_integracoes
 from config import config
@@ -38,11 +34,7 @@ if config_class:
 else:
     app.secret_key = os.environ.get('SECRET_KEY', 'agente_ia_secret_key_2024')
 
-# Inicializar agentes
-agente_suporte = AgenteSuporte()
-agente_conteudo = AgenteConteudo()
-agente_vendas = AgenteAnaliseVendas()
-agente_automatizado = AgenteAutomatizado()
+# Agentes são construídos sob demanda pelo registro_agentes (ver registro_agentes.py)
 
 @app.route('/')
 def index():
@@ -89,7 +81,7 @@ def api_suporte():
         if not pergunta:
             return jsonify({'erro': 'Pergunta é obrigatória'}), 400
         
-        resultado = agente_suporte.processar_solicitacao(pergunta)
+        resultado = registro_agentes.obter('suporte').processar_solicitacao(pergunta)
         
         if resultado.get('sucesso'):
             return jsonify({
@@ -120,7 +112,7 @@ def api_conteudo():
             if not tema:
                 return jsonify({'erro': 'Tema é obrigatório'}), 400
             
-            conteudo = agente_conteudo.gerar_post_social(tema, plataforma, tom, publico_alvo)
+            conteudo = registro_agentes.obter('conteudo').gerar_post_social(tema, plataforma, tom, publico_alvo)
             
             return jsonify({
                 'sucesso': True,
@@ -138,7 +130,7 @@ def api_conteudo():
             if not topicos or not publico_alvo:
                 return jsonify({'erro': 'Tópicos e público-alvo são obrigatórios'}), 400
             
-            conteudo = agente_conteudo.criar_newsletter(topicos, publico_alvo, empresa)
+            conteudo = registro_agentes.obter('conteudo').criar_newsletter(topicos, publico_alvo, empresa)
             
             return jsonify({
                 'sucesso': True,
@@ -173,7 +165,7 @@ def api_vendas():
         arquivo.save(arquivo_path)
         
         # Processar com agente de vendas
-        resultado = agente_vendas.executar_analise(str(arquivo_path))
+        resultado = registro_agentes.obter('vendas').executar_analise(str(arquivo_path))
         
         # Remover arquivo temporário
         arquivo_path.unlink()
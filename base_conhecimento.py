@@ -0,0 +1,45 @@
+"""
+Base de Conhecimento Indexada - seleciona só as entradas relevantes para cada prompt
+"""
+import logging
+from typing import Dict, Any, List
+from indice_bm25 import IndiceBM25
+from utils import estimar_tokens
+
+class BaseConhecimento:
+    """Entradas da base (produtos, FAQ) indexadas com BM25"""
+
+    def __init__(self, base: Dict[str, Any]):
+        self.logger = logging.getLogger('agente.suporte.base')
+        self.contatos = base.get('contatos', {})
+        self.entradas = (
+            [{'tipo': 'produto', 'texto': produto} for produto in base.get('produtos', [])] +
+            [{'tipo': 'faq', 'texto': faq} for faq in base.get('faq', [])]
+        )
+        self.indice = IndiceBM25()
+        self.indice.indexar([entrada['texto'] for entrada in self.entradas])
+        self.tokens_total = sum(estimar_tokens(entrada['texto']) for entrada in self.entradas)
+
+    def selecionar(self, pergunta: str, top_k: int = 3, orcamento_tokens: int = 400) -> List[Dict[str, str]]:
+        """Retorna as top_k entradas mais relevantes que cabem no orçamento de tokens
+
+        Se nenhuma entrada casa com a pergunta, vão as que couberem (na ordem da base)
+        em vez de um prompt sem contexto.
+        """
+        candidatos = [indice for indice, _score in self.indice.buscar(pergunta, top_k)]
+        if not candidatos:
+            candidatos = range(len(self.entradas))
+        selecionadas = []
+        tokens = 0
+        for indice in candidatos:
+            entrada = self.entradas[indice]
+            custo = estimar_tokens(entrada['texto'])
+            if tokens + custo > orcamento_tokens:
+                break
+            selecionadas.append(entrada)
+            tokens += custo
+        return selecionadas
+
+    def formatar_contatos(self) -> str:
+        """Contatos em uma linha (sempre incluídos no prompt)"""
+        return ' | '.join(f"{canal}: {valor}" for canal, valor in self.contatos.items())
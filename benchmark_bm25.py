@@ -0,0 +1,62 @@
+"""
+Benchmark do Recuperador Offline (BM25) - tempo de indexação e latência de consulta em 10k/100k entradas
+"""
+import sys
+import time
+import random
+import numpy as np
+from recuperador_faq import RecuperadorFAQ
+
+ASSUNTOS = ['pedido', 'entrega', 'frete', 'devolução', 'troca', 'reembolso', 'pagamento', 'boleto', 'pix',
+            'cartão', 'nota fiscal', 'garantia', 'cadastro', 'senha', 'conta', 'cupom', 'desconto', 'estoque']
+PRODUTOS = ['Produto A', 'Produto B', 'Produto C', 'plano anual', 'plano mensal', 'licença', 'integração', 'relatório']
+VERBOS = ['como alterar', 'como cancelar', 'qual o prazo de', 'posso usar', 'não consigo acessar',
+          'onde vejo', 'quanto custa', 'como funciona', 'erro ao gerar', 'quero saber sobre']
+
+def gerar_historico(quantidade: int):
+    """Atendimentos sintéticos no formato de obter_suporte_desde"""
+    random.seed(quantidade)
+    linhas = []
+    for i in range(quantidade):
+        pergunta = (f"{random.choice(VERBOS)} {random.choice(ASSUNTOS)} do {random.choice(PRODUTOS)} "
+                    f"pedido {random.randint(1, 99999)}")
+        linhas.append({'id': i + 1, 'pergunta': pergunta, 'resposta': f"Resposta do atendimento {i + 1}", 'urgencia': 'BAIXA'})
+    return linhas
+
+class BancoSintetico:
+    """Imita DatabaseManager.obter_suporte_desde sobre uma lista em memória"""
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+
+    def obter_suporte_desde(self, ultimo_id: int = 0, limite: int = 5000):
+        return self.linhas[ultimo_id:ultimo_id + limite]
+
+def medir(quantidade: int, consultas: int = 500):
+    from agente_suporte_offline import AgenteSuporteOffline
+    recuperador = RecuperadorFAQ(AgenteSuporteOffline().base_conhecimento, confianca_minima=0.0)
+    banco = BancoSintetico(gerar_historico(quantidade))
+
+    inicio = time.perf_counter()
+    recuperador.sincronizar(banco)
+    indexacao_s = time.perf_counter() - inicio
+
+    perguntas = [f"{random.choice(VERBOS)} {random.choice(ASSUNTOS)} {random.choice(PRODUTOS)}" for _ in range(consultas)]
+    latencias = []
+    for pergunta in perguntas:
+        inicio = time.perf_counter()
+        recuperador.buscar(pergunta)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+    print(f"📚 {quantidade:>7} entradas | indexação {indexacao_s:6.2f}s | "
+          f"consulta p50 {p50:.2f}ms p95 {p95:.2f}ms p99 {p99:.2f}ms")
+
+def main():
+    tamanhos = [int(valor) for valor in sys.argv[1:]] or [10000, 100000]
+    print("⏱️ Benchmark do recuperador offline (BM25)\n")
+    for quantidade in tamanhos:
+        medir(quantidade)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Microbenchmark do Classificador por Palavras-Chave (regex compilada x cadeias de any())
+"""
+import random
+import timeit
+from classificador_palavras import classificador_palavras
+
+PERGUNTAS = [
+    "Como faço um pedido?",
+    "Qual o prazo de entrega para o interior?",
+    "Quero fazer a devolucao do produto",
+    "Posso pagar com PIX ou boleto?",
+    "O sistema não funciona, é urgente!",
+    "Gostaria de uma informação sobre o catálogo",
+    "Quando chega minha encomenda?",
+    "Tenho uma dúvida sobre o Produto B",
+    "Erro ao acessar minha conta",
+    "Bom dia, tudo bem?",
+]
+
+def identificar_tipo_legado(pergunta: str) -> str:
+    """Implementação anterior de AgenteSuporteOffline.identificar_tipo_pergunta"""
+    pergunta_lower = pergunta.lower()
+    if any(palavra in pergunta_lower for palavra in ['pedido', 'comprar', 'adquirir', 'encomendar']):
+        return 'pedido'
+    elif any(palavra in pergunta_lower for palavra in ['entrega', 'prazo', 'quando chega', 'demora']):
+        return 'entrega'
+    elif any(palavra in pergunta_lower for palavra in ['devolução', 'devolver', 'trocar', 'reembolso']):
+        return 'devolução'
+    elif any(palavra in pergunta_lower for palavra in ['pagamento', 'pagar', 'cartão', 'pix', 'boleto']):
+        return 'pagamento'
+    elif any(palavra in pergunta_lower for palavra in ['suporte', 'ajuda', 'problema', 'dúvida']):
+        return 'suporte'
+    elif any(palavra in pergunta_lower for palavra in ['produto', 'serviço', 'o que vocês vendem']):
+        return 'produto'
+    return 'geral'
+
+def classificar_urgencia_legado(pergunta: str) -> str:
+    """Implementação anterior de classificar_urgencia_offline"""
+    pergunta_lower = pergunta.lower()
+    alta_urgencia = ['urgente', 'emergência', 'problema crítico', 'não funciona', 'erro', 'falha', 'quebrado']
+    if any(palavra in pergunta_lower for palavra in alta_urgencia):
+        return 'ALTA'
+    baixa_urgencia = ['informação', 'dúvida', 'curiosidade', 'preço', 'catálogo', 'horário']
+    if any(palavra in pergunta_lower for palavra in baixa_urgencia):
+        return 'BAIXA'
+    return 'MÉDIA'
+
+def processar_legado(pergunta: str):
+    # O caminho offline antigo varria o texto duas vezes (tipo e urgência)
+    return identificar_tipo_legado(pergunta), classificar_urgencia_legado(pergunta)
+
+def processar_compilado(pergunta: str):
+    resultado = classificador_palavras.classificar_sem_cache(pergunta)
+    return resultado['intencao'], resultado['urgencia']
+
+def processar_compilado_cache(pergunta: str):
+    # Como no caminho offline: tipo e urgência consultados separadamente
+    return classificador_palavras.classificar(pergunta)['intencao'], classificador_palavras.classificar(pergunta)['urgencia']
+
+def medir(funcao, perguntas, repeticoes: int = 5) -> float:
+    """Melhor tempo por pergunta (µs) entre as repetições"""
+    tempos = timeit.repeat(lambda: [funcao(p) for p in perguntas], number=1, repeat=repeticoes)
+    return min(tempos) / len(perguntas) * 1e6
+
+def main():
+    random.seed(42)
+    perguntas = [random.choice(PERGUNTAS) for _ in range(20000)]
+
+    print("⏱️ Microbenchmark do classificador offline")
+    print(f"📝 {len(perguntas)} perguntas ({len(PERGUNTAS)} textos distintos)\n")
+
+    legado = medir(processar_legado, perguntas)
+    compilado = medir(processar_compilado, perguntas)
+    com_cache = medir(processar_compilado_cache, perguntas)
+    print(f"🐢 any() encadeados (tipo + urgência): {legado:.2f} µs/pergunta")
+    print(f"⚡ Regex compilada (uma passada):       {compilado:.2f} µs/pergunta ({legado / compilado:.2f}x)")
+    print(f"🚀 Regex compilada + cache de textos:   {com_cache:.2f} µs/pergunta ({legado / com_cache:.2f}x)\n")
+
+    print("🔤 Casos com acentuação divergente:")
+    for pergunta in ["Quero fazer a devolucao", "Tenho uma duvida", "nao funciona, emergencia"]:
+        print(f"  '{pergunta}': legado={processar_legado(pergunta)} compilado={processar_compilado(pergunta)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark da Newsletter - tempo total do modo 'unica' (uma geração) contra o modo 'secoes' (paralelo)
+
+Por padrão usa um modelo simulado cuja latência cresce com o número de palavras pedidas
+(tempo até o primeiro token + tokens / taxa de geração). Use --real para chamar o Gemini.
+"""
+import re
+import sys
+import time
+from agente_conteudo import AgenteConteudo
+from cliente_gemini import cliente_gemini
+
+TOPICOS = ['Lançamento do novo produto', 'Dicas práticas de uso', 'Case de sucesso', 'Agenda de eventos',
+           'Novidades da equipe', 'Perguntas frequentes', 'Promoção do mês', 'Próximos passos']
+
+class RespostaSimulada:
+    def __init__(self, texto: str):
+        self.text = texto
+
+class ModeloSimulado:
+    """Latência = primeiro_token + palavras pedidas * 1,3 tokens / tokens_por_segundo (vezes escala)"""
+
+    def __init__(self, primeiro_token: float = 0.5, tokens_por_segundo: float = 60, escala: float = 0.1):
+        self.primeiro_token = primeiro_token
+        self.tokens_por_segundo = tokens_por_segundo
+        self.escala = escala
+
+    def generate_content(self, prompt, **kwargs):
+        faixa = re.search(r'(\d+)-(\d+) palavras', prompt)
+        palavras = (int(faixa.group(1)) + int(faixa.group(2))) / 2 if faixa else 100
+        time.sleep((self.primeiro_token + palavras * 1.3 / self.tokens_por_segundo) * self.escala)
+        return RespostaSimulada("palavra " * int(palavras))
+
+def medir(agente: AgenteConteudo, quantidade: int, modo: str) -> float:
+    inicio = time.perf_counter()
+    agente.criar_newsletter(TOPICOS[:quantidade], 'gestores de marketing', forcar_novo=True, modo=modo)
+    return time.perf_counter() - inicio
+
+def main():
+    real = '--real' in sys.argv
+    if not real:
+        cliente_gemini.modelos[cliente_gemini.config['model']] = ModeloSimulado()
+        # Sem limite de taxa: o benchmark mede só a geração
+        for balde in cliente_gemini.limitador.baldes.values():
+            balde.capacidade = balde.disponivel = 10 ** 9
+
+    agente = AgenteConteudo()
+    print(f"⏱️ Benchmark da newsletter ({'Gemini real' if real else 'modelo simulado'})\n")
+    for quantidade in (2, 4, 6, 8):
+        unica = medir(agente, quantidade, 'unica')
+        secoes = medir(agente, quantidade, 'secoes')
+        print(f"📰 {quantidade} tópicos | única {unica:5.2f}s | seções {secoes:5.2f}s "
+              f"({quantidade + 2} chamadas) | {unica / secoes:4.1f}x")
+
+if __name__ == "__main__":
+    main()
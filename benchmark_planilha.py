@@ -0,0 +1,95 @@
+"""
+Benchmark da Leitura de Planilhas - pico de memória e tempo: pd.read_excel inteiro x leitura em blocos
+x releitura do cache Arrow (gravar = leitura em blocos gravando o cache; cache = planilha já conhecida),
+com a memória somada dos blocos antes e depois da compactação de tipos
+
+Uso: python benchmark_planilha.py [linhas ...]   (padrão: 100000 1000000)
+Cada medição roda num subprocesso próprio para que o pico de RSS seja só dela.
+"""
+import sys
+import json
+import time
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime, timedelta
+
+PAISES = ['United Kingdom', 'France', 'Germany', 'EIRE', 'Spain', 'Netherlands', 'Belgium', 'Portugal']
+
+def gerar_planilha(linhas: int) -> Path:
+    """Exportação sintética de faturas (reaproveitada entre execuções)"""
+    import numpy as np
+    from openpyxl import Workbook
+
+    arquivo = Path(tempfile.gettempdir()) / f"benchmark_vendas_{linhas}.xlsx"
+    if arquivo.exists():
+        return arquivo
+
+    print(f"📝 Gerando {arquivo} ({linhas} linhas)...")
+    aleatorio = np.random.default_rng(linhas)
+    inicio = datetime(2010, 12, 1)
+    faturas = aleatorio.integers(500000, 500000 + linhas // 10 + 1, linhas)
+    minutos = aleatorio.integers(0, 373 * 24 * 60, linhas)
+    clientes = aleatorio.integers(12000, 18000, linhas)
+    paises = aleatorio.integers(0, len(PAISES), linhas)
+    quantidades = aleatorio.integers(1, 30, linhas)
+    valores = aleatorio.gamma(2, 20, linhas).round(2)
+
+    pasta = Workbook(write_only=True)
+    aba = pasta.create_sheet()
+    aba.append(['N° da fatura', 'Data da fatura', 'ID Cliente', 'País', 'Quantidade', 'Valor'])
+    for i in range(linhas):
+        aba.append([int(faturas[i]), inicio + timedelta(minutes=int(minutos[i])), int(clientes[i]),
+                    PAISES[paises[i]], int(quantidades[i]), float(valores[i])])
+    pasta.save(arquivo)
+    return arquivo
+
+def medir(modo: str, arquivo: str):
+    """Executado no subprocesso: processa a planilha e imprime tempo e memória em JSON"""
+    from config import config
+    from agente_vendas import AgenteAnaliseVendas
+    from cache_planilhas import cache_planilhas
+
+    config.AGENTE_CONFIG['vendas']['leitura_em_blocos'] = modo != 'pandas'
+    cache_planilhas.habilitado = cache_planilhas.habilitado and modo in ('gravar', 'cache')
+    if modo == 'gravar':
+        cache_planilhas.remover(cache_planilhas.chave_arquivo(arquivo))
+    agente = AgenteAnaliseVendas()
+    base_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    inicio = time.perf_counter()
+    _, resumo = agente.processar_planilha(arquivo)
+    print(json.dumps({
+        'tempo_s': time.perf_counter() - inicio,
+        'pico_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'base_mb': base_mb,
+        'linhas': resumo['total_linhas'],
+        'origem': resumo['origem_leitura'],
+        'memoria': resumo['memoria'],
+        'receita': resumo['vendas_totais']
+    }))
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--medir':
+        medir(sys.argv[2], sys.argv[3])
+        return
+
+    tamanhos = [int(valor) for valor in sys.argv[1:]] or [100000, 1000000]
+    print("⏱️ Benchmark da leitura de planilhas de vendas\n")
+    for linhas in tamanhos:
+        arquivo = gerar_planilha(linhas)
+        tamanho_mb = arquivo.stat().st_size / 1024 / 1024
+        for modo in ('pandas', 'blocos', 'gravar', 'cache'):
+            saida = subprocess.run([sys.executable, __file__, '--medir', modo, str(arquivo)],
+                                   capture_output=True, text=True)
+            if saida.returncode != 0:
+                print(f"❌ {linhas} linhas | {modo}: {saida.stderr.strip().splitlines()[-1:]}")
+                continue
+            dados = json.loads(saida.stdout.strip().splitlines()[-1])
+            print(f"📊 {linhas:>8} linhas ({tamanho_mb:5.1f} MB) | {modo:6} | {dados['tempo_s']:7.2f}s | "
+                  f"pico {dados['pico_mb']:7.0f} MB (+{dados['pico_mb'] - dados['base_mb']:.0f} MB) | "
+                  f"blocos {dados['memoria']['antes_mb']:.1f} -> {dados['memoria']['depois_mb']:.1f} MB | "
+                  f"receita {dados['receita']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Cache de Planilhas Lidas - blocos já convertidos guardados em Arrow IPC (cache/planilhas),
+endereçados pelo SHA-256 do arquivo e lidos de volta por memory mapping
+"""
+import os
+import hashlib
+import logging
+import threading
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional
+from config import config
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # opcional: sem pyarrow as planilhas são sempre lidas do arquivo
+    pa = None
+
+# Muda quando o formato dos blocos gravados muda (invalida entradas antigas)
+VERSAO_FORMATO = 1
+
+class CachePlanilhas:
+    """Blocos de DataFrame por conteúdo do arquivo, com descarte LRU por tamanho total em disco
+
+    Arquivos sem compressão: a leitura mapeia o arquivo e converte bloco a bloco, então
+    reanalisar uma planilha conhecida não passa pelo openpyxl e mantém a memória limitada.
+    O "uso recente" é o mtime do arquivo, compartilhado entre os workers.
+    """
+
+    def __init__(self, diretorio: Path = None, tamanho_max_mb: float = 1024, habilitado: bool = True):
+        self.diretorio = Path(diretorio or config.DIRETORIOS['cache'] / 'planilhas')
+        self.tamanho_max = int(tamanho_max_mb * 1024 * 1024)
+        self.logger = logging.getLogger('cache.planilhas')
+        self.lock = threading.Lock()
+        self.estatisticas = {'hits': 0, 'misses': 0, 'gravacoes': 0, 'falhas_gravacao': 0, 'descartes': 0}
+        self.habilitado = habilitado and pa is not None
+        if habilitado and pa is None:
+            self.logger.warning("pyarrow não instalado: cache de planilhas desabilitado")
+
+    @staticmethod
+    def chave_arquivo(arquivo: str, tamanho_leitura: int = 1024 * 1024) -> str:
+        """SHA-256 do conteúdo (lido em partes de 1 MB)"""
+        resumo = hashlib.sha256()
+        with open(arquivo, 'rb') as entrada:
+            for parte in iter(lambda: entrada.read(tamanho_leitura), b''):
+                resumo.update(parte)
+        return f"{resumo.hexdigest()}_v{VERSAO_FORMATO}"
+
+    def caminho(self, chave: str) -> Path:
+        return self.diretorio / f"{chave}.arrow"
+
+    def contar(self, evento: str):
+        with self.lock:
+            self.estatisticas[evento] += 1
+
+    def iterar_blocos(self, chave: str) -> Optional[Iterator[pd.DataFrame]]:
+        """Blocos gravados para a chave, ou None se a planilha não está no cache"""
+        caminho = self.caminho(chave)
+        if not self.habilitado or not caminho.exists():
+            self.contar('misses')
+            return None
+        try:
+            os.utime(caminho)  # marca como usado recentemente (LRU)
+        except OSError:
+            pass
+        self.contar('hits')
+        return self.ler(caminho)
+
+    def ler(self, caminho: Path) -> Iterator[pd.DataFrame]:
+        with pa.memory_map(str(caminho), 'r') as origem:
+            leitor = ipc.open_file(origem)
+            for posicao in range(leitor.num_record_batches):
+                yield leitor.get_batch(posicao).to_pandas()
+
+    def gravando(self, chave: str, blocos: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Repassa os blocos e os grava; a entrada só é publicada se todos forem consumidos
+
+        Se um bloco não puder ser convertido para o esquema do primeiro (tipos mistos numa
+        coluna, por exemplo), a gravação é abandonada e os blocos continuam sendo repassados.
+        """
+        if not self.habilitado:
+            yield from blocos
+            return
+
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        temporario = self.diretorio / f"{chave}.{os.getpid()}.{threading.get_ident()}.tmp"
+        escritor, esquema, completo = None, None, False
+        try:
+            for bloco in blocos:
+                if temporario is not None:
+                    try:
+                        tabela = pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False)
+                        if escritor is None:
+                            esquema = tabela.schema
+                            escritor = ipc.new_file(str(temporario), esquema)
+                        escritor.write_table(tabela)
+                    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError) as e:
+                        self.logger.warning(f"Planilha fora do cache (bloco não convertido para Arrow): {str(e)}")
+                        self.contar('falhas_gravacao')
+                        if escritor is not None:
+                            escritor.close()
+                            escritor = None
+                        temporario.unlink(missing_ok=True)
+                        temporario = None
+                yield bloco
+            completo = True
+        finally:
+            if escritor is not None:
+                escritor.close()
+            if temporario is not None and temporario.exists():
+                if completo:
+                    os.replace(temporario, self.caminho(chave))
+                    self.contar('gravacoes')
+                    self.descartar_excedente()
+                else:
+                    temporario.unlink(missing_ok=True)
+
+    def descartar_excedente(self):
+        """Remove as entradas usadas há mais tempo até o total caber em tamanho_max"""
+        try:
+            entradas = []
+            for caminho in self.diretorio.glob('*.arrow'):
+                info = caminho.stat()
+                entradas.append((info.st_mtime, info.st_size, caminho))
+            total = sum(tamanho for _, tamanho, _ in entradas)
+            for _, tamanho, caminho in sorted(entradas):
+                if total <= self.tamanho_max:
+                    break
+                caminho.unlink(missing_ok=True)
+                total -= tamanho
+                self.contar('descartes')
+                self.logger.info(f"Planilha descartada do cache: {caminho.name}")
+        except Exception as e:
+            self.logger.error(f"Erro ao descartar planilhas do cache: {str(e)}")
+
+    def remover(self, chave: str):
+        self.caminho(chave).unlink(missing_ok=True)
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.estatisticas)
+        arquivos = list(self.diretorio.glob('*.arrow')) if self.diretorio.exists() else []
+        stats['entradas'] = len(arquivos)
+        stats['tamanho_mb'] = round(sum(arquivo.stat().st_size for arquivo in arquivos) / 1024 / 1024, 1)
+        stats['habilitado'] = self.habilitado
+        return stats
+
+# Instância global do cache
+cache_planilhas = CachePlanilhas(
+    tamanho_max_mb=config.AGENTE_CONFIG['vendas'].get('cache_planilhas_max_mb', 1024),
+    habilitado=config.AGENTE_CONFIG['vendas'].get('cache_planilhas', True)
+)
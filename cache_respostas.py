@@ -0,0 +1,195 @@
+"""
+Cache de Respostas do Agente de IA (LRU em memória + camada persistente em disco)
+"""
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+from config import config
+
+class CacheRespostas:
+    """Cache LRU com TTL sobre uma camada SQLite persistente em cache/
+
+    O disco segue os mesmos limites (tamanho_max itens, ttl): a cada ~10% de tamanho_max
+    gravações, os itens expirados e os mais antigos além do limite são apagados.
+    """
+
+    def __init__(self, nome: str, tamanho_max: int = None, ttl: int = None, habilitado: bool = None):
+        performance = config.PERFORMANCE_CONFIG
+        self.nome = nome
+        self.tamanho_max = tamanho_max or performance['cache_size']
+        self.ttl = ttl or performance['cache_ttl']
+        self.habilitado = performance['habilitar_cache'] if habilitado is None else habilitado
+        self.logger = logging.getLogger(f'cache.{nome}')
+
+        self.memoria = OrderedDict()
+        self.lock = threading.Lock()
+        self.estatisticas = {'hits_memoria': 0, 'hits_disco': 0, 'misses': 0, 'expirados': 0, 'gravacoes': 0,
+                             'removidos_disco': 0}
+        self.intervalo_limpeza = max(self.tamanho_max // 10, 1)
+        self.gravacoes_sem_limpeza = 0
+
+        self.conexao = None
+        if self.habilitado:
+            self.inicializar_disco()
+
+    def inicializar_disco(self):
+        """Abre (ou cria) o arquivo SQLite da camada persistente"""
+        try:
+            diretorio = Path(config.DIRETORIOS['cache'])
+            diretorio.mkdir(exist_ok=True)
+            self.conexao = sqlite3.connect(str(diretorio / f"{self.nome}.db"), check_same_thread=False)
+            self.conexao.execute('''
+                CREATE TABLE IF NOT EXISTS cache (
+                    chave TEXT PRIMARY KEY,
+                    valor TEXT NOT NULL,
+                    criado REAL NOT NULL
+                )
+            ''')
+            self.conexao.execute('CREATE INDEX IF NOT EXISTS idx_cache_criado ON cache (criado)')
+            self.conexao.commit()
+        except Exception as e:
+            self.logger.error(f"Erro ao inicializar cache em disco: {str(e)}")
+            self.conexao = None
+            return
+        with self.lock:
+            self.limpar_disco()
+
+    @staticmethod
+    def gerar_chave(*partes: Any) -> str:
+        """Gera chave estável (SHA-256) a partir das partes informadas"""
+        bruto = json.dumps(partes, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(bruto.encode('utf-8')).hexdigest()
+
+    def obter(self, chave: str) -> Optional[Any]:
+        """Retorna o valor em cache ou None (miss/expirado)"""
+        if not self.habilitado:
+            return None
+
+        agora = time.time()
+        with self.lock:
+            item = self.memoria.get(chave)
+            if item is not None:
+                valor, criado = item
+                if agora - criado <= self.ttl:
+                    self.memoria.move_to_end(chave)
+                    self.estatisticas['hits_memoria'] += 1
+                    return valor
+                del self.memoria[chave]
+                self.estatisticas['expirados'] += 1
+
+            item = self.ler_disco(chave)
+            if item is not None:
+                valor, criado = item
+                if agora - criado <= self.ttl:
+                    self.guardar_memoria(chave, valor, criado)
+                    self.estatisticas['hits_disco'] += 1
+                    return valor
+                self.remover_disco(chave)
+                self.estatisticas['expirados'] += 1
+
+            self.estatisticas['misses'] += 1
+            return None
+
+    def armazenar(self, chave: str, valor: Any):
+        """Armazena valor nas camadas de memória e disco"""
+        if not self.habilitado:
+            return
+
+        criado = time.time()
+        with self.lock:
+            self.guardar_memoria(chave, valor, criado)
+            self.estatisticas['gravacoes'] += 1
+            if self.conexao is None:
+                return
+            try:
+                self.conexao.execute(
+                    'INSERT OR REPLACE INTO cache (chave, valor, criado) VALUES (?, ?, ?)',
+                    (chave, json.dumps(valor, ensure_ascii=False, default=str), criado)
+                )
+                self.conexao.commit()
+            except Exception as e:
+                self.logger.error(f"Erro ao gravar cache em disco: {str(e)}")
+                return
+            self.gravacoes_sem_limpeza += 1
+            if self.gravacoes_sem_limpeza >= self.intervalo_limpeza:
+                self.limpar_disco()
+
+    def guardar_memoria(self, chave: str, valor: Any, criado: float):
+        """Insere na camada LRU, descartando o item menos usado quando cheia"""
+        self.memoria[chave] = (valor, criado)
+        self.memoria.move_to_end(chave)
+        while len(self.memoria) > self.tamanho_max:
+            self.memoria.popitem(last=False)
+
+    def ler_disco(self, chave: str):
+        """Lê item da camada persistente"""
+        if self.conexao is None:
+            return None
+        try:
+            linha = self.conexao.execute(
+                'SELECT valor, criado FROM cache WHERE chave = ?', (chave,)
+            ).fetchone()
+            if linha is None:
+                return None
+            return json.loads(linha[0]), linha[1]
+        except Exception as e:
+            self.logger.error(f"Erro ao ler cache em disco: {str(e)}")
+            return None
+
+    def remover_disco(self, chave: str):
+        """Remove item expirado da camada persistente"""
+        if self.conexao is None:
+            return
+        try:
+            self.conexao.execute('DELETE FROM cache WHERE chave = ?', (chave,))
+            self.conexao.commit()
+        except Exception as e:
+            self.logger.error(f"Erro ao remover cache em disco: {str(e)}")
+
+    def limpar_disco(self):
+        """Apaga do disco os itens expirados e os mais antigos além de tamanho_max (chamar com o lock)"""
+        self.gravacoes_sem_limpeza = 0
+        try:
+            expirados = self.conexao.execute(
+                'DELETE FROM cache WHERE criado < ?', (time.time() - self.ttl,)
+            ).rowcount
+            excedentes = self.conexao.execute(
+                'DELETE FROM cache WHERE chave IN (SELECT chave FROM cache ORDER BY criado DESC LIMIT -1 OFFSET ?)',
+                (self.tamanho_max,)
+            ).rowcount
+            self.conexao.commit()
+            self.estatisticas['removidos_disco'] += expirados + excedentes
+        except Exception as e:
+            self.logger.error(f"Erro ao limpar cache em disco: {str(e)}")
+
+    def limpar(self):
+        """Esvazia as duas camadas do cache"""
+        with self.lock:
+            self.memoria.clear()
+            if self.conexao is not None:
+                self.conexao.execute('DELETE FROM cache')
+                self.conexao.commit()
+        self.logger.info("Cache limpo")
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        """Retorna contadores de hit/miss do cache"""
+        with self.lock:
+            stats = dict(self.estatisticas)
+            stats['itens_memoria'] = len(self.memoria)
+        hits = stats['hits_memoria'] + stats['hits_disco']
+        total = hits + stats['misses']
+        stats.update({
+            'nome': self.nome,
+            'habilitado': self.habilitado,
+            'tamanho_max': self.tamanho_max,
+            'ttl': self.ttl,
+            'hits': hits,
+            'taxa_acerto': hits / total * 100 if total else 0
+        })
+        return stats
@@ -0,0 +1,98 @@
+"""
+Classificador por Palavras-Chave - intenção e urgência offline em uma única passada
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+from utils import normalizar_texto
+
+# Termos por dimensão/rótulo com seu peso; acentos e maiúsculas são ignorados na comparação.
+# A ordem das intenções desempata pontuações iguais.
+PALAVRAS_CHAVE: Dict[str, Dict[str, Dict[str, float]]] = {
+    'intencao': {
+        'pedido': {'pedido': 1, 'comprar': 1, 'adquirir': 1, 'encomendar': 1, 'encomenda': 1},
+        'entrega': {'entrega': 1, 'prazo': 1, 'quando chega': 2, 'demora': 1, 'rastreamento': 1, 'rastrear': 1},
+        'devolução': {'devolucao': 1, 'devolver': 1, 'trocar': 1, 'troca': 1, 'reembolso': 1},
+        'pagamento': {'pagamento': 1, 'pagar': 1, 'cartao': 1, 'pix': 1, 'boleto': 1},
+        'suporte': {'suporte': 1, 'ajuda': 1, 'problema': 1, 'problema critico': 1, 'duvida': 1},
+        'produto': {'produto': 1, 'servico': 1, 'o que voces vendem': 2}
+    },
+    'urgencia': {
+        'ALTA': {'urgente': 2, 'emergencia': 2, 'problema critico': 2, 'nao funciona': 2,
+                 'erro': 1, 'falha': 1, 'quebrado': 1},
+        'BAIXA': {'informacao': 1, 'duvida': 1, 'curiosidade': 1, 'preco': 1, 'catalogo': 1, 'horario': 1}
+    }
+}
+
+def dobrar_texto(texto: str) -> str:
+    """Minúsculas e sem acentos (caracteres sem equivalente ASCII são descartados)"""
+    return unicodedata.normalize('NFKD', (texto or '').lower()).encode('ascii', 'ignore').decode('ascii')
+
+def regex_trie(termos) -> str:
+    """Alternância com prefixos comuns fatorados (ex.: pagamento|pagar -> paga(?:mento|r))
+
+    Na regex resultante cada posição do texto testa no máximo um ramo por letra,
+    como um autômato de Aho-Corasick, e o termo mais longo sempre vence.
+    """
+    trie: Dict[str, dict] = {}
+    for termo in termos:
+        no = trie
+        for letra in termo:
+            no = no.setdefault(letra, {})
+        no[''] = {}
+
+    def gerar(no: Dict[str, dict]) -> str:
+        ramos = [(r'\s+' if letra == ' ' else re.escape(letra)) + gerar(filho)
+                 for letra, filho in sorted(no.items()) if letra]
+        if not ramos:
+            return ''
+        corpo = ramos[0] if len(ramos) == 1 else '(?:' + '|'.join(ramos) + ')'
+        return f'(?:{corpo})?' if '' in no else corpo
+
+    return gerar(trie)
+
+class ClassificadorPalavrasChave:
+    """Casamento multi-padrão com uma única regex compilada a partir da tabela de termos"""
+
+    def __init__(self, tabela: Dict[str, Dict[str, Dict[str, float]]] = None, tamanho_cache: int = 4096):
+        tabela = tabela or PALAVRAS_CHAVE
+        self.efeitos: Dict[str, List[Tuple[str, str, float]]] = {}
+        for dimensao, rotulos in tabela.items():
+            for rotulo, termos in rotulos.items():
+                for termo, peso in termos.items():
+                    self.efeitos.setdefault(normalizar_texto(termo), []).append((dimensao, rotulo, peso))
+        self.ordem_intencoes = {rotulo: i for i, rotulo in enumerate(tabela['intencao'])}
+
+        # \b no início evita falsos positivos como "apagar" -> "pagar"
+        self.padrao = re.compile(r'\b' + regex_trie(self.efeitos))
+        # Textos repetidos (comuns com a API fora do ar) e as chamadas separadas de
+        # intenção e urgência para a mesma pergunta reaproveitam a mesma passada
+        self.classificar = lru_cache(maxsize=tamanho_cache)(self.classificar_sem_cache)
+
+    def classificar_sem_cache(self, texto: str) -> Dict[str, Any]:
+        """Retorna intenção e urgência com as pontuações e os termos encontrados"""
+        pontos: Dict[str, Dict[str, float]] = {'intencao': {}, 'urgencia': {}}
+        termos = tuple(self.padrao.findall(dobrar_texto(texto)))
+        for termo in termos:
+            efeitos = self.efeitos.get(termo) or self.efeitos[' '.join(termo.split())]
+            for dimensao, rotulo, peso in efeitos:
+                pontos[dimensao][rotulo] = pontos[dimensao].get(rotulo, 0) + peso
+
+        intencoes = pontos['intencao']
+        intencao = max(intencoes, key=lambda r: (intencoes[r], -self.ordem_intencoes[r])) if intencoes else 'geral'
+
+        alta = pontos['urgencia'].get('ALTA', 0)
+        baixa = pontos['urgencia'].get('BAIXA', 0)
+        urgencia = 'ALTA' if alta else 'BAIXA' if baixa else 'MÉDIA'
+
+        return {
+            'intencao': intencao,
+            'pontuacao_intencao': intencoes.get(intencao, 0),
+            'urgencia': urgencia,
+            'pontuacao_urgencia': alta - baixa,
+            'termos': termos
+        }
+
+# Instância global (a regex é compilada uma única vez por processo)
+classificador_palavras = ClassificadorPalavrasChave()
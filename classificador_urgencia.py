@@ -0,0 +1,203 @@
+"""
+Classificador Local de Urgência - Naive Bayes multinomial (NumPy) treinado com o histórico de suporte
+"""
+import os
+import json
+import time
+import zlib
+import random
+import logging
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Optional, Callable
+from indice_bm25 import tokenizar
+
+ROTULOS = ['BAIXA', 'MÉDIA', 'ALTA']
+
+# Só rótulos dados pelo Gemini treinam o modelo (nunca as previsões dele mesmo ou do modo offline)
+ORIGEM_TREINO = 'gemini'
+
+class ClassificadorUrgencia:
+    """Classifica urgência localmente; o modelo treinado fica em arquivo e é recarregado quando muda
+
+    O treino pode rodar em outro processo (agendador): os agentes só percebem o
+    novo arquivo e o recarregam.
+    """
+
+    def __init__(self, arquivo: str = 'cache/classificador_urgencia.npz', dimensao: int = 2 ** 14,
+                 alpha: float = 1.0, min_amostras: int = 50, intervalo_recarga: float = 60):
+        self.arquivo = Path(arquivo)
+        self.dimensao = dimensao
+        self.alpha = alpha
+        self.min_amostras = min_amostras
+        self.intervalo_recarga = intervalo_recarga
+        self.logger = logging.getLogger('agente.suporte.urgencia')
+        self.lock = threading.Lock()
+        self.log_prior: Optional[np.ndarray] = None
+        self.log_prob: Optional[np.ndarray] = None
+        self.metricas: Dict[str, Any] = {}
+        self.versao_arquivo = None
+        self.verificado_em = 0.0
+        self.estatisticas = {'locais': 0, 'escaladas': 0, 'comparacoes': 0, 'concordancias': 0, 'tempo_local_us': 0.0}
+        self.recarregar()
+
+    def extrair(self, texto: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Unigramas e bigramas com hashing: (índices das colunas, contagens)"""
+        termos = tokenizar(texto, radicais=False)
+        termos += [f"{a} {b}" for a, b in zip(termos, termos[1:])]
+        if not termos:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        ids = np.fromiter((zlib.crc32(termo.encode('utf-8')) % self.dimensao for termo in termos),
+                          dtype=np.int64, count=len(termos))
+        ids, contagens = np.unique(ids, return_counts=True)
+        return ids, contagens.astype(np.float32)
+
+    def ajustar(self, textos: List[str], classes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Estima log P(classe) e log P(termo | classe) com suavização de Laplace"""
+        contagens = np.zeros((len(ROTULOS), self.dimensao), dtype=np.float64)
+        for texto, classe in zip(textos, classes):
+            ids, quantidades = self.extrair(texto)
+            contagens[classe, ids] += quantidades
+        prior = (np.bincount(classes, minlength=len(ROTULOS)) + 1) / (len(classes) + len(ROTULOS))
+        log_prob = np.log((contagens + self.alpha) / (contagens.sum(axis=1, keepdims=True) + self.alpha * self.dimensao))
+        return np.log(prior).astype(np.float32), log_prob.astype(np.float32)
+
+    def prever_com(self, log_prior: np.ndarray, log_prob: np.ndarray, texto: str) -> Tuple[str, float]:
+        ids, contagens = self.extrair(texto)
+        scores = log_prior + log_prob[:, ids] @ contagens
+        probabilidades = np.exp(scores - scores.max())
+        probabilidades /= probabilidades.sum()
+        classe = int(probabilidades.argmax())
+        return ROTULOS[classe], float(probabilidades[classe])
+
+    def carregar_amostras(self, db_manager, filtro: Callable[[str, str], bool] = None) -> List[Tuple[str, int]]:
+        """Perguntas da tabela suporte cuja urgência veio do Gemini (origem_urgencia)
+
+        Linhas classificadas pelo próprio modelo, por palavras-chave ou copiadas de um cache
+        ficam de fora: treinar com elas faria o modelo aprender as próprias saídas.
+        """
+        amostras, ultimo_id = [], 0
+        while True:
+            linhas = db_manager.obter_suporte_desde(ultimo_id)
+            if not linhas:
+                return amostras
+            for linha in linhas:
+                ultimo_id = linha['id']
+                if linha.get('origem_urgencia') != ORIGEM_TREINO:
+                    continue
+                urgencia = (linha['urgencia'] or '').strip().upper()
+                if urgencia not in ROTULOS:
+                    continue
+                if filtro and not filtro(linha['pergunta'], linha['resposta'] or ''):
+                    continue
+                amostras.append((linha['pergunta'], ROTULOS.index(urgencia)))
+
+    def treinar(self, db_manager, filtro: Callable[[str, str], bool] = None,
+                confianca_minima: float = 0.8) -> Dict[str, Any]:
+        """Treina com a tabela suporte, avalia em 20% separados e grava o modelo final"""
+        try:
+            inicio = time.perf_counter()
+            amostras = self.carregar_amostras(db_manager, filtro)
+            if len(amostras) < self.min_amostras:
+                self.logger.info(f"Classificador de urgência não treinado: {len(amostras)}/{self.min_amostras} amostras")
+                return {"sucesso": False, "erro": f"Amostras insuficientes ({len(amostras)}/{self.min_amostras})"}
+
+            random.Random(42).shuffle(amostras)
+            textos = [texto for texto, _ in amostras]
+            classes = np.array([classe for _, classe in amostras], dtype=np.int64)
+            corte = int(len(amostras) * 0.8)
+
+            # Avaliação contra os rótulos gravados (vindos do Gemini) nos 20% de teste
+            log_prior, log_prob = self.ajustar(textos[:corte], classes[:corte])
+            previsoes = [self.prever_com(log_prior, log_prob, texto) for texto in textos[corte:]]
+            acertos = np.array([ROTULOS.index(rotulo) == classe for (rotulo, _), classe in zip(previsoes, classes[corte:])])
+            confiantes = np.array([confianca >= confianca_minima for _, confianca in previsoes])
+            metricas = {
+                'amostras': len(amostras),
+                'acuracia': round(float(acertos.mean()), 4),
+                'cobertura_confiante': round(float(confiantes.mean()), 4),
+                'acuracia_confiante': round(float(acertos[confiantes].mean()), 4) if confiantes.any() else None,
+                'confianca_minima': confianca_minima,
+                'distribuicao': {rotulo: int(n) for rotulo, n in zip(ROTULOS, np.bincount(classes, minlength=len(ROTULOS)))},
+                'treinado_em': time.strftime('%Y-%m-%dT%H:%M:%S')
+            }
+
+            # Modelo final com todas as amostras
+            log_prior, log_prob = self.ajustar(textos, classes)
+            metricas['tempo_treino_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+            self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+            # Temporário por processo/thread: vários workers podem treinar ao mesmo tempo
+            temporario = self.arquivo.with_name(f"{self.arquivo.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+            np.savez_compressed(temporario, log_prior=log_prior, log_prob=log_prob,
+                                metricas=np.array(json.dumps(metricas)))
+            os.replace(temporario, self.arquivo)
+            self.recarregar(forcar=True)
+
+            self.logger.info(f"Classificador de urgência treinado: {metricas}")
+            return {"sucesso": True, "dados": metricas}
+
+        except Exception as e:
+            self.logger.error(f"Erro ao treinar classificador de urgência: {str(e)}")
+            return {"sucesso": False, "erro": str(e)}
+
+    def recarregar(self, forcar: bool = False):
+        """Carrega o modelo do arquivo se ele mudou (verifica no máximo a cada intervalo_recarga)"""
+        agora = time.monotonic()
+        if not forcar and agora - self.verificado_em < self.intervalo_recarga:
+            return
+        self.verificado_em = agora
+        try:
+            versao = self.arquivo.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if versao == self.versao_arquivo and not forcar:
+            return
+        try:
+            with np.load(self.arquivo) as dados:
+                log_prior, log_prob = dados['log_prior'], dados['log_prob']
+                metricas = json.loads(str(dados['metricas']))
+            with self.lock:
+                self.log_prior, self.log_prob, self.metricas = log_prior, log_prob, metricas
+                self.versao_arquivo = versao
+            self.logger.info(f"Modelo de urgência carregado ({metricas.get('amostras')} amostras)")
+        except Exception as e:
+            self.logger.error(f"Erro ao carregar classificador de urgência: {str(e)}")
+
+    def classificar(self, texto: str) -> Optional[Tuple[str, float]]:
+        """(rótulo, confiança) ou None se ainda não há modelo treinado"""
+        self.recarregar()
+        log_prior, log_prob = self.log_prior, self.log_prob
+        if log_prior is None:
+            return None
+        inicio = time.perf_counter()
+        resultado = self.prever_com(log_prior, log_prob, texto)
+        with self.lock:
+            self.estatisticas['tempo_local_us'] += (time.perf_counter() - inicio) * 1e6
+        return resultado
+
+    def registrar_decisao(self, local: bool, previsto: str = None, gemini: str = None):
+        """Conta decisões locais/escaladas e a concordância com o Gemini quando ele foi consultado"""
+        with self.lock:
+            self.estatisticas['locais' if local else 'escaladas'] += 1
+        self.registrar_comparacao(previsto, gemini)
+
+    def registrar_comparacao(self, previsto: str = None, gemini: str = None):
+        """Concordância com o Gemini sem decisão local (modo combinado: a urgência vem na mesma chamada)"""
+        if previsto is None or gemini is None:
+            return
+        with self.lock:
+            self.estatisticas['comparacoes'] += 1
+            self.estatisticas['concordancias'] += previsto == gemini
+
+    def obter_estatisticas(self, latencia_gemini_ms: float = 0) -> Dict[str, Any]:
+        """Decisões locais, concordância e tempo economizado estimado"""
+        with self.lock:
+            stats = dict(self.estatisticas)
+            stats['modelo'] = dict(self.metricas) if self.metricas else None
+        decisoes = stats['locais'] + stats['escaladas']
+        stats['taxa_local'] = stats['locais'] / decisoes * 100 if decisoes else 0
+        stats['latencia_local_us'] = stats['tempo_local_us'] / decisoes if decisoes else 0
+        stats['concordancia_gemini'] = stats['concordancias'] / stats['comparacoes'] * 100 if stats['comparacoes'] else None
+        stats['economia_estimada_s'] = round(stats['locais'] * latencia_gemini_ms / 1000, 1)
+        return stats
@@ -0,0 +1,345 @@
+"""
+Cliente Gemini Compartilhado - ponto único de acesso à API para todos os agentes
+"""
+import sys
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Iterator
+import google.generativeai as genai
+from config import config
+from utils import estimar_tokens
+from limitador_taxa import LimitadorTaxa, LimiteTaxaExcedido
+from disjuntor import Disjuntor, CircuitoAberto
+from coalescencia import CoalescedorChamadas
+from hedging import PoliticaHedging
+from prazo import PrazoEsgotado, obter_prazo, limitar_tempo, medir_etapa, submeter_com_prazo
+from metricas_llm import escritor_metricas
+
+class ClienteGemini:
+    """Cliente com limite global de chamadas simultâneas, timeout e contadores"""
+
+    def __init__(self):
+        self.config = config.API_CONFIG['gemini']
+        self.logger = logging.getLogger('agente.gemini')
+        self.timeout = self.config['timeout']
+        self.max_concorrencia = self.config.get('max_concorrencia', config.PERFORMANCE_CONFIG['max_workers'])
+        self.semaforo = threading.BoundedSemaphore(self.max_concorrencia)
+        self.lock = threading.Lock()
+        self.modelos = {}
+        self.em_andamento = 0
+        self.estatisticas = {}
+        self.limitador = LimitadorTaxa()
+        self.coalescedor = CoalescedorChamadas()
+        self.disjuntor = Disjuntor(
+            self.config.get('disjuntor_falhas', 5),
+            self.config.get('disjuntor_espera', 60),
+            ao_mudar_estado=self.registrar_transicao_disjuntor
+        )
+        self.hedging = PoliticaHedging(
+            self.config.get('hedging_percentil', 95),
+            self.config.get('hedging_max_extra', 0.1),
+            self.config.get('hedging_min_amostras', 20),
+            self.config.get('hedging_janela', 200)
+        )
+        self.executor_hedging = None
+
+        genai.configure(api_key=self.config['api_key'])
+
+    def obter_modelo(self, nome_modelo: str = None):
+        """Retorna (e reaproveita) a instância de GenerativeModel"""
+        nome_modelo = nome_modelo or self.config['model']
+        with self.lock:
+            if nome_modelo not in self.modelos:
+                self.modelos[nome_modelo] = genai.GenerativeModel(nome_modelo)
+            return self.modelos[nome_modelo]
+
+    def adquirir_vaga(self, timeout: float):
+        """Aguarda vaga no limite global de chamadas simultâneas"""
+        if not self.semaforo.acquire(timeout=timeout):
+            raise TimeoutError(f"Limite de {self.max_concorrencia} chamadas simultâneas ao Gemini atingido")
+        with self.lock:
+            self.em_andamento += 1
+
+    def liberar_vaga(self):
+        """Libera a vaga ocupada pela chamada"""
+        with self.lock:
+            self.em_andamento -= 1
+        self.semaforo.release()
+
+    def registrar(self, agente: str, inicio: float, erro: Exception = None, metodo: str = 'gerar',
+                  tokens_estimados: int = 0, response=None):
+        """Atualiza contadores de latência e erro por agente e enfileira a métrica da chamada"""
+        latencia_ms = (time.perf_counter() - inicio) * 1000
+        if self.config.get('registrar_metricas', True):
+            self.registrar_metrica(agente, metodo, latencia_ms, tokens_estimados, response, erro)
+        with self.lock:
+            stats = self.estatisticas.setdefault(agente, {
+                'chamadas': 0, 'erros': 0, 'timeouts': 0, 'tempo_total_ms': 0.0, 'ultimo_erro': None
+            })
+            stats['chamadas'] += 1
+            stats['tempo_total_ms'] += latencia_ms
+            if erro is not None:
+                stats['erros'] += 1
+                stats['timeouts'] += isinstance(erro, TimeoutError) or 'deadline' in str(erro).lower()
+                stats['ultimo_erro'] = str(erro)[:200]
+
+    def registrar_metrica(self, agente: str, metodo: str, latencia_ms: float, tokens_estimados: int,
+                          response=None, erro: Exception = None):
+        """Métrica 'llm_chamada' (latência em ms; tokens, custo e resultado nas tags)"""
+        uso = getattr(response, 'usage_metadata', None)
+        tokens_prompt = getattr(uso, 'prompt_token_count', 0) or tokens_estimados
+        tokens_resposta = getattr(uso, 'candidates_token_count', 0)
+        if response is not None and not tokens_resposta:
+            try:
+                tokens_resposta = estimar_tokens(response.text)
+            except Exception:
+                tokens_resposta = 0
+        if erro is None:
+            resultado = 'sucesso'
+        elif isinstance(erro, TimeoutError) or 'deadline' in str(erro).lower():
+            resultado = 'timeout'
+        elif self.limitador.eh_erro_quota(erro):
+            resultado = 'cota'
+        else:
+            resultado = 'erro'
+        custo = (tokens_prompt * self.config.get('custo_entrada_por_milhao', 0) +
+                 tokens_resposta * self.config.get('custo_saida_por_milhao', 0)) / 1_000_000
+        prazo = obter_prazo()
+        escritor_metricas.registrar('llm_chamada', round(latencia_ms, 1), 'ms', 'llm', {
+            'agente': agente,
+            'metodo': metodo,
+            'rota': prazo.nome if prazo is not None else None,
+            'modelo': self.config['model'],
+            'tokens_prompt': tokens_prompt,
+            'tokens_resposta': tokens_resposta,
+            'resultado': resultado,
+            'custo_usd': round(custo, 8)
+        })
+
+    def registrar_transicao_disjuntor(self, anterior: str, novo: str):
+        """Enfileira a transição de estado do disjuntor na tabela metricas"""
+        codigos = {Disjuntor.FECHADO: 0, Disjuntor.MEIO_ABERTO: 1, Disjuntor.ABERTO: 2}
+        escritor_metricas.registrar('gemini_disjuntor', codigos[novo], 'estado', 'disjuntor', [anterior, novo])
+
+    def reservar(self, tokens_estimados: int, timeout: float, espera_maxima: float = None) -> bool:
+        """Passa pelo disjuntor, pelo limitador de taxa e pelo limite de concorrência
+
+        Retorna True se a chamada é a sondagem do disjuntor meio aberto.
+        """
+        sonda = self.disjuntor.permitir()
+        try:
+            self.limitador.adquirir(tokens_estimados, espera_maxima)
+            self.adquirir_vaga(timeout)
+        except Exception:
+            if sonda:
+                self.disjuntor.cancelar_sonda()
+            raise
+        return sonda
+
+    def registrar_resultado(self, tokens_estimados: int, response=None, erro: Exception = None,
+                            sonda: bool = False):
+        """Informa ao disjuntor e ao limitador o resultado da chamada
+
+        Erro de cota (429) é assunto do limitador: não conta como falha do disjuntor.
+        """
+        if erro is not None:
+            if self.limitador.eh_erro_quota(erro):
+                self.limitador.registrar_erro_quota()
+                if sonda:
+                    self.disjuntor.cancelar_sonda()
+            else:
+                self.disjuntor.registrar_falha(sonda)
+            return
+        self.disjuntor.registrar_sucesso(sonda)
+        self.limitador.registrar_sucesso()
+        uso = getattr(response, 'usage_metadata', None)
+        tokens_reais = getattr(uso, 'total_token_count', 0) if uso is not None else 0
+        if tokens_reais:
+            self.limitador.ajustar_tokens(tokens_estimados, tokens_reais)
+
+    def aplicar_prazo(self, timeout: float, espera_maxima: float = None):
+        """Ajusta timeout e espera pelo limitador ao prazo da requisição em andamento"""
+        timeout = limitar_tempo(timeout or self.timeout, 'gemini')
+        prazo = obter_prazo()
+        if prazo is not None:
+            espera = self.limitador.espera_padrao if espera_maxima is None else espera_maxima
+            espera_maxima = min(espera, prazo.restante())
+        return timeout, espera_maxima
+
+    def tratar_erro(self, agente: str, inicio: float, tokens_estimados: int, erro: Exception,
+                    metodo: str = 'gerar', sonda: bool = False):
+        """Registra a falha; cortes causados pelo prazo da requisição não contam para o disjuntor"""
+        self.registrar(agente, inicio, erro, metodo, tokens_estimados)
+        prazo = obter_prazo()
+        if prazo is not None and prazo.restante() <= 0:
+            prazo.esgotado = True
+            raise PrazoEsgotado(f"Chamada ao Gemini cancelada: prazo de {prazo.segundos}s esgotado") from erro
+        self.registrar_resultado(tokens_estimados, erro=erro, sonda=sonda)
+
+    def gerar(self, prompt: str, agente: str = 'geral', timeout: float = None,
+              espera_maxima: float = None, metodo: str = None, **kwargs):
+        """Chamada síncrona ao Gemini (bloqueante)
+
+        espera_maxima: segundos que o chamador aceita aguardar pelo limitador de taxa
+        (0 = falhar imediatamente com LimiteTaxaExcedido).
+        metodo: nome registrado nas métricas (padrão: a função que chamou gerar).
+        Chamadas idênticas simultâneas compartilham uma única requisição.
+        """
+        metodo = metodo or sys._getframe(1).f_code.co_name
+        executar = self.executar_chamada
+        if self.config.get('hedging', False) and agente in self.config.get('hedging_agentes', []):
+            executar = self.executar_com_hedging
+
+        with medir_etapa('gemini'):
+            if not self.config.get('coalescer_chamadas', True):
+                return executar(prompt, agente, timeout, espera_maxima, metodo, **kwargs)
+
+            # Política de espera na chave: uma chamada interativa (espera 0) não pega carona na de um lote
+            chave = CoalescedorChamadas.gerar_chave(self.config['model'], prompt, sorted(kwargs.items()),
+                                                    timeout, espera_maxima)
+            return self.coalescedor.executar(
+                chave, lambda: executar(prompt, agente, timeout, espera_maxima, metodo, **kwargs), agente
+            )
+
+    def executar_com_hedging(self, prompt: str, agente: str, timeout: float = None,
+                             espera_maxima: float = None, metodo: str = 'gerar', **kwargs):
+        """Duplica a chamada se ela passar do percentil configurado; a primeira resposta vence
+
+        A chamada perdedora não pode ser interrompida no SDK: o resultado dela é descartado
+        e a vaga é liberada quando ela termina (ou atinge o timeout).
+        """
+        with self.lock:
+            if self.executor_hedging is None:
+                self.executor_hedging = ThreadPoolExecutor(
+                    max_workers=self.max_concorrencia * 2, thread_name_prefix='gemini-hedging'
+                )
+        self.hedging.registrar_chamada()
+        inicio = time.perf_counter()
+
+        def registrar_original(futuro):
+            # Duração da chamada original = latência que o usuário teria sem hedging, inclusive
+            # quando ela falha ou estoura o timeout (é essa a cauda que o hedging corta)
+            if futuro.cancelled():
+                return
+            erro = futuro.exception()
+            if isinstance(erro, (CircuitoAberto, LimiteTaxaExcedido)):
+                return  # bloqueada antes de chegar à API
+            duracao = time.perf_counter() - inicio
+            if erro is not None and not isinstance(erro, PrazoEsgotado) and (
+                isinstance(erro, TimeoutError) or 'deadline' in str(erro).lower()
+            ):
+                duracao = max(duracao, timeout or self.timeout)
+            self.hedging.registrar_latencia('sem_hedging', duracao)
+
+        original = submeter_com_prazo(
+            self.executor_hedging, self.executar_chamada, prompt, agente, timeout, espera_maxima, metodo, **kwargs
+        )
+        original.add_done_callback(registrar_original)
+
+        limiar = self.hedging.limiar()
+        if limiar is None or wait([original], timeout=limiar).done or not self.hedging.pode_duplicar():
+            resultado = original.result()
+            self.hedging.registrar_latencia('com_hedging', time.perf_counter() - inicio)
+            return resultado
+
+        self.logger.info(f"Chamada de '{agente}' passou de {limiar * 1000:.0f}ms: enviando duplicata")
+        # A duplicata não espera pelo limitador: sem cota, segue valendo só a original
+        duplicata = submeter_com_prazo(
+            self.executor_hedging, self.executar_chamada, prompt, agente, timeout, 0, metodo, **kwargs
+        )
+        pendentes = {original, duplicata}
+        while pendentes:
+            concluidas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in concluidas:
+                if futuro.exception() is None:
+                    for perdedora in pendentes:
+                        perdedora.cancel()
+                    if futuro is duplicata:
+                        self.hedging.registrar_vitoria_duplicada()
+                    self.hedging.registrar_latencia('com_hedging', time.perf_counter() - inicio)
+                    return futuro.result()
+        raise original.exception()
+
+    def executar_chamada(self, prompt: str, agente: str, timeout: float = None,
+                         espera_maxima: float = None, metodo: str = 'gerar', **kwargs):
+        """Executa a requisição passando por disjuntor, limitador e semáforo"""
+        timeout, espera_maxima = self.aplicar_prazo(timeout, espera_maxima)
+        tokens_estimados = estimar_tokens(prompt)
+        sonda = self.reservar(tokens_estimados, timeout, espera_maxima)
+        inicio = time.perf_counter()
+        try:
+            response = self.obter_modelo().generate_content(
+                prompt, request_options={'timeout': timeout}, **kwargs
+            )
+            self.registrar(agente, inicio, None, metodo, tokens_estimados, response)
+            self.registrar_resultado(tokens_estimados, response, sonda=sonda)
+            return response
+        except Exception as e:
+            self.tratar_erro(agente, inicio, tokens_estimados, e, metodo, sonda)
+            raise
+        finally:
+            if sonda:
+                self.disjuntor.cancelar_sonda()  # ex.: prazo esgotado ou stream abandonado, sem veredito
+            self.liberar_vaga()
+
+    def gerar_stream(self, prompt: str, agente: str = 'geral', timeout: float = None,
+                     espera_maxima: float = None, metodo: str = None) -> Iterator[str]:
+        """Chamada em streaming; a vaga fica ocupada até o último trecho"""
+        metodo = metodo or sys._getframe(1).f_code.co_name
+        with medir_etapa('gemini_stream'):
+            yield from self.executar_stream(prompt, agente, timeout, espera_maxima, metodo)
+
+    def executar_stream(self, prompt: str, agente: str, timeout: float = None,
+                        espera_maxima: float = None, metodo: str = 'gerar_stream') -> Iterator[str]:
+        """Executa o streaming passando por disjuntor, limitador e semáforo"""
+        timeout, espera_maxima = self.aplicar_prazo(timeout, espera_maxima)
+        tokens_estimados = estimar_tokens(prompt)
+        sonda = self.reservar(tokens_estimados, timeout, espera_maxima)
+        inicio = time.perf_counter()
+        try:
+            response = self.obter_modelo().generate_content(
+                prompt, stream=True, request_options={'timeout': timeout}
+            )
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+            self.registrar(agente, inicio, None, metodo, tokens_estimados, response)
+            self.registrar_resultado(tokens_estimados, response, sonda=sonda)
+        except Exception as e:
+            self.tratar_erro(agente, inicio, tokens_estimados, e, metodo, sonda)
+            raise
+        finally:
+            if sonda:
+                self.disjuntor.cancelar_sonda()  # ex.: prazo esgotado ou stream abandonado, sem veredito
+            self.liberar_vaga()
+
+    async def gerar_async(self, prompt: str, agente: str = 'geral', timeout: float = None,
+                          espera_maxima: float = None, metodo: str = None, **kwargs):
+        """Versão asyncio de gerar(); compartilha o mesmo limite global"""
+        metodo = metodo or sys._getframe(1).f_code.co_name
+        return await asyncio.to_thread(self.gerar, prompt, agente, timeout, espera_maxima, metodo, **kwargs)
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        """Retorna contadores de chamadas, erros e latência média por agente"""
+        with self.lock:
+            por_agente = {agente: dict(stats) for agente, stats in self.estatisticas.items()}
+            em_andamento = self.em_andamento
+        for stats in por_agente.values():
+            stats['latencia_media_ms'] = stats['tempo_total_ms'] / stats['chamadas'] if stats['chamadas'] else 0
+        return {
+            'max_concorrencia': self.max_concorrencia,
+            'em_andamento': em_andamento,
+            'timeout': self.timeout,
+            'agentes': por_agente,
+            'limitador': self.limitador.estado(),
+            'disjuntor': self.disjuntor.obter_estado(),
+            'coalescencia': self.coalescedor.obter_estatisticas(),
+            'hedging': dict(self.hedging.obter_estatisticas(), habilitado=self.config.get('hedging', False)),
+            'metricas': escritor_metricas.obter_estatisticas()
+        }
+
+# Instância global do cliente
+cliente_gemini = ClienteGemini()
@@ -0,0 +1,81 @@
+"""
+Coalescência de Chamadas (single-flight) - prompts idênticos simultâneos compartilham uma chamada
+"""
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Callable
+from prazo import PrazoEsgotado, obter_prazo
+
+class ChamadaEmVoo:
+    """Chamada em andamento e seu resultado compartilhado"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+class CoalescedorChamadas:
+    """Garante uma única chamada em voo por chave dentro do processo"""
+
+    def __init__(self):
+        self.logger = logging.getLogger('agente.gemini.coalescencia')
+        self.lock = threading.Lock()
+        self.em_voo: Dict[str, ChamadaEmVoo] = {}
+        self.estatisticas = {'executadas': 0, 'coalescidas': 0, 'esperas_esgotadas': 0, 'por_agente': {}}
+
+    @staticmethod
+    def gerar_chave(*partes: Any) -> str:
+        """Hash SHA-256 do prompt e dos parâmetros da chamada"""
+        return hashlib.sha256(repr(partes).encode('utf-8')).hexdigest()
+
+    def executar(self, chave: str, funcao: Callable[[], Any], agente: str = 'geral') -> Any:
+        """Executa `funcao` ou aguarda a chamada idêntica que já está em voo
+
+        Quem aguarda respeita o próprio prazo (PrazoEsgotado dele, não o do líder). Se o
+        líder foi cortado pelo prazo dele, a chamada é refeita em vez de herdar o erro.
+        """
+        while True:
+            with self.lock:
+                chamada = self.em_voo.get(chave)
+                lider = chamada is None
+                if lider:
+                    chamada = self.em_voo[chave] = ChamadaEmVoo()
+                    self.estatisticas['executadas'] += 1
+                else:
+                    self.estatisticas['coalescidas'] += 1
+                    por_agente = self.estatisticas['por_agente']
+                    por_agente[agente] = por_agente.get(agente, 0) + 1
+            if lider:
+                break
+
+            prazo = obter_prazo()
+            if not chamada.evento.wait(timeout=prazo.restante() if prazo is not None else None):
+                with self.lock:
+                    self.estatisticas['esperas_esgotadas'] += 1
+                prazo.esgotado = True
+                raise PrazoEsgotado(f"Prazo de {prazo.segundos}s de {prazo.nome} esgotado aguardando chamada idêntica")
+            if isinstance(chamada.erro, PrazoEsgotado):
+                continue  # o prazo que acabou foi o do líder: tenta de novo
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = funcao()
+            return chamada.resultado
+        except Exception as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self.lock:
+                del self.em_voo[chave]
+            chamada.evento.set()
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.estatisticas, por_agente=dict(self.estatisticas['por_agente']))
+            stats['em_voo'] = len(self.em_voo)
+        total = stats['executadas'] + stats['coalescidas']
+        stats['taxa_economia'] = stats['coalescidas'] / total * 100 if total else 0
+        return stats
@@ -23,7 +23,25 @@ class ConfiguracaoAgente:
                 'model': 'gemini-1.5-flash',
                 'temperature': 0.7,
                 'max_tokens': 2048,
-                'timeout': 30
+                'timeout': 30,
+                'max_concorrencia': 8,  # chamadas simultâneas por processo
+                'requisicoes_por_minuto': 15,
+                'tokens_por_minuto': 1000000,
+                'espera_maxima_limite': 10,  # segundos aguardando o limitador (0 = falha imediata)
+                'backoff_base': 2,
+                'backoff_max': 120,
+                'disjuntor_falhas': 5,  # falhas seguidas até abrir o disjuntor
+                'disjuntor_espera': 60,  # segundos em modo offline antes de sondar a API
+                'coalescer_chamadas': True,  # prompts idênticos simultâneos compartilham a chamada
+                'hedging': False,  # duplica chamadas lentas (opt-in)
+                'hedging_agentes': ['suporte'],  # agentes elegíveis quando o hedging está ativo
+                'hedging_percentil': 95,  # duplica quando a chamada passa deste percentil recente
+                'hedging_max_extra': 0.1,  # fração máxima de chamadas duplicadas (carga extra)
+                'hedging_min_amostras': 20,  # amostras de latência antes de começar a duplicar
+                'hedging_janela': 200,  # latências recentes usadas no cálculo dos percentis
+                'registrar_metricas': True,  # grava cada chamada na tabela metricas (em lote)
+                'custo_entrada_por_milhao': 0.075,  # USD por 1M tokens de prompt (estimativa de custo)
+                'custo_saida_por_milhao': 0.30  # USD por 1M tokens de resposta
             },
             'openai': {
                 'api_key': os.getenv('OPENAI_API_KEY', ''),
@@ -160,11 +178,13 @@ class ConfiguracaoAgente:
         
         # ===== CONFIGURAÇÕES DE PERFORMANCE =====
         self.PERFORMANCE_CONFIG = {
-            'max_workers': 4,
+            'max_workers': 5,  # threads dos pools dos agentes (campanha: 4 plataformas + newsletter de uma vez)
             'cache_size': 1000,
             'cache_ttl': 3600,  # 1 hora
             'memory_limit': 512 * 1024 * 1024,  # 512MB
             'timeout_requests': 30,
+            'prazo_requisicao': 25,  # orçamento por requisição da API (abaixo do timeout do worker)
+            'gemini_requisicoes_hora': 900,  # cota horária do Gemini POR PROCESSO (divida a da conta pelos workers)
             'habilitar_cache': True
         }
         
@@ -175,27 +195,55 @@ class ConfiguracaoAgente:
                 'formato_data': '%Y-%m-%d',
                 'analise_automatica': True,
                 'gerar_graficos': True,
-                'tendencias_dias': 30
+                'tendencias_dias': 30,
+                'top_n_agregados': 5,  # itens por ranking (produtos, clientes, países) enviados ao prompt
+                'leitura_em_blocos': True,  # .xlsx lido com openpyxl read_only, sem carregar a planilha inteira
+                'tamanho_bloco_leitura': 50000,  # linhas por bloco (limita o pico de memória)
+                'cache_planilhas': True,  # planilhas já lidas ficam em cache/planilhas (Arrow IPC, requer pyarrow)
+                'cache_planilhas_max_mb': 1024,  # acima disso, descarta as menos usadas recentemente
+                'tipos_compactos': True,  # category para textos repetitivos, números reduzidos, data em datetime64
+                'limite_categoria': 0.5,  # fração máxima de valores distintos para virar category
+                # Ajustes manuais do mapeamento inferido: papel -> nome da coluna (None ignora o papel).
+                # Papéis: data, valor, quantidade, preco, pedido, produto, cliente, pais, vendedor
+                'mapeamento_colunas': {}
             },
             'suporte': {
                 'urgencia_padrao': 'MÉDIA',
                 'tempo_resposta_esperado': 30,
                 'base_conhecimento_auto': True,
                 'escalonamento_automatico': True,
-                'idiomas_suportados': ['pt', 'en', 'es']
+                'idiomas_suportados': ['pt', 'en', 'es'],
+                'cache_semantico': True,
+                'similaridade_minima': 0.85,
+                'cache_semantico_ttl': 7 * 86400,  # segundos; respostas mais antigas não são reaproveitadas
+                'modo_chamada': 'combinado',  # 'combinado' (1 chamada) ou 'separado' (2 chamadas)
+                'kb_top_k': 3,
+                'kb_orcamento_tokens': 400,
+                'espera_limite_taxa': 0,  # 0 = sem cota local, responde offline na hora
+                'espera_limite_taxa_lote': 60,  # processamento em lote aguarda a cota
+                'offline_confianca_minima': 0.5,  # confiança mínima da busca BM25 no modo offline
+                'offline_intervalo_sincronizacao': 300,  # segundos entre reindexações do histórico
+                'urgencia_local': True,  # classificador local antes de consultar o Gemini
+                'urgencia_confianca_minima': 0.8,  # abaixo disso a urgência é escalada ao Gemini
+                'urgencia_min_amostras': 50  # atendimentos rotulados necessários para treinar
             },
             'conteudo': {
                 'tamanho_max_post': 2200,
                 'tamanho_max_newsletter': 500,
                 'hashtags_max': 5,
                 'templates_personalizados': True,
-                'analise_sentimento': True
+                'analise_sentimento': True,
+                'cache_conteudo': True,  # reaproveita o texto já gerado para as mesmas entradas (tabela conteudo)
+                'cache_conteudo_ttl': 86400,  # segundos
+                'newsletter_modo': 'unica',  # 'secoes': abertura, cada tópico e fechamento em chamadas paralelas
+                'newsletter_paralelismo': 6  # threads para as seções (o modo usa len(topicos) + 2 chamadas)
             },
             'automatizado': {
                 'monitoramento_pastas': True,
                 'processamento_paralelo': True,
                 'notificacoes_erro': True,
-                'backup_automatico': True
+                'backup_automatico': True,
+                'retreino_urgencia_horas': 6  # retreino do classificador local de urgência
             }
         }
         
@@ -4,6 +4,7 @@ Sistema Avançado de Banco de Dados do Agente de IA
 import sqlite3
 import json
 import logging
+import threading
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -16,6 +17,7 @@ class DatabaseManager:
         self.config = config.DATABASE_CONFIG
         self.logger = logging.getLogger('database.manager')
         self.conexao = None
+        self.lock = threading.RLock()
         self.inicializar_banco()
     
     def inicializar_banco(self):
@@ -173,24 +175,56 @@ class DatabaseManager:
             )
         ''')
         
+        # Tabela de lotes de suporte (progresso compartilhado entre os workers)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lotes_suporte (
+                id TEXT PRIMARY KEY,
+                entrada TEXT,
+                saida TEXT,
+                status TEXT,
+                progresso TEXT,
+                atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Índice para as consultas de métricas por nome e período
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_metricas_nome_timestamp ON metricas (nome, timestamp)')
+        
+        # Colunas do cache de conteúdo (bancos criados antes delas são migrados aqui)
+        self.adicionar_coluna(cursor, 'conteudo', 'tom', 'TEXT')
+        self.adicionar_coluna(cursor, 'conteudo', 'chave', 'TEXT')
+        # Origem do atendimento e versão da base usada (cache semântico invalida respostas antigas)
+        self.adicionar_coluna(cursor, 'suporte', 'modo', 'TEXT')
+        self.adicionar_coluna(cursor, 'suporte', 'versao_base', 'TEXT')
+        self.adicionar_coluna(cursor, 'suporte', 'origem_urgencia', 'TEXT')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_conteudo_chave_timestamp ON conteudo (chave, timestamp)')
+        
         self.conexao.commit()
         self.logger.info("Tabelas criadas com sucesso")
     
+    @staticmethod
+    def adicionar_coluna(cursor, tabela: str, coluna: str, tipo: str):
+        """Adiciona a coluna se a tabela ainda não a tiver"""
+        cursor.execute(f'PRAGMA table_info({tabela})')
+        if coluna not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}')
+    
     def inserir_processamento(self, tipo: str, arquivo: str = None, usuario: str = None) -> int:
         """Insere novo processamento e retorna ID"""
         try:
-            cursor = self.conexao.cursor()
-            cursor.execute('''
-                INSERT INTO processamentos (tipo, arquivo, status, usuario)
-                VALUES (?, ?, 'iniciado', ?)
-            ''', (tipo, arquivo, usuario))
-            
-            processamento_id = cursor.lastrowid
-            self.conexao.commit()
-            
-            self.logger.info(f"Processamento {processamento_id} inserido")
-            return processamento_id
-            
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    INSERT INTO processamentos (tipo, arquivo, status, usuario)
+                    VALUES (?, ?, 'iniciado', ?)
+                ''', (tipo, arquivo, usuario))
+                
+                processamento_id = cursor.lastrowid
+                self.conexao.commit()
+                
+                self.logger.info(f"Processamento {processamento_id} inserido")
+                return processamento_id
+                
         except Exception as e:
             self.logger.error(f"Erro ao inserir processamento: {str(e)}")
             return None
@@ -198,75 +232,198 @@ class DatabaseManager:
     def atualizar_processamento(self, processamento_id: int, status: str, resultado: str = None, erro: str = None):
         """Atualiza status do processamento"""
         try:
-            cursor = self.conexao.cursor()
-            cursor.execute('''
-                UPDATE processamentos 
-                SET status = ?, resultado = ?, erro = ?, fim = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (status, resultado, erro, processamento_id))
-            
-            self.conexao.commit()
-            self.logger.info(f"Processamento {processamento_id} atualizado para {status}")
-            
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    UPDATE processamentos 
+                    SET status = ?, resultado = ?, erro = ?, fim = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (status, resultado, erro, processamento_id))
+                
+                self.conexao.commit()
+                self.logger.info(f"Processamento {processamento_id} atualizado para {status}")
+                
         except Exception as e:
             self.logger.error(f"Erro ao atualizar processamento: {str(e)}")
     
     def inserir_venda(self, data: str, produto: str, valor: float, vendedor: str, regiao: str, processamento_id: int):
         """Insere dados de venda"""
         try:
-            cursor = self.conexao.cursor()
-            cursor.execute('''
-                INSERT INTO vendas (data, produto, valor, vendedor, regiao, processamento_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (data, produto, valor, vendedor, regiao, processamento_id))
-            
-            self.conexao.commit()
-            
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    INSERT INTO vendas (data, produto, valor, vendedor, regiao, processamento_id)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (data, produto, valor, vendedor, regiao, processamento_id))
+                
+                self.conexao.commit()
+                
         except Exception as e:
             self.logger.error(f"Erro ao inserir venda: {str(e)}")
     
-    def inserir_suporte(self, pergunta: str, resposta: str, urgencia: str, usuario: str, processamento_id: int):
-        """Insere atendimento de suporte"""
+    def inserir_suporte(self, pergunta: str, resposta: str, urgencia: str, usuario: str, processamento_id: int,
+                        modo: str = None, versao_base: str = None, origem_urgencia: str = None):
+        """Insere atendimento de suporte
+
+        modo: online, offline, cache_semantico...; versao_base: base usada;
+        origem_urgencia: quem classificou (gemini, local, palavras, cache, cache_semantico)
+        """
         try:
-            cursor = self.conexao.cursor()
-            cursor.execute('''
-                INSERT INTO suporte (pergunta, resposta, urgencia, usuario, processamento_id)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (pergunta, resposta, urgencia, usuario, processamento_id))
-            
-            self.conexao.commit()
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    INSERT INTO suporte (pergunta, resposta, urgencia, usuario, processamento_id, modo, versao_base, origem_urgencia)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (pergunta, resposta, urgencia, usuario, processamento_id, modo, versao_base, origem_urgencia))
+                
+                self.conexao.commit()
+                return cursor.lastrowid
             
         except Exception as e:
             self.logger.error(f"Erro ao inserir suporte: {str(e)}")
+            return None
     
-    def inserir_conteudo(self, tipo: str, tema: str, plataforma: str, conteudo: str, publico_alvo: str, usuario: str, processamento_id: int):
-        """Insere conteúdo gerado"""
+    def obter_suporte_desde(self, ultimo_id: int = 0, limite: int = 5000) -> List[Dict[str, Any]]:
+        """Obtém atendimentos de suporte com id maior que ultimo_id"""
         try:
-            cursor = self.conexao.cursor()
-            cursor.execute('''
-                INSERT INTO conteudo (tipo, tema, plataforma, conteudo, publico_alvo, usuario, processamento_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (tipo, tema, plataforma, conteudo, publico_alvo, usuario, processamento_id))
-            
-            self.conexao.commit()
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    SELECT id, pergunta, resposta, urgencia, modo, versao_base, origem_urgencia, timestamp
+                    FROM suporte
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (ultimo_id, limite))
+                
+                return [dict(row) for row in cursor.fetchall()]
             
+        except Exception as e:
+            self.logger.error(f"Erro ao obter suporte: {str(e)}")
+            return []
+    
+    def inserir_conteudo(self, tipo: str, tema: str, plataforma: str, conteudo: str, publico_alvo: str, usuario: str,
+                         processamento_id: int, tom: str = None, chave: str = None):
+        """Insere conteúdo gerado (chave identifica as entradas para o cache de conteúdo)"""
+        try:
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    INSERT INTO conteudo (tipo, tema, plataforma, conteudo, publico_alvo, usuario, processamento_id, tom, chave)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (tipo, tema, plataforma, conteudo, publico_alvo, usuario, processamento_id, tom, chave))
+                
+                self.conexao.commit()
+                
         except Exception as e:
             self.logger.error(f"Erro ao inserir conteúdo: {str(e)}")
     
+    def obter_conteudo_por_chave(self, chave: str, ttl_segundos: int) -> Optional[Dict[str, Any]]:
+        """Conteúdo mais recente gerado para a chave dentro do TTL (None se não houver)"""
+        try:
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    SELECT id, conteudo, timestamp
+                    FROM conteudo
+                    WHERE chave = ? AND timestamp >= datetime('now', ?)
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT 1
+                ''', (chave, f'-{int(ttl_segundos)} seconds'))
+                
+                row = cursor.fetchone()
+                return dict(row) if row else None
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao obter conteúdo do cache: {str(e)}")
+            return None
+    
+    def salvar_lote(self, lote_id: str, progresso: Dict[str, Any]):
+        """Grava (ou atualiza) o progresso de um lote de suporte"""
+        try:
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO lotes_suporte (id, entrada, saida, status, progresso, atualizado_em)
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (lote_id, progresso.get('entrada'), progresso.get('saida'), progresso.get('status'),
+                      json.dumps(progresso, ensure_ascii=False, default=str)))
+                
+                self.conexao.commit()
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao salvar lote: {str(e)}")
+    
+    def obter_lote(self, lote_id: str) -> Optional[Dict[str, Any]]:
+        """Progresso do lote com a idade da última atualização em segundos (None se não existir)"""
+        try:
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    SELECT progresso, (julianday('now') - julianday(atualizado_em)) * 86400 AS idade_s
+                    FROM lotes_suporte
+                    WHERE id = ?
+                ''', (lote_id,))
+                
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                return dict(json.loads(row['progresso']), atualizado_ha_s=round(row['idade_s'], 1))
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao obter lote: {str(e)}")
+            return None
+    
     def inserir_metrica(self, nome: str, valor: float, unidade: str, categoria: str, tags: List[str] = None):
         """Insere métrica do sistema"""
         try:
-            cursor = self.conexao.cursor()
-            cursor.execute('''
-                INSERT INTO metricas (nome, valor, unidade, categoria, tags)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (nome, valor, unidade, categoria, json.dumps(tags or [])))
-            
-            self.conexao.commit()
-            
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    INSERT INTO metricas (nome, valor, unidade, categoria, tags)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (nome, valor, unidade, categoria, json.dumps(tags or [])))
+                
+                self.conexao.commit()
+                
         except Exception as e:
             self.logger.error(f"Erro ao inserir métrica: {str(e)}")
     
+    def inserir_metricas_lote(self, metricas: List[Tuple]) -> bool:
+        """Insere várias métricas (nome, valor, unidade, categoria, tags_json) com um único commit"""
+        try:
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.executemany('''
+                    INSERT INTO metricas (nome, valor, unidade, categoria, tags)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', metricas)
+                
+                self.conexao.commit()
+                return True
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao inserir lote de métricas: {str(e)}")
+            return False
+    
+    def obter_metricas(self, nome: str, periodo_horas: float = 24) -> List[Dict[str, Any]]:
+        """Obtém as métricas de um nome registradas nas últimas periodo_horas"""
+        try:
+            with self.lock:
+                cursor = self.conexao.cursor()
+                cursor.execute('''
+                    SELECT valor, unidade, timestamp, categoria, tags
+                    FROM metricas
+                    WHERE nome = ? AND timestamp >= datetime('now', ?)
+                    ORDER BY id
+                ''', (nome, f'-{float(periodo_horas)} hours'))
+                
+                return [dict(row) for row in cursor.fetchall()]
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao obter métricas: {str(e)}")
+            return []
+    
     def obter_estatisticas(self, periodo_dias: int = 30) -> Dict[str, Any]:
         """Obtém estatísticas do sistema"""
         try:
@@ -0,0 +1,115 @@
+"""
+Disjuntor (circuit breaker) das chamadas ao Gemini
+"""
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
+
+class CircuitoAberto(Exception):
+    """Chamada bloqueada: o disjuntor está aberto (API considerada indisponível)"""
+
+class Disjuntor:
+    """Estados fechado -> aberto -> meio_aberto -> fechado, compartilhado por todos os agentes"""
+
+    FECHADO = 'fechado'
+    ABERTO = 'aberto'
+    MEIO_ABERTO = 'meio_aberto'
+
+    def __init__(self, limite_falhas: int = 5, tempo_espera: float = 60,
+                 ao_mudar_estado: Callable[[str, str], None] = None):
+        self.limite_falhas = limite_falhas
+        self.tempo_espera = tempo_espera
+        self.ao_mudar_estado = ao_mudar_estado
+        self.logger = logging.getLogger('agente.gemini.disjuntor')
+        self.lock = threading.Lock()
+        self.estado = self.FECHADO
+        self.falhas_consecutivas = 0
+        self.aberto_em = 0.0
+        self.sonda_em_andamento = False
+        self.estatisticas = {'bloqueadas': 0, 'aberturas': 0}
+
+    def mudar_estado(self, novo_estado: str) -> Tuple[str, str]:
+        """Troca o estado (chamar com o lock adquirido) e devolve a transição para notificar()"""
+        anterior, self.estado = self.estado, novo_estado
+        return anterior, novo_estado
+
+    def notificar(self, transicao: Optional[Tuple[str, str]]):
+        """Loga e repassa a transição ao callback (chamar fora do lock)"""
+        if transicao is None:
+            return
+        anterior, novo_estado = transicao
+        self.logger.warning(f"Disjuntor do Gemini: {anterior} -> {novo_estado}")
+        if self.ao_mudar_estado:
+            try:
+                self.ao_mudar_estado(anterior, novo_estado)
+            except Exception as e:
+                self.logger.error(f"Erro ao registrar transição do disjuntor: {str(e)}")
+
+    def permitir(self) -> bool:
+        """Libera a chamada ou levanta CircuitoAberto; True se esta chamada é a sondagem"""
+        transicao = None
+        try:
+            with self.lock:
+                if self.estado == self.ABERTO and time.monotonic() - self.aberto_em >= self.tempo_espera:
+                    transicao = self.mudar_estado(self.MEIO_ABERTO)
+
+                if self.estado == self.FECHADO:
+                    return False
+                if self.estado == self.MEIO_ABERTO and not self.sonda_em_andamento:
+                    self.sonda_em_andamento = True  # apenas uma chamada de sondagem por vez
+                    return True
+
+                self.estatisticas['bloqueadas'] += 1
+                restante = max(self.tempo_espera - (time.monotonic() - self.aberto_em), 0)
+                raise CircuitoAberto(f"Gemini indisponível (disjuntor {self.estado}, nova tentativa em {restante:.0f}s)")
+        finally:
+            self.notificar(transicao)
+
+    def registrar_sucesso(self, sonda: bool = False):
+        transicao = None
+        with self.lock:
+            self.falhas_consecutivas = 0
+            if sonda:
+                self.sonda_em_andamento = False
+            if self.estado != self.FECHADO:
+                transicao = self.mudar_estado(self.FECHADO)
+        self.notificar(transicao)
+
+    def registrar_falha(self, sonda: bool = False):
+        transicao = None
+        with self.lock:
+            self.falhas_consecutivas += 1
+            if sonda:
+                self.sonda_em_andamento = False
+            if self.estado == self.MEIO_ABERTO or (
+                self.estado == self.FECHADO and self.falhas_consecutivas >= self.limite_falhas
+            ):
+                self.aberto_em = time.monotonic()
+                self.estatisticas['aberturas'] += 1
+                transicao = self.mudar_estado(self.ABERTO)
+        self.notificar(transicao)
+
+    def cancelar_sonda(self):
+        """Libera a sondagem sem veredito (não chegou à API, prazo ou cota); só a chamada sonda deve chamar"""
+        with self.lock:
+            self.sonda_em_andamento = False
+
+    def esta_aberto(self) -> bool:
+        """Indica se chamadas seriam bloqueadas agora (sem consumir a sondagem)"""
+        with self.lock:
+            if self.estado == self.FECHADO:
+                return False
+            if self.estado == self.ABERTO:
+                return time.monotonic() - self.aberto_em < self.tempo_espera
+            return self.sonda_em_andamento
+
+    def obter_estado(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'estado': self.estado,
+                'falhas_consecutivas': self.falhas_consecutivas,
+                'limite_falhas': self.limite_falhas,
+                'tempo_espera': self.tempo_espera,
+                'estatisticas': dict(self.estatisticas)
+            }
@@ -0,0 +1,72 @@
+"""
+Hedging de Chamadas ao Gemini - duplica chamadas lentas para cortar a latência de cauda
+"""
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+import numpy as np
+
+class PoliticaHedging:
+    """Decide quando duplicar uma chamada e acompanha os percentis de latência
+
+    A janela 'sem_hedging' guarda a duração da chamada original (o que o usuário
+    teria esperado sem hedging); 'com_hedging' guarda a latência efetivamente entregue.
+    """
+
+    def __init__(self, percentil: float = 95, max_extra: float = 0.1,
+                 min_amostras: int = 20, janela: int = 200):
+        self.percentil = percentil
+        self.max_extra = max_extra
+        self.min_amostras = min_amostras
+        self.logger = logging.getLogger('agente.gemini.hedging')
+        self.lock = threading.Lock()
+        self.latencias = {'sem_hedging': deque(maxlen=janela), 'com_hedging': deque(maxlen=janela)}
+        self.estatisticas = {'chamadas': 0, 'duplicadas': 0, 'vitorias_duplicada': 0, 'recusadas_por_limite': 0}
+
+    def limiar(self) -> Optional[float]:
+        """Segundos após os quais a chamada é duplicada (None enquanto há poucas amostras)"""
+        with self.lock:
+            amostras = list(self.latencias['sem_hedging'])
+        if len(amostras) < self.min_amostras:
+            return None
+        return float(np.percentile(amostras, self.percentil))
+
+    def registrar_chamada(self):
+        with self.lock:
+            self.estatisticas['chamadas'] += 1
+
+    def pode_duplicar(self) -> bool:
+        """Respeita o teto de carga extra (duplicadas / chamadas)"""
+        with self.lock:
+            chamadas = max(self.estatisticas['chamadas'], 1)
+            if (self.estatisticas['duplicadas'] + 1) / chamadas > self.max_extra:
+                self.estatisticas['recusadas_por_limite'] += 1
+                return False
+            self.estatisticas['duplicadas'] += 1
+            return True
+
+    def registrar_latencia(self, janela: str, segundos: float):
+        with self.lock:
+            self.latencias[janela].append(segundos)
+
+    def registrar_vitoria_duplicada(self):
+        with self.lock:
+            self.estatisticas['vitorias_duplicada'] += 1
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        """Percentis p50/p95/p99 (ms) com e sem hedging e contadores de carga extra"""
+        with self.lock:
+            stats = dict(self.estatisticas)
+            janelas = {nome: list(valores) for nome, valores in self.latencias.items()}
+        stats['carga_extra'] = stats['duplicadas'] / stats['chamadas'] * 100 if stats['chamadas'] else 0
+        limiar = self.limiar()
+        stats['limiar_ms'] = round(limiar * 1000, 1) if limiar is not None else None
+        for nome, valores in janelas.items():
+            if valores:
+                p50, p95, p99 = np.percentile(valores, [50, 95, 99]) * 1000
+                stats[nome] = {'amostras': len(valores), 'p50_ms': round(p50, 1),
+                               'p95_ms': round(p95, 1), 'p99_ms': round(p99, 1)}
+            else:
+                stats[nome] = {'amostras': 0}
+        return stats
@@ -0,0 +1,134 @@
+"""
+Índice BM25 - recuperação de textos relevantes com NumPy sobre uma matriz termo-documento esparsa
+"""
+import re
+import numpy as np
+from typing import Dict, List, Tuple
+from utils import normalizar_texto
+
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'um', 'uma', 'de', 'da', 'do', 'das', 'dos', 'e', 'em', 'no', 'na',
+    'nos', 'nas', 'para', 'por', 'com', 'que', 'se', 'ao', 'meu', 'minha', 'eu', 'voce',
+    'voces', 'como', 'qual', 'quais', 'ou', 'mais', 'sobre', 'tem', 'ser'
+}
+
+# Sufixos removidos pelo radical leve (texto já sem acentos), dos mais longos para os mais curtos
+SUFIXOS = (
+    'amentos', 'imentos', 'amento', 'imento', 'mente', 'acoes', 'icoes', 'ucoes', 'acao', 'icao', 'ucao',
+    'coes', 'cao', 'oes', 'ao', 'ados', 'idos', 'ado', 'ido', 'ando', 'endo', 'indo',
+    'aram', 'eram', 'iram', 'ar', 'er', 'ir', 'as', 'es', 'os', 'a', 'e', 'o', 's'
+)
+
+def radical(termo: str, tamanho_max: int = 5) -> str:
+    """Radical leve para português: tira um sufixo de flexão/derivação e corta em tamanho_max letras
+
+    "produtos"/"produto", "pagar"/"pagamento" e "devolver"/"devolução" caem no mesmo radical.
+    """
+    for sufixo in SUFIXOS:
+        if termo.endswith(sufixo) and len(termo) - len(sufixo) >= 3:
+            termo = termo[:-len(sufixo)]
+            break
+    return termo[:tamanho_max]
+
+def tokenizar(texto: str, radicais: bool = True) -> List[str]:
+    """Quebra texto normalizado em termos, sem stopwords (reduzidos ao radical, por padrão)"""
+    termos = [t for t in re.findall(r'\w+', normalizar_texto(texto)) if t not in STOPWORDS and len(t) > 1]
+    return [radical(t) for t in termos] if radicais else termos
+
+class IndiceBM25:
+    """Índice BM25 sobre uma matriz termo-documento esparsa (formato CSC em arrays NumPy)
+
+    As postings de todos os termos ficam concatenadas em `documentos`/`pesos`, com
+    `inicio[termo]:inicio[termo + 1]` delimitando as do termo. Os pesos BM25 são
+    pré-calculados na indexação; a consulta só soma fatias com np.bincount.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.total_documentos = 0
+        self.vocabulario: Dict[str, int] = {}
+        self.inicio = np.zeros(1, dtype=np.int64)
+        self.documentos = np.zeros(0, dtype=np.int32)
+        self.pesos = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+
+    def indexar(self, documentos: List[str]):
+        """Constrói o índice a partir da lista de documentos"""
+        termos_docs = [tokenizar(doc) for doc in documentos]
+        total = len(termos_docs)
+        tamanhos = np.fromiter((len(termos) for termos in termos_docs), dtype=np.int64, count=total)
+        media = float(tamanhos.mean()) if total else 0.0
+        media = media or 1.0
+
+        vocabulario: Dict[str, int] = {}
+        termo_ids = np.fromiter(
+            (vocabulario.setdefault(termo, len(vocabulario)) for termos in termos_docs for termo in termos),
+            dtype=np.int64, count=int(tamanhos.sum())
+        )
+        doc_ids = np.repeat(np.arange(total, dtype=np.int64), tamanhos)
+
+        # Pares (termo, documento) únicos já ordenados por termo: tf = repetições do par
+        pares, tfs = np.unique(termo_ids * max(total, 1) + doc_ids, return_counts=True)
+        termos = pares // max(total, 1)
+        docs = pares % max(total, 1)
+        df = np.bincount(termos, minlength=len(vocabulario))
+
+        idf = np.log(1 + (total - df + 0.5) / (df + 0.5))
+        tfs = tfs.astype(np.float32)
+        normalizacao = self.k1 * (1 - self.b + self.b * tamanhos[docs] / media)
+
+        self.total_documentos = total
+        self.vocabulario = vocabulario
+        self.inicio = np.concatenate(([0], np.cumsum(df)))
+        self.documentos = docs.astype(np.int32)
+        self.pesos = (idf[termos] * tfs * (self.k1 + 1) / (tfs + normalizacao)).astype(np.float32)
+        self.idf = idf.astype(np.float32)
+
+    def fatia(self, termo_id: int) -> slice:
+        return slice(self.inicio[termo_id], self.inicio[termo_id + 1])
+
+    def pontuar(self, consulta: str) -> np.ndarray:
+        """Retorna o score BM25 da consulta para todos os documentos"""
+        termo_ids = [self.vocabulario[t] for t in set(tokenizar(consulta)) if t in self.vocabulario]
+        if not termo_ids:
+            return np.zeros(self.total_documentos, dtype=np.float32)
+        fatias = [self.fatia(termo_id) for termo_id in termo_ids]
+        docs = np.concatenate([self.documentos[f] for f in fatias])
+        pesos = np.concatenate([self.pesos[f] for f in fatias])
+        return np.bincount(docs, weights=pesos, minlength=self.total_documentos).astype(np.float32)
+
+    def confianca(self, consulta: str, doc_ids: List[int]) -> np.ndarray:
+        """Fração do IDF dos termos da consulta presente em cada documento (0 a 1)
+
+        Termos fora do vocabulário contam com o IDF máximo, então perguntas sobre
+        assuntos que o índice não cobre recebem confiança baixa.
+        """
+        termos = set(tokenizar(consulta))
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        cobertura = np.zeros(len(doc_ids), dtype=np.float32)
+        if not termos or not self.total_documentos:
+            return cobertura
+        idf_ausente = np.log(1 + (self.total_documentos + 0.5) / 0.5)
+        total = 0.0
+        for termo in termos:
+            termo_id = self.vocabulario.get(termo)
+            if termo_id is None:
+                total += idf_ausente
+                continue
+            total += self.idf[termo_id]
+            postings = self.documentos[self.fatia(termo_id)]  # ordenadas por documento
+            posicoes = np.searchsorted(postings, doc_ids)
+            presentes = postings[np.minimum(posicoes, len(postings) - 1)] == doc_ids
+            cobertura += presentes * self.idf[termo_id]
+        return cobertura / total
+
+    def buscar(self, consulta: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """Retorna [(indice_documento, score)] dos top_k documentos com score > 0"""
+        if not self.total_documentos:
+            return []
+        scores = self.pontuar(consulta)
+        top_k = min(top_k, self.total_documentos)
+        candidatos = np.argpartition(-scores, top_k - 1)[:top_k]
+        candidatos = candidatos[np.argsort(-scores[candidatos])]
+        return [(int(i), float(scores[i])) for i in candidatos if scores[i] > 0]
@@ -0,0 +1,166 @@
+"""
+Índice Semântico Local - busca de perguntas similares já respondidas
+"""
+import re
+import time
+import zlib
+import logging
+import threading
+import numpy as np
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from utils import normalizar_texto
+
+# Palavras de uma letra que não identificam nada (artigos/conjunção, sem acento)
+PALAVRAS_UMA_LETRA = {'a', 'e', 'o'}
+
+# Siglas de estados que não se confundem com palavras comuns quando digitadas em minúsculas
+SIGLAS_UF = {'sp', 'rj', 'mg', 'rs', 'sc', 'pr', 'ba', 'ce', 'df', 'ms', 'mt', 'pb', 'rn', 'rr', 'ap'}
+
+# Modos de atendimento cuja resposta não veio completa do Gemini e não deve ser reaproveitada
+MODOS_NAO_INDEXADOS = {'offline', 'cache_semantico', 'interrompido'}
+
+def marcadores(texto: str) -> Tuple[str, ...]:
+    """Tokens que identificam o objeto da pergunta: números, letras/siglas soltas, nomes próprios e UFs
+
+    Perguntas com n-gramas quase iguais mas marcadores diferentes ("produto A" x "produto B",
+    pedido 12345 x 12346, SP x RJ) pedem respostas diferentes.
+    """
+    encontrados = []
+    for posicao, token in enumerate(re.findall(r'\w+', texto)):
+        normal = normalizar_texto(token)
+        if any(caractere.isdigit() for caractere in token):
+            encontrados.append(normal)
+        elif len(token) == 1:
+            if normal not in PALAVRAS_UMA_LETRA or (token.isupper() and posicao > 0):
+                encontrados.append(normal)
+        elif token[0].isupper() and (posicao > 0 or token.isupper()):
+            encontrados.append(normal)
+        elif normal in SIGLAS_UF:
+            encontrados.append(normal)
+    return tuple(sorted(encontrados))
+
+def converter_timestamp(valor: Any) -> float:
+    """CURRENT_TIMESTAMP do SQLite (UTC, 'AAAA-MM-DD HH:MM:SS') em segundos desde a época"""
+    try:
+        return datetime.strptime(str(valor)[:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+class IndiceSemantico:
+    """Índice de perguntas respondidas com vetores de n-gramas de caracteres (hashing)"""
+
+    def __init__(self, dimensao: int = 1024, tamanho_ngram: int = 3, capacidade_inicial: int = 256):
+        self.dimensao = dimensao
+        self.tamanho_ngram = tamanho_ngram
+        self.logger = logging.getLogger('agente.suporte.indice')
+        self.lock = threading.Lock()
+
+        self.matriz = np.zeros((capacidade_inicial, dimensao), dtype=np.float32)
+        self.itens: List[Dict[str, Any]] = []
+        self.ultimo_id = 0
+        self.estatisticas = {'consultas': 0, 'hits': 0, 'rejeitados_marcadores': 0, 'tempo_total_ms': 0.0}
+
+    def vetorizar(self, texto: str) -> np.ndarray:
+        """Converte texto em vetor L2-normalizado de n-gramas de caracteres"""
+        texto = f" {normalizar_texto(texto)} "
+        n = self.tamanho_ngram
+        indices = [
+            zlib.crc32(texto[i:i + n].encode('utf-8')) % self.dimensao
+            for i in range(max(len(texto) - n + 1, 1))
+        ]
+        vetor = np.bincount(indices, minlength=self.dimensao).astype(np.float32)
+        norma = np.linalg.norm(vetor)
+        return vetor / norma if norma else vetor
+
+    def adicionar(self, pergunta: str, resposta: str, urgencia: str = None, id_origem: int = None,
+                  versao_base: str = None, criado_em: float = None):
+        """Adiciona pergunta respondida ao índice (versao_base: base de conhecimento usada na resposta)"""
+        vetor = self.vetorizar(pergunta)
+        with self.lock:
+            total = len(self.itens)
+            if total == self.matriz.shape[0]:
+                nova = np.zeros((total * 2, self.dimensao), dtype=np.float32)
+                nova[:total] = self.matriz
+                self.matriz = nova
+            self.matriz[total] = vetor
+            self.itens.append({
+                'id': id_origem,
+                'pergunta': pergunta,
+                'resposta': resposta,
+                'urgencia': urgencia,
+                'versao_base': versao_base,
+                'criado_em': criado_em if criado_em is not None else time.time(),
+                'marcadores': marcadores(pergunta)
+            })
+
+    def buscar(self, pergunta: str, similaridade_minima: float, versao_base: str = None,
+               ttl_segundos: float = None) -> Optional[Dict[str, Any]]:
+        """Retorna a pergunta mais similar acima do limiar (similaridade de cosseno)
+
+        Só vale uma resposta dada com a mesma versao_base, dentro do ttl_segundos e cujos
+        marcadores (números, siglas, nomes) são exatamente os da pergunta.
+        """
+        inicio = time.perf_counter()
+        vetor = self.vetorizar(pergunta)
+        marcas = marcadores(pergunta)
+        limite_criacao = time.time() - ttl_segundos if ttl_segundos else None
+        resultado = None
+        rejeitados = 0
+
+        with self.lock:
+            total = len(self.itens)
+            if total:
+                scores = self.matriz[:total] @ vetor
+                candidatos = np.flatnonzero(scores >= similaridade_minima)
+                for posicao in candidatos[np.argsort(-scores[candidatos], kind='stable')]:
+                    item = self.itens[posicao]
+                    if versao_base is not None and item['versao_base'] != versao_base:
+                        continue
+                    if limite_criacao is not None and item['criado_em'] < limite_criacao:
+                        continue
+                    if item['marcadores'] != marcas:
+                        rejeitados += 1
+                        continue
+                    resultado = dict(item, similaridade=float(scores[posicao]))
+                    break
+
+            self.estatisticas['consultas'] += 1
+            self.estatisticas['hits'] += resultado is not None
+            self.estatisticas['rejeitados_marcadores'] += rejeitados
+            self.estatisticas['tempo_total_ms'] += (time.perf_counter() - inicio) * 1000
+
+        return resultado
+
+    def sincronizar(self, db_manager, filtro: Callable[[str, str], bool] = None) -> int:
+        """Adiciona ao índice as linhas novas da tabela suporte (incremental por id)"""
+        novos = 0
+        try:
+            linhas = db_manager.obter_suporte_desde(self.ultimo_id)
+            for linha in linhas:
+                self.ultimo_id = max(self.ultimo_id, linha['id'])
+                if not linha['resposta']:
+                    continue
+                if linha.get('modo') in MODOS_NAO_INDEXADOS:
+                    continue
+                if filtro and not filtro(linha['pergunta'], linha['resposta']):
+                    continue
+                self.adicionar(linha['pergunta'], linha['resposta'], linha['urgencia'], linha['id'],
+                               linha.get('versao_base'), converter_timestamp(linha.get('timestamp')))
+                novos += 1
+
+            if novos:
+                self.logger.info(f"Índice semântico sincronizado: +{novos} perguntas")
+        except Exception as e:
+            self.logger.error(f"Erro ao sincronizar índice semântico: {str(e)}")
+        return novos
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        """Retorna latência média de busca e taxa de acerto"""
+        with self.lock:
+            stats = dict(self.estatisticas)
+            stats['itens'] = len(self.itens)
+        consultas = stats['consultas']
+        stats['latencia_media_ms'] = stats['tempo_total_ms'] / consultas if consultas else 0
+        stats['taxa_acerto'] = stats['hits'] / consultas * 100 if consultas else 0
+        return stats
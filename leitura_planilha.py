@@ -0,0 +1,49 @@
+"""
+Leitura de Planilhas em Blocos - openpyxl read_only/iter_rows, sem carregar o arquivo inteiro na memória
+"""
+import logging
+import pandas as pd
+from pathlib import Path
+from typing import Iterator
+from openpyxl import load_workbook
+
+# Formatos lidos linha a linha pelo openpyxl; os demais caem no pd.read_excel
+EXTENSOES_STREAMING = {'.xlsx', '.xlsm'}
+
+logger = logging.getLogger('agente.vendas.leitura')
+
+def iterar_blocos(arquivo: str, tamanho_bloco: int = 50000) -> Iterator[pd.DataFrame]:
+    """DataFrames de até tamanho_bloco linhas da primeira aba, com o cabeçalho da primeira linha
+
+    Linhas totalmente vazias são ignoradas. Só o bloco atual fica na memória.
+    """
+    if Path(arquivo).suffix.lower() not in EXTENSOES_STREAMING:
+        yield pd.read_excel(arquivo)
+        return
+
+    pasta = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = pasta.worksheets[0].iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            yield pd.DataFrame()
+            return
+        colunas = [nome if nome is not None else f"Unnamed: {posicao}" for posicao, nome in enumerate(cabecalho)]
+        largura = len(colunas)
+
+        bloco, inicio, entregues = [], 0, 0
+        for linha in linhas:
+            if len(linha) != largura:
+                linha = (tuple(linha) + (None,) * largura)[:largura]
+            if all(valor is None for valor in linha):
+                continue
+            bloco.append(linha)
+            if len(bloco) >= tamanho_bloco:
+                yield pd.DataFrame.from_records(bloco, columns=colunas, index=pd.RangeIndex(inicio, inicio + len(bloco)))
+                inicio += len(bloco)
+                entregues += 1
+                bloco = []
+        if bloco or not entregues:
+            yield pd.DataFrame.from_records(bloco, columns=colunas, index=pd.RangeIndex(inicio, inicio + len(bloco)))
+    finally:
+        pasta.close()
@@ -0,0 +1,145 @@
+"""
+Limitador de Taxa do Gemini - token bucket (requisições e tokens) com backoff adaptativo
+"""
+import time
+import random
+import logging
+import threading
+from typing import Dict, Any
+from config import config
+
+class LimiteTaxaExcedido(Exception):
+    """Chamada recusada pelo limitador (cota local esgotada ou backoff ativo)"""
+
+class BaldeTokens:
+    """Token bucket: capacidade máxima e reposição contínua por segundo"""
+
+    def __init__(self, capacidade: float, por_segundo: float):
+        self.capacidade = capacidade
+        self.por_segundo = por_segundo
+        self.disponivel = capacidade
+        self.atualizado = time.monotonic()
+
+    def repor(self):
+        """Repõe os tokens acumulados desde a última atualização"""
+        agora = time.monotonic()
+        self.disponivel = min(self.capacidade, self.disponivel + (agora - self.atualizado) * self.por_segundo)
+        self.atualizado = agora
+
+    def tempo_para(self, quantidade: float) -> float:
+        """Segundos até haver `quantidade` disponível (0 se já há)"""
+        self.repor()
+        quantidade = min(quantidade, self.capacidade)
+        if self.disponivel >= quantidade:
+            return 0.0
+        return (quantidade - self.disponivel) / self.por_segundo
+
+    def consumir(self, quantidade: float):
+        """Consome do balde (pode ficar negativo ao ajustar o consumo real)"""
+        self.repor()
+        self.disponivel -= quantidade
+
+    def estado(self) -> Dict[str, float]:
+        self.repor()
+        return {
+            'capacidade': self.capacidade,
+            'disponivel': round(self.disponivel, 1),
+            'reposicao_por_segundo': round(self.por_segundo, 4)
+        }
+
+class LimitadorTaxa:
+    """Limitador compartilhado por todas as chamadas ao Gemini no processo
+
+    Os baldes são por processo: com N workers (gunicorn), a cota da conta é consumida
+    por todos, então os limites configurados devem ser a fração de cada worker.
+    """
+
+    def __init__(self):
+        gemini = config.API_CONFIG['gemini']
+        requisicoes_minuto = gemini.get('requisicoes_por_minuto', 15)
+        tokens_minuto = gemini.get('tokens_por_minuto', 1000000)
+        requisicoes_hora = config.PERFORMANCE_CONFIG.get('gemini_requisicoes_hora', requisicoes_minuto * 60)
+
+        self.logger = logging.getLogger('agente.gemini.limitador')
+        self.lock = threading.Lock()
+        self.baldes = {
+            'requisicoes_minuto': BaldeTokens(requisicoes_minuto, requisicoes_minuto / 60),
+            'tokens_minuto': BaldeTokens(tokens_minuto, tokens_minuto / 60),
+            'requisicoes_hora': BaldeTokens(requisicoes_hora, requisicoes_hora / 3600)
+        }
+        self.espera_padrao = gemini.get('espera_maxima_limite', 10)
+        self.backoff_base = gemini.get('backoff_base', 2)
+        self.backoff_max = gemini.get('backoff_max', 120)
+        self.nivel_backoff = 0
+        self.backoff_ate = 0.0
+        self.estatisticas = {'liberadas': 0, 'recusadas': 0, 'esperas': 0, 'erros_quota': 0, 'tempo_espera_s': 0.0}
+
+    def adquirir(self, tokens: int, espera_maxima: float = None):
+        """Reserva 1 requisição e `tokens` tokens, esperando até `espera_maxima` segundos
+
+        espera_maxima=0 falha imediatamente (útil para cair no modo offline).
+        """
+        espera_maxima = self.espera_padrao if espera_maxima is None else espera_maxima
+        inicio = time.monotonic()
+
+        while True:
+            with self.lock:
+                espera = max(
+                    self.backoff_ate - time.monotonic(),
+                    self.baldes['requisicoes_minuto'].tempo_para(1),
+                    self.baldes['requisicoes_hora'].tempo_para(1),
+                    self.baldes['tokens_minuto'].tempo_para(tokens),
+                    0.0
+                )
+                if espera == 0:
+                    self.baldes['requisicoes_minuto'].consumir(1)
+                    self.baldes['requisicoes_hora'].consumir(1)
+                    self.baldes['tokens_minuto'].consumir(tokens)
+                    self.estatisticas['liberadas'] += 1
+                    self.estatisticas['tempo_espera_s'] += time.monotonic() - inicio
+                    return
+
+                decorrido = time.monotonic() - inicio
+                if decorrido + espera > espera_maxima:
+                    self.estatisticas['recusadas'] += 1
+                    raise LimiteTaxaExcedido(f"Limite de taxa do Gemini: nova vaga em {espera:.1f}s")
+                self.estatisticas['esperas'] += 1
+
+            time.sleep(espera)
+
+    def ajustar_tokens(self, estimados: int, reais: int):
+        """Corrige o balde de tokens com o consumo real informado pela API"""
+        with self.lock:
+            self.baldes['tokens_minuto'].consumir(reais - estimados)
+
+    def registrar_sucesso(self):
+        """Reduz gradualmente o nível de backoff após respostas bem-sucedidas"""
+        with self.lock:
+            self.nivel_backoff = max(self.nivel_backoff - 1, 0)
+
+    def registrar_erro_quota(self):
+        """Aplica backoff exponencial com jitter após erro 429/cota"""
+        with self.lock:
+            self.nivel_backoff += 1
+            atraso = min(self.backoff_base * 2 ** (self.nivel_backoff - 1), self.backoff_max)
+            atraso *= random.uniform(0.5, 1.5)
+            self.backoff_ate = max(self.backoff_ate, time.monotonic() + atraso)
+            self.estatisticas['erros_quota'] += 1
+        self.logger.warning(f"Erro de cota do Gemini: backoff de {atraso:.1f}s (nível {self.nivel_backoff})")
+
+    @staticmethod
+    def eh_erro_quota(erro: Exception) -> bool:
+        """Identifica erros 429 / ResourceExhausted / cota excedida"""
+        mensagem = str(erro).lower()
+        return type(erro).__name__ == 'ResourceExhausted' or '429' in mensagem or 'quota' in mensagem
+
+    def estado(self) -> Dict[str, Any]:
+        """Estado atual dos baldes e do backoff"""
+        with self.lock:
+            return {
+                'baldes': {nome: balde.estado() for nome, balde in self.baldes.items()},
+                'nivel_backoff': self.nivel_backoff,
+                'backoff_restante_s': round(max(self.backoff_ate - time.monotonic(), 0), 1),
+                'espera_maxima_padrao': self.espera_padrao,
+                'estatisticas': dict(self.estatisticas)
+            }
@@ -5,10 +5,7 @@ import sys
 import logging
 from pathlib import Path
 from utils import setup_logging
-from agente_vendas import AgenteAnaliseVendas
-from agente_suporte import AgenteSuporte
-from agente_conteudo import AgenteConteudo
-from agente_automatizado import AgenteAutomatizado
+from registro_agentes import registro_agentes
 
 def menu_principal():
     """Menu principal do sistema"""
@@ -37,7 +34,7 @@ def executar_agente_vendas():
         print("❌ Caminho do arquivo é obrigatório!")
         return
     
-    agente = AgenteAnaliseVendas()
+    agente = registro_agentes.obter('vendas')
     resultado = agente.executar_analise(arquivo)
     
     if resultado.get("sucesso"):
@@ -59,7 +56,7 @@ def executar_agente_suporte():
         print("❌ Pergunta é obrigatória!")
         return
     
-    agente = AgenteSuporte()
+    agente = registro_agentes.obter('suporte')
     resultado = agente.processar_solicitacao(pergunta)
     
     if resultado.get("sucesso"):
@@ -80,7 +77,7 @@ def executar_agente_conteudo():
     
     opcao = input("Escolha uma opção (1-3): ").strip()
     
-    agente = AgenteConteudo()
+    agente = registro_agentes.obter('conteudo')
     
     if opcao == "1":
         tema = input("Tema do post: ").strip()
@@ -135,7 +132,7 @@ def executar_agente_automatizado():
     
     opcao = input("Escolha uma opção (1-3): ").strip()
     
-    agente = AgenteAutomatizado()
+    agente = registro_agentes.obter('automatizado')
     
     if opcao == "1":
         print("🔄 Executando rotina manual...")
@@ -0,0 +1,201 @@
+"""
+Mapeamento de Colunas de Vendas - infere o papel de cada coluna por nome e amostra de valores,
+com cache pela impressão digital do cabeçalho e ajustes manuais em AGENTE_CONFIG['vendas']
+"""
+import re
+import time
+import logging
+import warnings
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+from config import config
+from utils import normalizar_texto
+from cache_respostas import CacheRespostas
+
+# Nomes completos aceitos para cada papel (comparados sem acentos, maiúsculas, espaços ou pontuação)
+COLUNAS_CANDIDATAS = {
+    'data': ['data', 'data_venda', 'datavenda', 'date', 'invoicedate', 'orderdate', 'dataemissao', 'emissao'],
+    'valor': ['valor_venda', 'valorvenda', 'valor', 'valortotal', 'total', 'receita', 'faturamento',
+              'amount', 'revenue', 'sales', 'totalprice'],
+    'quantidade': ['quantidade', 'qtd', 'qtde', 'quantity', 'qty', 'unidades'],
+    'preco': ['preco', 'precounitario', 'valorunitario', 'unitprice', 'price'],
+    'pedido': ['pedido', 'numeropedido', 'notafiscal', 'nf', 'invoiceno', 'invoice', 'orderid', 'order'],
+    'produto': ['produto', 'descricao', 'description', 'product', 'item', 'sku', 'stockcode', 'codigoproduto'],
+    'cliente': ['cliente', 'idcliente', 'codigocliente', 'customerid', 'customer', 'client'],
+    'pais': ['pais', 'country', 'regiao', 'region', 'estado', 'uf', 'cidade'],
+    'vendedor': ['vendedor', 'representante', 'seller', 'salesperson']
+}
+
+# Palavras soltas que indicam o papel em cabeçalhos compostos ("Data da fatura", "ID Cliente")
+PALAVRAS_PAPEL = {
+    'data': {'data', 'date', 'dia', 'dt', 'emissao', 'emitida', 'datetime'},
+    'valor': {'valor', 'total', 'receita', 'faturamento', 'montante', 'amount', 'revenue', 'sales', 'venda', 'vendas'},
+    'quantidade': {'quantidade', 'qtd', 'qtde', 'quantity', 'qty', 'unidades', 'volume'},
+    'preco': {'preco', 'unitario', 'unit', 'price'},
+    'pedido': {'pedido', 'fatura', 'nota', 'nf', 'invoice', 'order', 'documento', 'numero'},
+    'produto': {'produto', 'descricao', 'description', 'product', 'item', 'sku', 'mercadoria', 'stockcode'},
+    'cliente': {'cliente', 'customer', 'client', 'comprador', 'consumidor'},
+    'pais': {'pais', 'country', 'regiao', 'region', 'estado', 'uf', 'cidade', 'city', 'territorio'},
+    'vendedor': {'vendedor', 'representante', 'seller', 'salesperson', 'consultor'}
+}
+
+# Tipo de valor esperado em cada papel
+TIPO_PAPEL = {'data': 'data', 'valor': 'numero', 'quantidade': 'inteiro', 'preco': 'numero',
+              'pedido': 'identificador', 'cliente': 'identificador', 'produto': 'texto', 'pais': 'texto',
+              'vendedor': 'texto'}
+
+def chave_coluna(nome: Any) -> str:
+    return re.sub(r'[^a-z0-9]', '', normalizar_texto(str(nome)))
+
+def palavras_coluna(nome: Any) -> List[str]:
+    return re.findall(r'[a-z]+', normalizar_texto(str(nome)))
+
+def converter_datas(serie: pd.Series) -> pd.Series:
+    """Valores da coluna como datetime64 (NaT se não for data)
+
+    Datas já convertidas passam direto e texto ISO (aaaa-mm-dd) é lido como ISO: dayfirst
+    nele trocaria dia e mês. Só o que sobrar é lido no formato brasileiro (dd/mm/aaaa).
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    datas = pd.to_datetime(serie, errors='coerce', format='ISO8601')
+    restantes = (datas.isna() & serie.notna()).to_numpy()
+    if restantes.any():
+        brasileiras = pd.to_datetime(serie[restantes], errors='coerce', format='%d/%m/%Y')
+        if brasileiras.isna().any():
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')  # formato inferido elemento a elemento
+                brasileiras = brasileiras.fillna(
+                    pd.to_datetime(serie[restantes], errors='coerce', format='mixed', dayfirst=True))
+        datas = datas.copy()
+        datas[restantes] = brasileiras.to_numpy()
+    return datas
+
+def perfil_valores(serie: pd.Series, tamanho_amostra: int = 200) -> Dict[str, float]:
+    """Frações de datas, números e inteiros e a cardinalidade numa amostra de valores não nulos"""
+    amostra = serie.dropna()
+    if len(amostra) > tamanho_amostra:
+        amostra = amostra.sample(tamanho_amostra, random_state=0)
+    if amostra.empty:
+        return {'data': 0.0, 'numero': 0.0, 'inteiro': 0.0, 'distintos': 0.0}
+
+    if pd.api.types.is_datetime64_any_dtype(amostra):
+        return {'data': 1.0, 'numero': 0.0, 'inteiro': 0.0, 'distintos': amostra.nunique() / len(amostra)}
+
+    numeros = pd.to_numeric(amostra, errors='coerce')
+    fracao_numero = float(numeros.notna().mean())
+    fracao_data = 0.0
+    if fracao_numero < 0.5:
+        datas = converter_datas(amostra)
+        fracao_data = float(datas.notna().mean())
+    validos = numeros.dropna().to_numpy(dtype=np.float64)
+    return {
+        'data': fracao_data,
+        'numero': fracao_numero,
+        'inteiro': float(np.mean(validos == np.round(validos))) * fracao_numero if validos.size else 0.0,
+        'distintos': amostra.nunique() / len(amostra)
+    }
+
+def compatibilidade(papel: str, perfil: Dict[str, float]) -> float:
+    """0 a 1: quanto os valores amostrados combinam com o papel (0 descarta a coluna)"""
+    tipo = TIPO_PAPEL[papel]
+    if tipo == 'data':
+        return perfil['data']
+    if perfil['data'] >= 0.8:
+        return 0.0
+    if tipo == 'numero':
+        return perfil['numero'] if perfil['numero'] >= 0.9 else 0.0
+    if tipo == 'inteiro':
+        return perfil['inteiro'] if perfil['inteiro'] >= 0.9 else 0.0
+    if tipo == 'identificador':
+        return 0.5 + perfil['distintos'] / 2
+    # Texto: não numérico
+    return 1.0 - perfil['numero'] if perfil['numero'] < 0.5 else 0.0
+
+def inferir_mapeamento(df: pd.DataFrame) -> Dict[str, Any]:
+    """Papel -> coluna: nome exato (3), palavra do cabeçalho (2), pesado pela amostra de valores
+
+    Cada coluna recebe no máximo um papel, dos pares de maior pontuação para os de menor.
+    Sem nenhum nome reconhecido, a única coluna de datas da planilha vira o papel 'data'.
+    """
+    exatos = {papel: {chave_coluna(candidata) for candidata in candidatas}
+              for papel, candidatas in COLUNAS_CANDIDATAS.items()}
+    pares = []
+    perfis = {}
+    for posicao, coluna in enumerate(df.columns):
+        chave, palavras = chave_coluna(coluna), set(palavras_coluna(coluna))
+        for papel in COLUNAS_CANDIDATAS:
+            pontos = 3.0 if chave in exatos[papel] else 2.0 if palavras & PALAVRAS_PAPEL[papel] else 0.0
+            if not pontos:
+                continue
+            if coluna not in perfis:
+                perfis[coluna] = perfil_valores(df[coluna])
+            pontos *= compatibilidade(papel, perfis[coluna])
+            if pontos > 0:
+                # Desempate estável: papel na ordem de COLUNAS_CANDIDATAS, coluna na ordem da planilha
+                pares.append((-pontos, list(COLUNAS_CANDIDATAS).index(papel), posicao, papel, coluna))
+
+    mapeamento, usadas = {}, set()
+    for _, _, _, papel, coluna in sorted(pares):
+        if papel not in mapeamento and coluna not in usadas:
+            mapeamento[papel] = coluna
+            usadas.add(coluna)
+
+    if 'data' not in mapeamento:
+        colunas_data = [coluna for coluna in df.columns if coluna not in usadas
+                        and pd.api.types.is_datetime64_any_dtype(df[coluna])]
+        if len(colunas_data) == 1:
+            mapeamento['data'] = colunas_data[0]
+    return mapeamento
+
+class MapeadorColunas:
+    """Mapeamento por impressão digital do cabeçalho: layouts já vistos não passam pela inferência"""
+
+    def __init__(self):
+        self.logger = logging.getLogger('agente.vendas.colunas')
+        self.cache = CacheRespostas('colunas_vendas', ttl=30 * 24 * 3600)
+        self.lock = threading.Lock()
+        self.estatisticas = {'inferencias': 0, 'hits': 0, 'tempo_inferencia_ms': 0.0}
+
+    @staticmethod
+    def impressao_digital(colunas: List[Any]) -> str:
+        return CacheRespostas.gerar_chave('colunas', [str(coluna) for coluna in colunas])
+
+    def mapear(self, df: pd.DataFrame, ajustes: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Papel -> coluna para este DataFrame; ajustes (padrão: AGENTE_CONFIG['vendas']['mapeamento_colunas']) prevalecem"""
+        chave = self.impressao_digital(df.columns.tolist())
+        mapeamento = self.cache.obter(chave)
+        if mapeamento is None or any(coluna not in df.columns for coluna in mapeamento.values()):
+            inicio = time.perf_counter()
+            mapeamento = inferir_mapeamento(df)
+            tempo_ms = (time.perf_counter() - inicio) * 1000
+            self.cache.armazenar(chave, mapeamento)
+            with self.lock:
+                self.estatisticas['inferencias'] += 1
+                self.estatisticas['tempo_inferencia_ms'] += tempo_ms
+            self.logger.info(f"Colunas mapeadas em {tempo_ms:.1f} ms: {mapeamento}")
+        else:
+            with self.lock:
+                self.estatisticas['hits'] += 1
+
+        if ajustes is None:
+            ajustes = config.AGENTE_CONFIG['vendas'].get('mapeamento_colunas', {})
+        mapeamento = dict(mapeamento)
+        for papel, coluna in (ajustes or {}).items():
+            if coluna is None:
+                mapeamento.pop(papel, None)
+            elif coluna in df.columns:
+                mapeamento = {outro: atual for outro, atual in mapeamento.items() if atual != coluna}
+                mapeamento[papel] = coluna
+            else:
+                self.logger.warning(f"Coluna '{coluna}' do ajuste '{papel}' não existe na planilha")
+        return mapeamento
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.estatisticas)
+
+# Instância global do mapeador
+mapeador_colunas = MapeadorColunas()
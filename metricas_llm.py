@@ -0,0 +1,120 @@
+"""
+Métricas das Chamadas ao LLM - gravação em lote na tabela metricas e agregação por agente
+"""
+import json
+import queue
+import atexit
+import logging
+import threading
+import numpy as np
+from typing import Dict, Any, List, Tuple
+
+class EscritorMetricas:
+    """Enfileira métricas e grava em lotes (um commit por lote) numa thread de fundo"""
+
+    def __init__(self, tamanho_lote: int = 100, intervalo: float = 5.0, tamanho_fila: int = 10000):
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.logger = logging.getLogger('agente.metricas')
+        self.fila: queue.Queue = queue.Queue(maxsize=tamanho_fila)
+        self.lock = threading.Lock()
+        self.lock_gravacao = threading.Lock()
+        self.sinal = threading.Event()
+        self.thread = None
+        self.estatisticas = {'enfileiradas': 0, 'gravadas': 0, 'descartadas': 0, 'lotes': 0}
+        atexit.register(self.descarregar)
+
+    def iniciar(self):
+        """Inicia a thread de gravação na primeira métrica"""
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.executar, name='escritor-metricas', daemon=True)
+                self.thread.start()
+
+    def registrar(self, nome: str, valor: float, unidade: str, categoria: str, tags: Any = None):
+        """Enfileira uma métrica (nunca bloqueia a chamada; descarta se a fila estiver cheia)"""
+        self.iniciar()
+        try:
+            self.fila.put_nowait((nome, valor, unidade, categoria, json.dumps(tags or [], ensure_ascii=False)))
+            with self.lock:
+                self.estatisticas['enfileiradas'] += 1
+        except queue.Full:
+            with self.lock:
+                self.estatisticas['descartadas'] += 1
+        if self.fila.qsize() >= self.tamanho_lote:
+            self.sinal.set()
+
+    def executar(self):
+        """Grava a cada intervalo ou assim que a fila completa um lote"""
+        while True:
+            self.sinal.wait(self.intervalo)
+            self.sinal.clear()
+            self.descarregar()
+
+    def descarregar(self):
+        """Grava imediatamente o que estiver na fila (chamado também ao encerrar o processo e antes de consultas)"""
+        with self.lock_gravacao:
+            while True:
+                lote = []
+                while len(lote) < self.tamanho_lote:
+                    try:
+                        lote.append(self.fila.get_nowait())
+                    except queue.Empty:
+                        break
+                if not lote:
+                    return
+                self.gravar(lote)
+
+    def gravar(self, lote: List[Tuple]):
+        from database import db_manager
+        if db_manager.inserir_metricas_lote(lote):
+            with self.lock:
+                self.estatisticas['gravadas'] += len(lote)
+                self.estatisticas['lotes'] += 1
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.estatisticas, pendentes=self.fila.qsize())
+
+def agregar_chamadas(linhas: List[Dict[str, Any]], horas: float) -> Dict[str, Any]:
+    """Agrupa as linhas 'llm_chamada' por agente e por rota: latência p50/p95, tokens/hora e custo"""
+    grupos: Dict[str, Dict[str, Dict[str, list]]] = {'agentes': {}, 'rotas': {}}
+    for linha in linhas:
+        try:
+            tags = json.loads(linha['tags'] or '{}')
+        except ValueError:
+            continue
+        if not isinstance(tags, dict):
+            continue
+        for dimensao, chave in (('agentes', tags.get('agente', 'geral')), ('rotas', tags.get('rota') or 'sem_rota')):
+            grupo = grupos[dimensao].setdefault(chave, {'latencias': [], 'tokens_prompt': [], 'tokens_resposta': [],
+                                                        'custos': [], 'erros': 0, 'metodos': {}})
+            grupo['latencias'].append(float(linha['valor'] or 0))
+            grupo['tokens_prompt'].append(tags.get('tokens_prompt', 0))
+            grupo['tokens_resposta'].append(tags.get('tokens_resposta', 0))
+            grupo['custos'].append(tags.get('custo_usd', 0.0))
+            grupo['erros'] += tags.get('resultado') != 'sucesso'
+            metodo = tags.get('metodo', 'gerar')
+            grupo['metodos'][metodo] = grupo['metodos'].get(metodo, 0) + 1
+
+    resultado = {'periodo_horas': horas}
+    for dimensao, itens in grupos.items():
+        resultado[dimensao] = {}
+        for chave, grupo in itens.items():
+            latencias = np.array(grupo['latencias'])
+            tokens = int(np.sum(grupo['tokens_prompt']) + np.sum(grupo['tokens_resposta']))
+            resultado[dimensao][chave] = {
+                'chamadas': len(latencias),
+                'erros': grupo['erros'],
+                'latencia_p50_ms': round(float(np.percentile(latencias, 50)), 1),
+                'latencia_p95_ms': round(float(np.percentile(latencias, 95)), 1),
+                'tokens_prompt': int(np.sum(grupo['tokens_prompt'])),
+                'tokens_resposta': int(np.sum(grupo['tokens_resposta'])),
+                'tokens_por_hora': round(tokens / horas, 1) if horas else tokens,
+                'custo_usd': round(float(np.sum(grupo['custos'])), 6),
+                'metodos': grupo['metodos']
+            }
+    return resultado
+
+# Instância global do escritor
+escritor_metricas = EscritorMetricas()
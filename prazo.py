@@ -0,0 +1,95 @@
+"""
+Prazo por Requisição - orçamento de tempo criado na rota e propagado até o Gemini, banco e relatórios
+"""
+import time
+import logging
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import Executor, Future
+from typing import Dict, Any, Optional, Callable
+
+_prazo_atual: contextvars.ContextVar = contextvars.ContextVar('prazo_atual', default=None)
+
+class PrazoEsgotado(TimeoutError):
+    """O orçamento de tempo da requisição acabou antes da etapa"""
+
+class Prazo:
+    """Orçamento de tempo de uma requisição, com o tempo gasto por etapa
+
+    Uso: `with Prazo(25, 'api/suporte'):` - tudo o que roda dentro do bloco
+    (na mesma thread ou via submeter_com_prazo) enxerga o mesmo prazo.
+    """
+
+    def __init__(self, segundos: float, nome: str = 'requisicao'):
+        self.segundos = segundos
+        self.nome = nome
+        self.inicio = time.monotonic()
+        self.limite = self.inicio + segundos
+        self.etapas: Dict[str, float] = {}
+        self.esgotado = False
+        self.logger = logging.getLogger('agente.prazo')
+        self.token = None
+
+    def restante(self) -> float:
+        return max(self.limite - time.monotonic(), 0.0)
+
+    def verificar(self, etapa: str):
+        """Levanta PrazoEsgotado se não sobrou tempo para `etapa`"""
+        if self.restante() <= 0:
+            self.esgotado = True
+            raise PrazoEsgotado(f"Prazo de {self.segundos}s de {self.nome} esgotado antes de '{etapa}'")
+
+    def registrar_etapa(self, etapa: str, segundos: float):
+        self.etapas[etapa] = self.etapas.get(etapa, 0.0) + segundos * 1000
+
+    def resumo(self) -> Dict[str, Any]:
+        return {
+            'orcamento_ms': round(self.segundos * 1000, 1),
+            'decorrido_ms': round((time.monotonic() - self.inicio) * 1000, 1),
+            'restante_ms': round(self.restante() * 1000, 1),
+            'etapas_ms': {etapa: round(ms, 1) for etapa, ms in self.etapas.items()},
+            'esgotado': self.esgotado
+        }
+
+    def __enter__(self):
+        self.token = _prazo_atual.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _prazo_atual.reset(self.token)
+        resumo = self.resumo()
+        etapas = ', '.join(f"{etapa}={ms}ms" for etapa, ms in resumo['etapas_ms'].items()) or 'sem etapas'
+        mensagem = f"Prazo {self.nome}: {resumo['decorrido_ms']}/{resumo['orcamento_ms']}ms ({etapas})"
+        if self.esgotado:
+            self.logger.warning(mensagem + " - prazo esgotado, resposta degradada")
+        else:
+            self.logger.info(mensagem)
+        return False
+
+def obter_prazo() -> Optional[Prazo]:
+    """Prazo da requisição em andamento (None fora de uma rota com prazo)"""
+    return _prazo_atual.get()
+
+def limitar_tempo(segundos: float, etapa: str) -> float:
+    """Reduz um timeout ao tempo restante do prazo (levanta PrazoEsgotado se acabou)"""
+    prazo = obter_prazo()
+    if prazo is None:
+        return segundos
+    prazo.verificar(etapa)
+    return min(segundos, prazo.restante())
+
+@contextmanager
+def medir_etapa(etapa: str):
+    """Soma o tempo do bloco à etapa no prazo atual (sem efeito fora de um prazo)"""
+    prazo = obter_prazo()
+    inicio = time.perf_counter()
+    try:
+        yield prazo
+    finally:
+        if prazo is not None:
+            prazo.registrar_etapa(etapa, time.perf_counter() - inicio)
+
+def submeter_com_prazo(executor: Executor, funcao: Callable, *args, **kwargs) -> Future:
+    """executor.submit que leva o prazo atual para a thread de trabalho"""
+    contexto = contextvars.copy_context()
+    return executor.submit(contexto.run, funcao, *args, **kwargs)
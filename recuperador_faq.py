@@ -0,0 +1,130 @@
+"""
+Recuperador de Respostas Offline - BM25 sobre FAQ, produtos e atendimentos já respondidos
+"""
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+from indice_bm25 import IndiceBM25
+from indice_semantico import MODOS_NAO_INDEXADOS
+from utils import normalizar_texto
+
+# Trecho das respostas genéricas ("retornaremos em breve") que não devem ser reaproveitadas
+MARCADOR_RESPOSTA_GENERICA = 'está analisando sua solicitação'
+
+class RecuperadorFAQ:
+    """Encontra a melhor resposta conhecida para uma pergunta, sem chamadas de rede"""
+
+    def __init__(self, base_conhecimento: Dict[str, Any], confianca_minima: float = 0.5,
+                 intervalo_sincronizacao: float = 300):
+        self.logger = logging.getLogger('agente.suporte.offline.recuperador')
+        self.confianca_minima = confianca_minima
+        self.intervalo_sincronizacao = intervalo_sincronizacao
+        self.lock = threading.Lock()
+        self.entradas_base = self.entradas_da_base(base_conhecimento)
+        self.historico: Dict[str, Dict[str, Any]] = {}  # pergunta normalizada -> entrada mais recente
+        self.ultimo_id = 0
+        self.sincronizado_em = 0.0
+        self.sincronizando = False
+        self.estatisticas = {'consultas': 0, 'respondidas': 0, 'tempo_consultas_ms': 0.0, 'tempo_indexacao_ms': 0.0}
+        # Índice e entradas são trocados juntos para que buscas concorrentes vejam um estado consistente
+        self.estado = self.construir_indice(self.entradas_base)
+
+    @staticmethod
+    def entradas_da_base(base: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Converte FAQ ("Título - conteúdo") e produtos em entradas com texto e resposta"""
+        entradas = []
+        for origem, chave in (('faq', 'faq'), ('produto', 'produtos')):
+            for item in base.get(chave, []):
+                titulo, _, conteudo = item.partition(' - ')
+                resposta = f"{titulo} {conteudo}" if titulo.endswith('?') else f"{titulo}: {conteudo}"
+                entradas.append({'texto': item, 'resposta': resposta if conteudo else item, 'origem': origem})
+        return entradas
+
+    def construir_indice(self, entradas: List[Dict[str, str]]):
+        inicio = time.perf_counter()
+        indice = IndiceBM25()
+        indice.indexar([entrada['texto'] for entrada in entradas])
+        tempo_ms = (time.perf_counter() - inicio) * 1000
+        self.estatisticas['tempo_indexacao_ms'] = round(tempo_ms, 1)
+        self.logger.info(f"Índice offline construído: {len(entradas)} entradas em {tempo_ms:.1f} ms")
+        return indice, entradas
+
+    def sincronizar(self, db_manager) -> int:
+        """Incorpora os atendimentos novos da tabela suporte e reconstrói o índice"""
+        novos = 0
+        try:
+            while True:
+                linhas = db_manager.obter_suporte_desde(self.ultimo_id)
+                if not linhas:
+                    break
+                for linha in linhas:
+                    self.ultimo_id = max(self.ultimo_id, linha['id'])
+                    resposta = linha['resposta'] or ''
+                    if not resposta or MARCADOR_RESPOSTA_GENERICA in resposta:
+                        continue
+                    if linha.get('modo') in MODOS_NAO_INDEXADOS:
+                        continue
+                    self.historico[normalizar_texto(linha['pergunta'])] = {
+                        'texto': linha['pergunta'], 'resposta': resposta, 'origem': 'historico'
+                    }
+                    novos += 1
+
+            if novos:
+                self.estado = self.construir_indice(self.entradas_base + list(self.historico.values()))
+        except Exception as e:
+            self.logger.error(f"Erro ao sincronizar recuperador offline: {str(e)}")
+        finally:
+            self.sincronizado_em = time.monotonic()
+        return novos
+
+    def sincronizar_em_segundo_plano(self, db_manager):
+        """Dispara a sincronização numa thread se o intervalo venceu (nunca bloqueia a consulta)"""
+        with self.lock:
+            if self.sincronizando or time.monotonic() - self.sincronizado_em < self.intervalo_sincronizacao:
+                return
+            self.sincronizando = True
+
+        def executar():
+            try:
+                self.sincronizar(db_manager)
+            finally:
+                self.sincronizando = False
+
+        threading.Thread(target=executar, name='recuperador-offline', daemon=True).start()
+
+    def buscar(self, pergunta: str) -> Optional[Dict[str, Any]]:
+        """Melhor resposta com sua confiança (None se abaixo de confianca_minima)"""
+        inicio = time.perf_counter()
+        indice, entradas = self.estado
+        encontrado = None
+
+        melhores = indice.buscar(pergunta, top_k=1)
+        if melhores:
+            posicao, score = melhores[0]
+            confianca = float(indice.confianca(pergunta, [posicao])[0])
+            if confianca >= self.confianca_minima:
+                entrada = entradas[posicao]
+                encontrado = {
+                    'resposta': entrada['resposta'],
+                    'confianca': round(confianca, 3),
+                    'score': round(score, 3),
+                    'origem': entrada['origem'],
+                    'referencia': entrada['texto']
+                }
+
+        with self.lock:
+            self.estatisticas['consultas'] += 1
+            self.estatisticas['respondidas'] += encontrado is not None
+            self.estatisticas['tempo_consultas_ms'] += (time.perf_counter() - inicio) * 1000
+        return encontrado
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.estatisticas)
+        consultas = stats['consultas']
+        stats['entradas'] = len(self.estado[1])
+        stats['entradas_historico'] = len(self.historico)
+        stats['taxa_resposta'] = stats['respondidas'] / consultas * 100 if consultas else 0
+        stats['latencia_media_ms'] = stats['tempo_consultas_ms'] / consultas if consultas else 0
+        return stats
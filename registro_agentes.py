@@ -0,0 +1,58 @@
+"""
+Registro de Agentes - construção preguiçosa e compartilhada dos agentes
+"""
+import time
+import logging
+import importlib
+import threading
+from typing import Dict, Any
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+class RegistroAgentes:
+    """Constrói cada agente no primeiro uso e compartilha a instância no processo"""
+
+    AGENTES = {
+        'suporte': ('agente_suporte', 'AgenteSuporte'),
+        'conteudo': ('agente_conteudo', 'AgenteConteudo'),
+        'vendas': ('agente_vendas', 'AgenteAnaliseVendas'),
+        'automatizado': ('agente_automatizado', 'AgenteAutomatizado')
+    }
+
+    def __init__(self):
+        self.logger = logging.getLogger('agente.registro')
+        self.lock = threading.RLock()
+        self.instancias = {}
+        self.tempos_construcao = {}
+
+    def obter(self, nome: str):
+        """Retorna a instância do agente, construindo-a na primeira chamada"""
+        instancia = self.instancias.get(nome)
+        if instancia is not None:
+            return instancia
+
+        if nome not in self.AGENTES:
+            raise KeyError(f"Agente desconhecido: {nome}")
+
+        with self.lock:
+            if nome not in self.instancias:
+                modulo, classe = self.AGENTES[nome]
+                inicio = time.perf_counter()
+                self.instancias[nome] = getattr(importlib.import_module(modulo), classe)()
+                self.tempos_construcao[nome] = round((time.perf_counter() - inicio) * 1000, 1)
+                self.logger.info(f"Agente '{nome}' construído em {self.tempos_construcao[nome]} ms")
+            return self.instancias[nome]
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        """Retorna agentes carregados, tempo de construção e memória do processo"""
+        return {
+            'carregados': sorted(self.instancias),
+            'tempos_construcao_ms': dict(self.tempos_construcao),
+            'memoria_max_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None
+        }
+
+# Instância global do registro
+registro_agentes = RegistroAgentes()
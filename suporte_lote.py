@@ -0,0 +1,203 @@
+"""
+Processamento em Lote de Perguntas de Suporte (CSV/JSONL -> JSONL)
+
+Uso: python suporte_lote.py perguntas.csv [saida.jsonl]
+"""
+import csv
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Iterator, Set
+from config import config
+from utils import setup_logging
+from database import db_manager
+
+# Lote sem atualização há mais que isso é considerado interrompido (pode ser retomado)
+LOTE_INATIVO_S = 600
+
+class ProcessadorLote:
+    """Responde perguntas em lote com concorrência limitada e saída JSONL retomável
+
+    O id do lote e o arquivo de saída padrão derivam do SHA-256 da entrada, então reenviar
+    o mesmo arquivo retoma o lote. O progresso fica na tabela lotes_suporte (visível a
+    todos os workers).
+    """
+
+    def __init__(self, max_workers: int = None):
+        from registro_agentes import registro_agentes
+
+        self.logger = logging.getLogger('agente.suporte.lote')
+        self.max_workers = max_workers or config.PERFORMANCE_CONFIG['max_workers']
+        self.agente = registro_agentes.obter('suporte')
+        # No lote vale a pena aguardar o limitador em vez de cair no offline
+        self.espera_limite = config.AGENTE_CONFIG['suporte'].get('espera_limite_taxa_lote', 60)
+
+    @staticmethod
+    def identificar(entrada: str) -> str:
+        """Id do lote: SHA-256 do conteúdo da entrada (16 primeiros caracteres)"""
+        resumo = hashlib.sha256()
+        with open(entrada, 'rb') as f:
+            for parte in iter(lambda: f.read(1024 * 1024), b''):
+                resumo.update(parte)
+        return resumo.hexdigest()[:16]
+
+    @staticmethod
+    def saida_padrao(lote_id: str) -> Path:
+        return config.DIRETORIOS['reports'] / f"suporte_lote_{lote_id}.jsonl"
+
+    @staticmethod
+    def ler_perguntas(arquivo: str) -> Iterator[Dict[str, Any]]:
+        """Lê perguntas de CSV (coluna 'pergunta' ou a primeira) ou JSONL, linha a linha"""
+        caminho = Path(arquivo)
+        with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+            if caminho.suffix.lower() == '.csv':
+                leitor = csv.DictReader(f)
+                if not leitor.fieldnames:
+                    return
+                coluna = 'pergunta' if 'pergunta' in leitor.fieldnames else leitor.fieldnames[0]
+                for numero, linha in enumerate(leitor, start=1):
+                    yield {'linha': numero, 'pergunta': (linha.get(coluna) or '').strip()}
+            else:
+                for numero, bruta in enumerate(f, start=1):
+                    if bruta.strip():
+                        dados = json.loads(bruta)
+                        pergunta = dados.get('pergunta', '') if isinstance(dados, dict) else str(dados)
+                        yield {'linha': numero, 'pergunta': pergunta.strip()}
+
+    @staticmethod
+    def linhas_processadas(saida: Path) -> Set[int]:
+        """Checkpoint: linhas de entrada já respondidas pelo Gemini no arquivo de saída
+
+        Registros com erro ou respondidos pelo fallback offline não contam: a retomada os
+        refaz e acrescenta um novo registro (vale o último de cada linha).
+        """
+        processadas = set()
+        if saida.exists():
+            with open(saida, 'r', encoding='utf-8') as f:
+                for bruta in f:
+                    try:
+                        registro = json.loads(bruta)
+                        if 'erro' in registro or registro.get('fallback'):
+                            continue
+                        processadas.add(registro['linha'])
+                    except (ValueError, KeyError):
+                        continue  # linha incompleta de uma execução interrompida
+        return processadas
+
+    def responder(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Processa uma pergunta sem gerar o relatório individual em reports/"""
+        resultado = self.agente.processar_solicitacao(item['pergunta'], salvar_relatorio=False,
+                                                      espera_maxima=self.espera_limite)
+        if resultado.get('sucesso'):
+            dados = resultado['dados']
+            return {
+                'linha': item['linha'],
+                'pergunta': item['pergunta'],
+                'resposta': dados['resposta'],
+                'urgencia': dados['urgencia'],
+                'modo': dados.get('modo'),
+                'fallback': bool(dados.get('degradado')),
+                'latencia_ms': dados.get('latencia_ms')
+            }
+        return {'linha': item['linha'], 'pergunta': item['pergunta'], 'erro': resultado.get('erro')}
+
+    def processar_arquivo(self, entrada: str, saida: str = None, progresso: Dict[str, Any] = None,
+                          lote_id: str = None) -> Dict[str, Any]:
+        """Processa o arquivo de entrada e grava cada resultado assim que fica pronto"""
+        lote_id = lote_id or self.identificar(entrada)
+        saida = Path(saida) if saida else self.saida_padrao(lote_id)
+        progresso = progresso if progresso is not None else {}
+        ja_processadas = self.linhas_processadas(saida)
+        progresso.update({'lote_id': lote_id, 'entrada': entrada, 'saida': str(saida), 'status': 'processando',
+                          'processadas': 0, 'erros': 0, 'fallback': 0, 'puladas': len(ja_processadas),
+                          'iniciado_em': datetime.now().isoformat()})
+        db_manager.salvar_lote(lote_id, progresso)
+
+        inicio = time.perf_counter()
+        limite_em_voo = self.max_workers * 2
+        em_voo = set()
+        salvo_em = [time.monotonic()]
+
+        def gravar(concluidos, arquivo_saida):
+            for futuro in concluidos:
+                resultado = futuro.result()
+                arquivo_saida.write(json.dumps(resultado, ensure_ascii=False, default=str) + '\n')
+                progresso['processadas'] += 1
+                progresso['erros'] += 'erro' in resultado
+                progresso['fallback'] += bool(resultado.get('fallback'))
+            arquivo_saida.flush()
+            decorrido = time.perf_counter() - inicio
+            progresso['perguntas_por_minuto'] = round(progresso['processadas'] / decorrido * 60, 1) if decorrido else 0
+            if time.monotonic() - salvo_em[0] >= 2:
+                db_manager.salvar_lote(lote_id, progresso)
+                salvo_em[0] = time.monotonic()
+
+        with open(saida, 'a', encoding='utf-8') as arquivo_saida, \
+                ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='lote') as executor:
+            for item in self.ler_perguntas(entrada):
+                if item['linha'] in ja_processadas or not item['pergunta']:
+                    continue
+                if len(em_voo) >= limite_em_voo:
+                    concluidos, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+                    gravar(concluidos, arquivo_saida)
+                em_voo.add(executor.submit(self.responder, item))
+
+            gravar(wait(em_voo).done, arquivo_saida)
+
+        progresso['status'] = 'concluido'
+        progresso['tempo_total_s'] = round(time.perf_counter() - inicio, 1)
+        db_manager.salvar_lote(lote_id, progresso)
+        self.logger.info(
+            f"Lote concluído: {progresso['processadas']} perguntas em {progresso['tempo_total_s']}s "
+            f"({progresso.get('perguntas_por_minuto', 0)} perguntas/min, {progresso['fallback']} no fallback) -> {saida}"
+        )
+        return progresso
+
+    @classmethod
+    def iniciar_em_segundo_plano(cls, entrada: str, saida: str = None) -> str:
+        """Dispara o lote numa thread e retorna o id para consulta de progresso
+
+        Se o mesmo arquivo já está sendo processado (em qualquer worker), só retorna o id dele.
+        """
+        lote_id = cls.identificar(entrada)
+        atual = db_manager.obter_lote(lote_id)
+        if atual and atual.get('status') in ('iniciado', 'processando') and atual['atualizado_ha_s'] < LOTE_INATIVO_S:
+            return lote_id
+        progresso = {'lote_id': lote_id, 'entrada': entrada, 'status': 'iniciado'}
+        db_manager.salvar_lote(lote_id, progresso)
+
+        def executar():
+            try:
+                cls().processar_arquivo(entrada, saida, progresso, lote_id)
+            except Exception as e:
+                progresso.update({'status': 'erro', 'erro': str(e)})
+                db_manager.salvar_lote(lote_id, progresso)
+                logging.getLogger('agente.suporte.lote').error(f"Erro no lote {lote_id}: {str(e)}")
+
+        threading.Thread(target=executar, name=f'lote-{lote_id}', daemon=True).start()
+        return lote_id
+
+    @staticmethod
+    def obter_progresso(lote_id: str) -> Dict[str, Any]:
+        """Progresso gravado no banco (None se o lote não existe)"""
+        return db_manager.obter_lote(lote_id)
+
+def main():
+    parser = argparse.ArgumentParser(description="Responde perguntas de suporte em lote")
+    parser.add_argument('entrada', help="Arquivo .csv (coluna 'pergunta') ou .jsonl")
+    parser.add_argument('saida', nargs='?', help="Arquivo .jsonl de saída (reexecutar retoma de onde parou)")
+    parser.add_argument('--workers', type=int, default=None, help="Perguntas processadas em paralelo")
+    args = parser.parse_args()
+
+    setup_logging()
+    resumo = ProcessadorLote(args.workers).processar_arquivo(args.entrada, args.saida)
+    print(json.dumps(resumo, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -117,6 +117,55 @@ def testar_agente_conteudo():
         print(f"❌ Erro no teste: {e}")
         return False
 
+def testar_datas_vendas():
+    """Testa a leitura de datas ISO e dd/mm/aaaa no mapeamento e nos agregados de vendas (sem API)"""
+    print("\n📅 Testando datas das planilhas de vendas...")
+    
+    try:
+        import pandas as pd
+        from mapeamento_colunas import inferir_mapeamento, converter_datas
+        from agregados_vendas import AgregadorVendas
+        
+        dias = pd.date_range('2024-01-01', '2024-01-28')
+        formatos = {
+            'ISO': dias.strftime('%Y-%m-%d'),
+            'dd/mm/aaaa': dias.strftime('%d/%m/%Y'),
+            'datetime com vazios': list(dias.to_pydatetime()) + [None] * 5
+        }
+        for nome, datas in formatos.items():
+            df = pd.DataFrame({'Data': pd.Series(list(datas), dtype=object), 'Valor': 10.0})
+            mapeamento = inferir_mapeamento(df)
+            assert mapeamento.get('data') == 'Data', f"{nome}: coluna de data não mapeada ({mapeamento})"
+            assert converter_datas(df['Data']).notna().sum() == len(dias), f"{nome}: datas perdidas"
+            agregador = AgregadorVendas(mapeamento)
+            agregador.adicionar(df)
+            periodo = agregador.resultado()['periodo']
+            assert periodo == {'inicio': '2024-01-01', 'fim': '2024-01-28'}, f"{nome}: período {periodo}"
+            print(f"✅ {nome}: {periodo['inicio']} a {periodo['fim']}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Erro no teste: {e}")
+        return False
+
+def testar_base_conhecimento():
+    """Testa se o prompt de suporte leva só as entradas relevantes da base (sem API)"""
+    print("\n📚 Testando seleção da base de conhecimento...")
+    
+    try:
+        from agente_suporte import AgenteSuporte
+        base = AgenteSuporte().base
+        
+        entradas = base.selecionar("Como faço para pagar com boleto?", top_k=3)
+        assert 0 < len(entradas) <= 3 < len(base.entradas), f"{len(entradas)} de {len(base.entradas)} entradas"
+        assert any('pagamento' in entrada['texto'] for entrada in entradas), "entrada de pagamento não selecionada"
+        print(f"✅ {len(entradas)} de {len(base.entradas)} entradas: {entradas[0]['texto'][:60]}...")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Erro no teste: {e}")
+        return False
+
 def main():
     """Função principal de teste"""
     print("🧪 TESTE DO SISTEMA DE AGENTES DE IA")
@@ -127,7 +176,9 @@ def main():
         ("Configuração", testar_configuracao),
         ("Agentes", testar_agentes),
         ("Agente de Suporte", testar_agente_suporte),
-        ("Agente de Conteúdo", testar_agente_conteudo)
+        ("Agente de Conteúdo", testar_agente_conteudo),
+        ("Datas de Vendas", testar_datas_vendas),
+        ("Base de Conhecimento", testar_base_conhecimento)
     ]
     
     resultados = []
@@ -3,6 +3,7 @@ Utilitários e funções auxiliares
 """
 import logging
 import json
+import unicodedata
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -50,3 +51,24 @@ def carregar_dados(arquivo: str) -> Optional[Dict]:
 def formatar_timestamp() -> str:
     """Retorna timestamp formatado"""
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _remover_acentos(caractere: str) -> str:
+    decomposto = unicodedata.normalize('NFKD', caractere)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+# Tabela pré-calculada para os caracteres latinos acentuados (Latin-1 e Latin Extended-A/B)
+_TABELA_ACENTOS = {codigo: _remover_acentos(chr(codigo)) for codigo in range(0x80, 0x250)}
+
+def normalizar_texto(texto: str) -> str:
+    """Normaliza texto para comparação (minúsculas, sem acentos e espaços extras)"""
+    texto = (texto or '').lower()
+    if not texto.isascii():
+        texto = texto.translate(_TABELA_ACENTOS)
+        if not texto.isascii():
+            texto = _remover_acentos(texto)
+    return ' '.join(texto.split()).strip(' ?!.')
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa simples de tokens (~4 caracteres por token)"""
+    return max(len(texto or '') // 4, 1)